@@ -12,7 +12,6 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import streamlit as st
 import logging
-import importlib
 from dotenv import load_dotenv
 from datetime import datetime
 import time
@@ -104,10 +103,36 @@ def initialize_session_state():
 # ========================================
 # Agent Initialization
 # ========================================
+@st.cache_resource(show_spinner=False)
+def get_shared_resources(db_path: str, model_id: str, google_api_key: str):
+    """
+    Tạo database, tracing và model client dùng chung cho mọi session.
+    
+    Streamlit cache theo (db_path, model_id, google_api_key) nên mỗi cấu hình
+    chỉ khởi tạo một lần cho cả process.
+    
+    Returns:
+        Tuple (db, model)
+    """
+    config = AgentConfig(
+        db_path=Path(db_path),
+        model_id=model_id,
+        google_api_key=google_api_key
+    )
+    manager = AgnoAgentManager(config)
+    manager.setup_database()
+    manager.setup_tracing()
+    logger.info(f"Shared agent resources ready for model {model_id} at {db_path}")
+    return manager.db, manager.setup_model()
+
+
 def initialize_agent(session_id: str, debug_mode: bool = False, custom_instructions: str = None):
     """
     Khởi tạo agent với cấu hình.
     
+    Agent của mỗi session dùng chung database, tracing và model client
+    đã được khởi tạo sẵn, nên chỉ cần dựng Agent.
+    
     Args:
         session_id: Session ID
         debug_mode: Enable debug mode
@@ -127,17 +152,14 @@ def initialize_agent(session_id: str, debug_mode: bool = False, custom_instructi
         if custom_instructions:
             instructions_list = [line.strip() for line in custom_instructions.split('\n') if line.strip()]
         
-        # Create and initialize agent manager
-        import core.agent_manager
-        import core.config
-        importlib.reload(core.config)
-        importlib.reload(core.agent_manager)
-        
-        from core.agent_manager import AgnoAgentManager
-        from core.config import AgentConfig
-        
-        manager = AgnoAgentManager(config)
-        manager.initialize(custom_instructions=instructions_list)
+        # Create agent manager on top of the shared resources
+        db, model = get_shared_resources(
+            str(config.db_path),
+            config.model_id,
+            config.google_api_key
+        )
+        manager = AgnoAgentManager(config, db=db, model=model)
+        manager.create_agent(custom_instructions=instructions_list)
         
         st.session_state.agent_manager = manager
         st.session_state.config = config
@@ -430,56 +452,49 @@ def render_chat_interface():
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        # Get agent response
+        # Stream agent response
         with st.chat_message("assistant"):
-            with st.spinner("Agent đang suy nghĩ..."):
-                try:
-                    # Run agent
-                    agent = st.session_state.agent_manager.agent
-                    response = agent.run(prompt)
-                    
-                    # Extract response content
-                    response_content = response.content if hasattr(response, 'content') else str(response)
-                    
-                    # Display response
-                    st.markdown(response_content)
-                    
-                    # Add to conversation history
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": response_content
-                    })
-                    
-                    # Track tool calls if available
-                    if hasattr(response, 'messages'):
-                        for msg in response.messages:
-                            if hasattr(msg, 'tool_calls') and msg.tool_calls:
-                                for tool_call in msg.tool_calls:
-                                    # Handle both dict and object formats
-                                    if isinstance(tool_call, dict):
-                                        tool_name = tool_call.get('function', {}).get('name', 'unknown')
-                                        tool_args = tool_call.get('function', {}).get('arguments', '{}')
-                                    else:
-                                        tool_name = tool_call.function.name if hasattr(tool_call, 'function') else 'unknown'
-                                        tool_args = tool_call.function.arguments if hasattr(tool_call, 'function') else '{}'
-                                    
-                                    st.session_state.tool_calls.append({
-                                        'name': tool_name,
-                                        'arguments': tool_args,
-                                        'timestamp': datetime.now().isoformat()
-                                    })
-                    
-                    # Refresh to update sidebar
-                    st.rerun()
-                    
-                except Exception as e:
-                    error_msg = f"❌ Lỗi: {str(e)}"
-                    st.error(error_msg)
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": error_msg
-                    })
-                    logger.error(f"Error processing question: {e}", exc_info=True)
+            placeholder = st.empty()
+            placeholder.markdown("_Agent đang suy nghĩ..._")
+            try:
+                response_content = ""
+                for event in st.session_state.agent_manager.stream_question(prompt):
+                    if event.kind == "content":
+                        response_content += event.content
+                        placeholder.markdown(response_content + "▌")
+                    elif event.kind == "tool_call_started":
+                        st.caption(f"🔧 {event.tool_name}({event.tool_args})")
+                    elif event.kind == "tool_call_completed":
+                        # Track tool calls
+                        st.session_state.tool_calls.append({
+                            'name': event.tool_name or 'unknown',
+                            'arguments': json.dumps(event.tool_args or {}),
+                            'result': event.tool_result,
+                            'timestamp': datetime.now().isoformat()
+                        })
+                    elif event.kind == "error":
+                        raise RuntimeError(event.content)
+                
+                # Display final response
+                placeholder.markdown(response_content)
+                
+                # Add to conversation history
+                st.session_state.messages.append({
+                    "role": "assistant",
+                    "content": response_content
+                })
+                
+                # Refresh to update sidebar
+                st.rerun()
+                
+            except Exception as e:
+                error_msg = f"❌ Lỗi: {str(e)}"
+                placeholder.error(error_msg)
+                st.session_state.messages.append({
+                    "role": "assistant",
+                    "content": error_msg
+                })
+                logger.error(f"Error processing question: {e}", exc_info=True)
 
 
 
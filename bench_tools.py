@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Microbenchmark cho các math tools trong core/tools.py.
+
+So sánh sum_1_to_n (closed-form) với cách cũ duyệt range(1, n + 1),
+và batch variants với vòng lặp gọi từng tool.
+
+Usage:
+    python bench_tools.py
+    python bench_tools.py --repeat 2000 > bench_output.txt
+"""
+
+import argparse
+import random
+import timeit
+
+from core import numeric
+from core.tools import (
+    sum_1_to_n,
+    calculator,
+    get_area_of_rectangle,
+    batch_sum_1_to_n,
+    batch_calculator,
+    batch_get_area_of_rectangle,
+)
+
+
+def _legacy_sum_1_to_n(n: int) -> int:
+    """Cách tính cũ, O(n)."""
+    if n < 1:
+        return 0
+    return sum(range(1, n + 1))
+
+
+def _per_call_us(stmt, repeat: int) -> float:
+    return min(timeit.repeat(stmt, number=repeat, repeat=3)) / repeat * 1e6
+
+
+def bench_sum(repeat: int) -> None:
+    print("sum_1_to_n: closed-form vs range() (µs/call)")
+    print(f"{'n':>24} {'closed-form':>14} {'range()':>14}")
+    for exponent in (3, 5, 7, 9, 18, 100):
+        n = 10 ** exponent
+        closed = _per_call_us(lambda: sum_1_to_n(n), repeat)
+        # range() chỉ chạy được trong thời gian hợp lý với n nhỏ
+        if exponent <= 7:
+            legacy_repeat = max(1, repeat // (10 ** (exponent - 2)))
+            legacy = f"{_per_call_us(lambda: _legacy_sum_1_to_n(n), legacy_repeat):14.2f}"
+        else:
+            legacy = f"{'skipped':>14}"
+        print(f"{'10^' + str(exponent):>24} {closed:14.3f} {legacy}")
+    print()
+
+
+def bench_batch(repeat: int, size: int) -> None:
+    rng = random.Random(0)
+    ns = [rng.randint(1, 10 ** 6) for _ in range(size)]
+    a = [rng.uniform(-100, 100) for _ in range(size)]
+    b = [rng.uniform(-100, 100) for _ in range(size)]
+    ops = [rng.choice(numeric.OPERATIONS) for _ in range(size)]
+
+    batch_repeat = max(1, repeat // 10)
+    rows = [
+        ("sum_1_to_n",
+         lambda: [sum_1_to_n(n) for n in ns],
+         lambda: batch_sum_1_to_n(ns)),
+        ("calculator",
+         lambda: [calculator(x, y, op) for x, y, op in zip(a, b, ops)],
+         lambda: batch_calculator(a, b, ops)),
+        ("get_area_of_rectangle",
+         lambda: [get_area_of_rectangle(x, y) for x, y in zip(a, b)],
+         lambda: batch_get_area_of_rectangle(a, b)),
+    ]
+
+    backend = "numpy" if numeric.NUMPY_AVAILABLE else "pure python"
+    print(f"Batch variants, {size} sub-problems per call ({backend}, µs/batch)")
+    print(f"{'tool':>24} {'loop':>14} {'batch':>14}")
+    for name, loop_stmt, batch_stmt in rows:
+        loop = _per_call_us(loop_stmt, batch_repeat)
+        batch = _per_call_us(batch_stmt, batch_repeat)
+        print(f"{name:>24} {loop:14.2f} {batch:14.2f}")
+    print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark core math tools")
+    parser.add_argument("--repeat", type=int, default=1000, help="Calls per timing sample")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Sub-problems per batch")
+    args = parser.parse_args()
+
+    bench_sum(args.repeat)
+    bench_batch(args.repeat, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,47 @@ Core agent components package.
 This package contains:
 - AgentConfig: Configuration dataclass
 - AgnoAgentManager: Agent lifecycle manager
-- Tools: sum_1_to_n, calculator
+- Tools: sum_1_to_n, calculator, get_area_of_circle, get_area_of_rectangle
+  và các batch variants (engine tính toán nằm trong core.numeric)
+- ToolCache: Cache LRU/TTL cho kết quả tool
+- configure_tracing: Tracing pipeline dùng chung trong process
+- IntentRouter: Trả lời câu hỏi chỉ cần một tool mà không gọi LLM
 """
 
 from .config import AgentConfig
-from .tools import sum_1_to_n, calculator
-from .agent_manager import AgnoAgentManager
+from .tools import (
+    sum_1_to_n,
+    calculator,
+    get_area_of_circle,
+    get_area_of_rectangle,
+    batch_sum_1_to_n,
+    batch_calculator,
+    batch_get_area_of_circle,
+    batch_get_area_of_rectangle,
+    evaluate_expression,
+)
+from .tool_cache import ToolCache, get_tool_cache
+from .router import IntentRouter
+from .tracing import configure_tracing, get_tracing_stats
+from .agent_manager import AgnoAgentManager, QuestionResult, StreamEvent
 
 __all__ = [
     "AgentConfig",
     "AgnoAgentManager",
+    "QuestionResult",
+    "StreamEvent",
+    "ToolCache",
+    "get_tool_cache",
+    "IntentRouter",
+    "configure_tracing",
+    "get_tracing_stats",
     "sum_1_to_n",
     "calculator",
+    "get_area_of_circle",
+    "get_area_of_rectangle",
+    "batch_sum_1_to_n",
+    "batch_calculator",
+    "batch_get_area_of_circle",
+    "batch_get_area_of_rectangle",
+    "evaluate_expression",
 ]
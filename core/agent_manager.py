@@ -4,39 +4,112 @@ Agent Manager module cho Agno Agent.
 Module này chứa class AgnoAgentManager để quản lý:
 - Khởi tạo database
 - Setup tracing
-- Tạo và cấu hình agent
-- Chạy câu hỏi qua agent
+- Tạo và cấu hình agent (tools có cache kết quả)
+- Cache câu trả lời của agent theo exact-match
+- Router trả lời câu hỏi đơn giản không cần LLM
+- Chạy câu hỏi qua agent (tuần tự, async đồng thời hoặc streaming)
 """
 
+import asyncio
 import logging
-from typing import List, Optional
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 from agno.agent import Agent
+from agno.run.agent import RunEvent
+from agno.run.base import RunStatus
 from agno.db.json import JsonDb
 from agno.models.google import Gemini
+from agno.models.openai import OpenAIChat
 from agno.tools.function import Function
-from agno.tracing import setup_tracing
 
 from .config import AgentConfig
-from .tools import sum_1_to_n, calculator, get_area_of_circle, get_area_of_rectangle
+from .tools import (
+    sum_1_to_n,
+    calculator,
+    get_area_of_circle,
+    get_area_of_rectangle,
+    batch_sum_1_to_n,
+    batch_calculator,
+    batch_get_area_of_circle,
+    batch_get_area_of_rectangle,
+    evaluate_expression,
+    CACHEABLE_TOOLS,
+)
+from .tool_cache import ToolCache, cached_function, get_tool_cache
+from .tracing import TracingState, configure_tracing
+from .response_cache import ResponseCache, get_response_cache, instructions_hash
+from .router import IntentRouter
 
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class QuestionResult:
+    """Kết quả chạy một câu hỏi qua agent."""
+    index: int
+    question: str
+    content: Optional[str] = None
+    error: Optional[str] = None
+    duration: float = 0.0
+    cached: bool = False
+    routed: bool = False
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class StreamEvent:
+    """Một sự kiện khi stream câu trả lời của agent."""
+    kind: str  # "content", "tool_call_started", "tool_call_completed", "error"
+    content: Optional[str] = None
+    tool_name: Optional[str] = None
+    tool_args: Optional[Dict[str, Any]] = None
+    tool_result: Optional[str] = None
+
+
+def _event_loop_running() -> bool:
+    """Có event loop đang chạy trong thread hiện tại không."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
 class AgnoAgentManager:
     """Quản lý việc khởi tạo và chạy Agno Agent."""
     
-    def __init__(self, config: AgentConfig):
+    def __init__(
+        self,
+        config: AgentConfig,
+        db: Optional[JsonDb] = None,
+        model: Optional[Any] = None
+    ):
         """
         Khởi tạo Agent Manager.
         
         Args:
             config: Cấu hình agent
+            db: Database dùng chung (tùy chọn, bỏ qua setup_database)
+            model: Model client dùng chung (tùy chọn)
         """
         self.config = config
-        self.db: Optional[JsonDb] = None
+        self.db: Optional[JsonDb] = db
+        self.model: Optional[Any] = model
         self.agent: Optional[Agent] = None
+        self.tool_cache: Optional[ToolCache] = None
+        self.response_cache: Optional[ResponseCache] = None
+        self._instructions_digest: Optional[str] = None
+        self.router: Optional[IntentRouter] = (
+            IntentRouter(min_confidence=config.router_min_confidence)
+            if config.router_enabled else None
+        )
         
     def setup_database(self) -> JsonDb:
         """
@@ -49,18 +122,149 @@ class AgnoAgentManager:
         self.db = JsonDb(db_path=str(self.config.db_path))
         return self.db
     
-    def setup_tracing(self) -> None:
+    def setup_tracing(self) -> TracingState:
         """
-        Thiết lập OpenTelemetry tracing.
+        Thiết lập OpenTelemetry tracing (một lần cho mỗi process).
+        
+        Returns:
+            TracingState của process
         
         Raises:
-            RuntimeError: Nếu database chưa được khởi tạo
+            RuntimeError: Nếu sink là "jsondb" mà database chưa được khởi tạo
         """
-        if self.db is None:
-            raise RuntimeError("Database must be initialized before setting up tracing")
+        return configure_tracing(self.config, db=self.db)
+    
+    def setup_model(self) -> Any:
+        """
+        Thiết lập model client (tạo một lần, dùng lại cho mọi agent).
+        
+        model_provider "openai" dùng OpenAIChat với openai_api_base (ví dụ
+        mock server local khi load test), mặc định là Gemini.
+        
+        Returns:
+            Model instance (Gemini hoặc OpenAIChat)
+        """
+        if self.model is None:
+            if self.config.model_provider == "openai":
+                self.model = OpenAIChat(
+                    id=self.config.model_id,
+                    api_key=self.config.openai_api_key,
+                    base_url=self.config.openai_api_base
+                )
+            else:
+                self.model = Gemini(
+                    id=self.config.model_id,
+                    api_key=self.config.google_api_key
+                )
+        return self.model
+    
+    def _check_api_key(self) -> None:
+        """Kiểm tra API key của model provider đã cấu hình."""
+        if self.config.model_provider == "openai":
+            if not self.config.openai_api_key:
+                raise ValueError("OPENAI_API_KEY not found in configuration")
+        elif not self.config.google_api_key:
+            raise ValueError("GOOGLE_API_KEY not found in configuration")
+    
+    def setup_tool_cache(self) -> Optional[ToolCache]:
+        """
+        Thiết lập cache kết quả tool (dùng chung trong process).
+        
+        Returns:
+            ToolCache instance hoặc None nếu cache bị tắt
+        """
+        if not self.config.tool_cache_enabled:
+            self.tool_cache = None
+            return None
+        
+        self.tool_cache = get_tool_cache(
+            max_size=self.config.tool_cache_max_size,
+            ttl=self.config.tool_cache_ttl,
+            persist_path=self.config.tool_cache_path
+        )
+        return self.tool_cache
+    
+    def setup_response_cache(self) -> Optional[ResponseCache]:
+        """
+        Thiết lập cache câu trả lời trên đĩa (dùng chung trong process).
+        
+        Returns:
+            ResponseCache instance hoặc None nếu cache bị tắt
+        """
+        if not self.config.response_cache_enabled:
+            self.response_cache = None
+            return None
+        
+        path = self.config.response_cache_path or Path(self.config.db_path).parent / "response_cache.sqlite"
+        self.response_cache = get_response_cache(path, max_bytes=self.config.response_cache_max_bytes)
+        return self.response_cache
+    
+    def _activate_instructions(self, instructions: List[str], invalidate: bool = False) -> None:
+        """
+        Ghi nhận instructions của agent hiện tại cho response cache.
+        
+        Args:
+            instructions: Instructions của agent
+            invalidate: Xóa các câu trả lời cache của prompt khác
+        """
+        self._instructions_digest = instructions_hash(instructions)
+        if self.response_cache is None:
+            self.setup_response_cache()
+        if invalidate and self.response_cache is not None:
+            self.response_cache.invalidate_except(self._instructions_digest)
+    
+    def _response_key(self, question: str) -> str:
+        tool_names = [tool.name for tool in (self.agent.tools or []) if hasattr(tool, "name")]
+        return ResponseCache.make_key(
+            question,
+            self._instructions_digest or "",
+            self.config.model_id,
+            tool_names
+        )
+    
+    def _route(self, question: str) -> Optional[str]:
+        """Câu trả lời của router, None nếu cần hỏi LLM."""
+        if self.router is None:
+            return None
+        result = self.router.route(question)
+        return result.answer if result else None
+    
+    def _get_cached_response(self, question: str) -> Optional[str]:
+        if self.response_cache is None:
+            return None
+        return self.response_cache.get(self._response_key(question))
+    
+    def _cache_response(self, question: str, content: Optional[str]) -> None:
+        if self.response_cache is None or not content:
+            return
+        self.response_cache.set(
+            self._response_key(question),
+            question,
+            content,
+            self._instructions_digest or ""
+        )
+    
+    def _build_tools(self, funcs: List[Callable]) -> List[Function]:
+        """
+        Đăng ký tool functions, bọc cache cho các tool đã opt-in.
+        
+        Args:
+            funcs: Danh sách tool functions
+            
+        Returns:
+            Danh sách agno Function
+        """
+        if self.tool_cache is None and self.config.tool_cache_enabled:
+            self.setup_tool_cache()
+        
+        cached_names = self.config.cached_tools
+        if cached_names is None:
+            cached_names = CACHEABLE_TOOLS
         
-        setup_tracing(db=self.db)
-        logger.info("OpenTelemetry tracing enabled")
+        return [
+            cached_function(func, self.tool_cache if func.__name__ in cached_names else None)
+            for func in funcs
+        ]
     
     def create_agent(self, custom_instructions: Optional[List[str]] = None) -> Agent:
         """
@@ -73,8 +277,7 @@ class AgnoAgentManager:
             ValueError: Nếu API key không được cung cấp
             RuntimeError: Nếu database chưa được khởi tạo
         """
-        if not self.config.google_api_key:
-            raise ValueError("GOOGLE_API_KEY not found in configuration")
+        self._check_api_key()
         
         if self.db is None:
             raise RuntimeError("Database must be initialized before creating agent")
@@ -85,16 +288,18 @@ class AgnoAgentManager:
         instructions = custom_instructions or self._get_instructions()
         
         self.agent = Agent(
-            model=Gemini(
-                id=self.config.model_id,
-                api_key=self.config.google_api_key
-            ),
-            tools=[
-                Function.from_callable(sum_1_to_n),
-                Function.from_callable(calculator),
-                Function.from_callable(get_area_of_circle),
-                Function.from_callable(get_area_of_rectangle)
-            ],
+            model=self.setup_model(),
+            tools=self._build_tools([
+                sum_1_to_n,
+                calculator,
+                get_area_of_circle,
+                get_area_of_rectangle,
+                batch_sum_1_to_n,
+                batch_calculator,
+                batch_get_area_of_circle,
+                batch_get_area_of_rectangle,
+                evaluate_expression,
+            ]),
             instructions=instructions,
             db=self.db,
             user_id=self.config.user_id,
@@ -105,6 +310,9 @@ class AgnoAgentManager:
             debug_mode=self.config.debug_mode,
         )
         
+        # Prompt đang dùng thay đổi thì các câu trả lời cũ không còn hợp lệ
+        self._activate_instructions(instructions, invalidate=custom_instructions is None)
+        
         return self.agent
     
     def _get_instructions(self) -> List[str]:
@@ -119,10 +327,9 @@ class AgnoAgentManager:
             try:
                 # Import here to avoid circular dependency
                 import sys
-                from pathlib import Path
                 sys.path.insert(0, str(Path(__file__).parent.parent))
                 
-                from training.prompt_manager import PromptManager
+                from training.utils.prompt_manager import PromptManager
                 
                 pm = PromptManager()
                 best_prompt = pm.load_best_prompt()
@@ -185,8 +392,7 @@ class AgnoAgentManager:
         Returns:
             Agent instance với prompt mới
         """
-        if not self.config.google_api_key:
-            raise ValueError("GOOGLE_API_KEY not found in configuration")
+        self._check_api_key()
         
         if self.db is None:
             raise RuntimeError("Database must be initialized before creating agent")
@@ -201,14 +407,8 @@ class AgnoAgentManager:
         logger.info(f"Creating agent with custom prompt ({len(instructions)} instructions)")
         
         self.agent = Agent(
-            model=Gemini(
-                id=self.config.model_id,
-                api_key=self.config.google_api_key
-            ),
-            tools=[
-                Function.from_callable(sum_1_to_n),
-                Function.from_callable(calculator)
-            ],
+            model=self.setup_model(),
+            tools=self._build_tools([sum_1_to_n, calculator, evaluate_expression]),
             instructions=instructions,
             db=self.db,
             user_id=self.config.user_id,
@@ -219,37 +419,220 @@ class AgnoAgentManager:
             debug_mode=False,
         )
         
+        self._activate_instructions(instructions)
+        
         return self.agent
     
-    def run_questions(self, questions: List[str]) -> None:
+    async def arun_questions(
+        self,
+        questions: List[str],
+        max_concurrency: Optional[int] = None
+    ) -> List[QuestionResult]:
+        """
+        Chạy danh sách câu hỏi đồng thời qua agent (async).
+        
+        Lỗi (và timeout) của từng câu hỏi được ghi vào QuestionResult.error
+        và không ảnh hưởng tới các câu hỏi khác. Khi chạy đồng thời, mỗi câu
+        hỏi dùng session riêng ("<session_id>-<index>") vì mỗi run đọc rồi ghi
+        lại cả session: dùng chung một session thì các run ghi đè lịch sử của nhau.
+        
+        Args:
+            questions: Danh sách các câu hỏi
+            max_concurrency: Số câu hỏi chạy cùng lúc tối đa
+                (mặc định: config.max_concurrency)
+            
+        Returns:
+            Danh sách QuestionResult theo đúng thứ tự câu hỏi
+            
+        Raises:
+            RuntimeError: Nếu agent chưa được khởi tạo
+        """
+        if self.agent is None:
+            raise RuntimeError("Agent must be initialized before running questions")
+        
+        limit = max(1, max_concurrency or self.config.max_concurrency)
+        semaphore = asyncio.Semaphore(limit)
+        concurrent = limit > 1 and len(questions) > 1
+        timeout = self.config.question_timeout
+        
+        async def run_one(index: int, question: str) -> QuestionResult:
+            async with semaphore:
+                start = time.perf_counter()
+                routed = self._route(question)
+                if routed is not None:
+                    return QuestionResult(
+                        index=index,
+                        question=question,
+                        content=routed,
+                        duration=time.perf_counter() - start,
+                        routed=True
+                    )
+                cached = self._get_cached_response(question)
+                if cached is not None:
+                    return QuestionResult(
+                        index=index,
+                        question=question,
+                        content=cached,
+                        duration=time.perf_counter() - start,
+                        cached=True
+                    )
+                session_id = f"{self.config.session_id}-{index}" if concurrent else None
+                try:
+                    # Timeout để một call bị treo không giữ slot của semaphore mãi
+                    response = await asyncio.wait_for(
+                        self.agent.arun(question, session_id=session_id), timeout
+                    )
+                    if getattr(response, "status", RunStatus.completed) == RunStatus.completed:
+                        self._cache_response(question, response.content)
+                    return QuestionResult(
+                        index=index,
+                        question=question,
+                        content=response.content,
+                        duration=time.perf_counter() - start
+                    )
+                except asyncio.TimeoutError:
+                    logger.error(f"Question {index} timed out after {timeout:g}s")
+                    return QuestionResult(
+                        index=index,
+                        question=question,
+                        error=f"Timed out after {timeout:g}s",
+                        duration=time.perf_counter() - start
+                    )
+                except Exception as e:
+                    logger.error(f"Error processing question {index}: {e}", exc_info=True)
+                    return QuestionResult(
+                        index=index,
+                        question=question,
+                        error=str(e),
+                        duration=time.perf_counter() - start
+                    )
+        
+        return await asyncio.gather(
+            *(run_one(i, question) for i, question in enumerate(questions, 1))
+        )
+    
+    def stream_question(self, question: str) -> Iterator[StreamEvent]:
+        """
+        Chạy một câu hỏi và yield nội dung/tool call ngay khi có.
+        
+        Args:
+            question: Câu hỏi
+            
+        Yields:
+            StreamEvent cho từng đoạn nội dung và từng tool call
+            
+        Raises:
+            RuntimeError: Nếu agent chưa được khởi tạo
+        """
+        if self.agent is None:
+            raise RuntimeError("Agent must be initialized before running questions")
+        
+        routed = self._route(question)
+        if routed is not None:
+            yield StreamEvent(kind="content", content=routed)
+            return
+        
+        cached = self._get_cached_response(question)
+        if cached is not None:
+            yield StreamEvent(kind="content", content=cached)
+            return
+        
+        chunks: List[str] = []
+        failed = False
+        for event in self.agent.run(question, stream=True, stream_events=True):
+            event_type = getattr(event, "event", None)
+            
+            if event_type == RunEvent.run_content.value:
+                if event.content:
+                    chunks.append(str(event.content))
+                    yield StreamEvent(kind="content", content=chunks[-1])
+            elif event_type in (RunEvent.tool_call_started.value, RunEvent.tool_call_completed.value):
+                tool = event.tool
+                yield StreamEvent(
+                    kind=(
+                        "tool_call_started"
+                        if event_type == RunEvent.tool_call_started.value
+                        else "tool_call_completed"
+                    ),
+                    tool_name=tool.tool_name if tool else None,
+                    tool_args=tool.tool_args if tool else None,
+                    tool_result=tool.result if tool else None,
+                )
+            elif event_type == RunEvent.run_error.value:
+                failed = True
+                yield StreamEvent(kind="error", content=str(event.content))
+        
+        if not failed:
+            self._cache_response(question, "".join(chunks))
+    
+    def _print_streamed_answer(self, question: str) -> None:
+        """In câu trả lời theo từng đoạn khi agent stream."""
+        print("🤖 Agent trả lời:")
+        for event in self.stream_question(question):
+            if event.kind == "content":
+                print(event.content, end="", flush=True)
+            elif event.kind == "tool_call_started":
+                print(f"\n🔧 {event.tool_name}({event.tool_args})", flush=True)
+            elif event.kind == "tool_call_completed":
+                print(f"   → {event.tool_result}", flush=True)
+            elif event.kind == "error":
+                print(f"\n❌ {event.content}", flush=True)
+        print("\n")
+    
+    def run_questions(self, questions: List[str], stream: bool = False) -> None:
         """
-        Chạy danh sách câu hỏi qua agent.
+        Chạy danh sách câu hỏi qua agent và in kết quả.
+        
+        Gọi từ bên trong một event loop đang chạy (Jupyter, code async) thì
+        chạy tuần tự như stream=True, vì asyncio.run() không dùng được ở đó.
         
         Args:
             questions: Danh sách các câu hỏi
+            stream: In câu trả lời từng đoạn khi có (chạy tuần tự)
             
         Raises:
             RuntimeError: Nếu agent chưa được khởi tạo
         """
         if self.agent is None:
             raise RuntimeError("Agent must be initialized before running questions")
+        if not stream and _event_loop_running():
+            logger.info("Event loop already running, answering questions sequentially")
+            stream = True
         
         print("=" * 60)
         print(f"📁 Database: {self.config.db_path.absolute()}")
         print("=" * 60)
         print()
         
-        for i, question in enumerate(questions, 1):
-            print(f"\n{'─' * 60}")
-            print(f"❓ Câu hỏi {i}: {question}")
-            print(f"{'─' * 60}\n")
+        if stream:
+            for i, question in enumerate(questions, 1):
+                print(f"\n{'─' * 60}")
+                print(f"❓ Câu hỏi {i}: {question}")
+                print(f"{'─' * 60}\n")
+                
+                try:
+                    self._print_streamed_answer(question)
+                except Exception as e:
+                    logger.error(f"Error processing question {i}: {e}", exc_info=True)
+                    print(f"❌ Lỗi khi xử lý câu hỏi: {e}\n")
+        else:
+            results = asyncio.run(self.arun_questions(questions))
             
-            try:
-                response = self.agent.run(question)
-                print(f"🤖 Agent trả lời:\n{response.content}\n")
-            except Exception as e:
-                logger.error(f"Error processing question {i}: {e}", exc_info=True)
-                print(f"❌ Lỗi khi xử lý câu hỏi: {e}\n")
+            for result in results:
+                print(f"\n{'─' * 60}")
+                print(f"❓ Câu hỏi {result.index}: {result.question}")
+                print(f"{'─' * 60}\n")
+                
+                if result.ok:
+                    if result.routed:
+                        source = "router"
+                    elif result.cached:
+                        source = "cache"
+                    else:
+                        source = f"{result.duration:.2f}s"
+                    print(f"🤖 Agent trả lời ({source}):\n{result.content}\n")
+                else:
+                    print(f"❌ Lỗi khi xử lý câu hỏi: {result.error}\n")
         
         print("=" * 60)
         print("✅ Demo hoàn tất!")
@@ -6,6 +6,10 @@ Module này chứa tất cả cấu hình cho agent, bao gồm:
 - Database paths
 - User và session IDs
 - Debug mode
+- Tool result cache
+- Tracing pipeline (sink, sampling, export queue)
+- Response cache
+- Intent router
 """
 
 import os
@@ -19,18 +23,39 @@ DEFAULT_DB_PATH = Path(__file__).parent / "agno_memory.db"
 class AgentConfig:
     """Configuration for the Agent."""
     model_id: str = "gemini-2.0-flash"
+    model_provider: Optional[str] = None  # "gemini" or "openai" (OpenAI-compatible, uses openai_api_base)
     db_filename: str = "agno_memory.db"
     db_path: Optional[Path] = None
     user_id: str = "user_demo"
     session_id: str = "demo_session"
     num_history_messages: int = 10
     debug_mode: bool = True
+    max_concurrency: int = 4
+    question_timeout: Optional[float] = 120.0
     use_best_prompt: bool = True
     fallback_to_default: bool = True
     openai_api_key: Optional[str] = None
     openai_api_base: Optional[str] = None
     google_api_key: Optional[str] = None
     tools: Optional[list] = None
+    tool_cache_enabled: bool = True
+    tool_cache_max_size: int = 1024
+    tool_cache_ttl: Optional[float] = None
+    tool_cache_path: Optional[Path] = None
+    cached_tools: Optional[List[str]] = None
+    tracing_sink: str = "jsondb"
+    tracing_sample_ratio: float = 1.0
+    tracing_queue_size: int = 2048
+    tracing_export_batch_size: int = 512
+    tracing_schedule_delay_millis: int = 1000
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    tracing_file_path: Optional[Path] = None
+    tracing_service_name: str = "agno-agent"
+    response_cache_enabled: bool = True
+    response_cache_path: Optional[Path] = None
+    response_cache_max_bytes: int = 50 * 1024 * 1024
+    router_enabled: bool = True
+    router_min_confidence: float = 0.9
 
     def __post_init__(self):
         # Set default db_path if not provided
@@ -44,6 +69,8 @@ class AgentConfig:
             self.google_api_key = os.getenv("GOOGLE_API_KEY")
         if not self.openai_api_base:
             self.openai_api_base = os.getenv("OPENAI_API_BASE")
+        if not self.model_provider:
+            self.model_provider = os.getenv("AGENT_MODEL_PROVIDER", "gemini")
 
 
 
@@ -0,0 +1,146 @@
+"""
+Expression evaluator module cho Agno Agent.
+
+Module này tính giá trị cả một biểu thức số học trong một lần gọi tool,
+an toàn với input từ LLM:
+- Parse bằng ast, chỉ cho phép số và các toán tử trong whitelist
+- Giới hạn độ lớn số nguyên (bigint) và số mũ
+- Giới hạn độ dài biểu thức, độ sâu và thời gian tính
+"""
+
+import ast
+import operator
+import time
+from decimal import Decimal, localcontext
+from fractions import Fraction
+from typing import Any, Callable, Dict, Optional, Type
+
+from .numeric import DECIMAL_PRECISION, coerce
+
+
+class ExpressionError(ValueError):
+    """Biểu thức không hợp lệ hoặc vượt giới hạn."""
+
+
+MAX_EXPRESSION_LENGTH = 1000
+MAX_DEPTH = 50
+MAX_INT_BITS = 4096
+MAX_EXPONENT = 10000
+DEFAULT_TIMEOUT = 0.5
+
+_BINARY_OPERATORS: Dict[Type[ast.operator], Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+_UNARY_OPERATORS: Dict[Type[ast.unaryop], Callable[[Any], Any]] = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+def _bits(value: Any) -> int:
+    if isinstance(value, int):
+        return value.bit_length()
+    if isinstance(value, Fraction):
+        return max(value.numerator.bit_length(), value.denominator.bit_length())
+    return 0
+
+
+class _Evaluator:
+    def __init__(self, mode: str, timeout: float):
+        self.mode = mode
+        self.deadline = time.perf_counter() + timeout
+
+    def _check_limits(self, value: Any) -> Any:
+        if _bits(value) > MAX_INT_BITS:
+            raise ExpressionError(f"Result exceeds {MAX_INT_BITS}-bit integer limit")
+        if time.perf_counter() > self.deadline:
+            raise ExpressionError("Evaluation timed out")
+        return value
+
+    def _literal(self, value: Any) -> Any:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ExpressionError(f"Unsupported literal: {value!r}")
+        # Số nguyên giữ nguyên (bigint) trong mode float
+        if self.mode == "float" and isinstance(value, int):
+            return value
+        return coerce(value, self.mode)
+
+    def _power(self, base: Any, exponent: Any) -> Any:
+        if abs(exponent) > MAX_EXPONENT:
+            raise ExpressionError(f"Exponent exceeds limit of {MAX_EXPONENT}")
+        if isinstance(exponent, (int, Fraction, Decimal)) and exponent == int(exponent):
+            # Ước lượng số bit trước khi tính để không treo vì bigint quá lớn
+            if _bits(base) * abs(int(exponent)) > MAX_INT_BITS:
+                raise ExpressionError(f"Result exceeds {MAX_INT_BITS}-bit integer limit")
+            exponent = int(exponent)
+        elif isinstance(base, (Fraction, Decimal)):
+            raise ExpressionError("Exact modes only support integer exponents")
+        elif base < 0 and not float(exponent).is_integer():
+            # Python trả về số phức cho (-8) ** 0.5
+            raise ExpressionError("Negative base with a fractional exponent has no real result")
+        return base ** exponent
+
+    def visit(self, node: ast.AST, depth: int = 0) -> Any:
+        if depth > MAX_DEPTH:
+            raise ExpressionError("Expression is nested too deeply")
+
+        if isinstance(node, ast.Expression):
+            return self.visit(node.body, depth + 1)
+        if isinstance(node, ast.Constant):
+            return self._literal(node.value)
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+            return _UNARY_OPERATORS[type(node.op)](self.visit(node.operand, depth + 1))
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+            left = self.visit(node.left, depth + 1)
+            right = self.visit(node.right, depth + 1)
+            try:
+                if isinstance(node.op, ast.Pow):
+                    result = self._power(left, right)
+                else:
+                    result = _BINARY_OPERATORS[type(node.op)](left, right)
+            except ZeroDivisionError:
+                raise ExpressionError("Division by zero")
+            except (OverflowError, ArithmeticError) as e:
+                raise ExpressionError(f"Arithmetic error: {e}")
+            return self._check_limits(result)
+
+        raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
+
+
+def evaluate(expression: str, mode: str = "float", timeout: Optional[float] = None) -> Any:
+    """
+    Tính giá trị biểu thức số học.
+
+    Hỗ trợ + - * / // % ** (và ^ như lũy thừa), dấu ngoặc, số âm.
+
+    Args:
+        expression: Biểu thức, ví dụ "(5+3)*2/4"
+        mode: "float", "decimal" hoặc "fraction"
+        timeout: Thời gian tính tối đa (giây)
+
+    Returns:
+        Giá trị của biểu thức
+
+    Raises:
+        ExpressionError: Nếu biểu thức không hợp lệ hoặc vượt giới hạn
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"Expression longer than {MAX_EXPRESSION_LENGTH} characters")
+
+    source = expression.strip().replace("^", "**").replace("×", "*").replace("÷", "/")
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"Invalid expression: {e.msg}")
+
+    evaluator = _Evaluator(mode, DEFAULT_TIMEOUT if timeout is None else timeout)
+    # Cùng độ chính xác Decimal với core.numeric để calculator và biểu thức cho cùng kết quả
+    with localcontext() as ctx:
+        ctx.prec = DECIMAL_PRECISION
+        return evaluator.visit(tree)
@@ -0,0 +1,244 @@
+"""
+Numeric engine cho các math tools.
+
+Module này là phần tính toán phía sau core/tools.py:
+- Công thức đóng (closed-form) với số nguyên lớn cho sum_1_to_n
+- Chế độ tính chính xác: float, Decimal, Fraction
+- Batch variants nhận list hoặc NumPy array (NumPy là optional)
+"""
+
+from decimal import Decimal, localcontext
+from fractions import Fraction
+from typing import Any, List, Sequence, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+Number = Union[int, float, Decimal, Fraction]
+
+NUMERIC_MODES = ("float", "decimal", "fraction")
+OPERATIONS = ("add", "subtract", "multiply", "divide")
+
+# Giữ nguyên hằng số pi mà get_area_of_circle luôn dùng để các chế độ
+# exact cho ra cùng một phép tính, chỉ khác độ chính xác.
+CIRCLE_PI = "3.14159"
+
+# Độ chính xác cho chế độ Decimal
+DECIMAL_PRECISION = 50
+
+# Giới hạn để n * (n + 1) // 2 không tràn int64 khi vectorize bằng NumPy
+_INT64_SAFE_N = 3_000_000_000
+
+
+def _check_mode(mode: str) -> None:
+    if mode not in NUMERIC_MODES:
+        raise ValueError(f"Unknown numeric mode '{mode}', expected one of {NUMERIC_MODES}")
+
+
+def coerce(value: Any, mode: str = "float") -> Number:
+    """
+    Chuyển giá trị sang kiểu số tương ứng với mode.
+
+    Args:
+        value: int, float, str, Decimal hoặc Fraction
+        mode: "float", "decimal" hoặc "fraction"
+
+    Returns:
+        Giá trị đã chuyển đổi
+    """
+    _check_mode(mode)
+    if mode == "float":
+        return float(value)
+    if mode == "decimal":
+        if isinstance(value, Fraction):
+            with localcontext() as ctx:
+                ctx.prec = DECIMAL_PRECISION
+                return Decimal(value.numerator) / Decimal(value.denominator)
+        # str(float) tránh kéo theo sai số nhị phân của float (0.1 -> 0.1)
+        return Decimal(str(value)) if isinstance(value, float) else Decimal(value)
+    if isinstance(value, float):
+        return Fraction(str(value))
+    return Fraction(value)
+
+
+def _operand(value: Any, mode: str) -> Number:
+    """
+    Như coerce(), nhưng trong mode float số nguyên được giữ nguyên (bigint).
+
+    Phép toán int với int vì vậy vẫn chính xác như calculator ban đầu;
+    chỉ chuyển sang float khi có toán hạng float hoặc khi chia.
+    """
+    if mode == "float" and isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return coerce(value, mode)
+
+
+def _all_ints(*value_lists: List[Any]) -> bool:
+    return all(
+        isinstance(v, int) and not isinstance(v, bool)
+        for values in value_lists for v in values
+    )
+
+
+def closed_form_sum(n: int) -> int:
+    """
+    Tổng 1 + 2 + ... + n bằng công thức n(n+1)/2, O(1) với số nguyên lớn.
+
+    Args:
+        n: Số nguyên (n < 1 trả về 0)
+
+    Returns:
+        Tổng các số nguyên từ 1 đến n
+    """
+    n = int(n)
+    if n < 1:
+        return 0
+    return n * (n + 1) // 2
+
+
+def arithmetic(a: Any, b: Any, operation: str, mode: str = "float") -> Number:
+    """
+    Thực hiện một phép toán cơ bản trong mode đã chọn.
+
+    Chia cho 0 trả về vô cực (float/decimal) như calculator vẫn làm;
+    chế độ fraction không biểu diễn được vô cực nên trả về float('inf').
+    Phép toán không hợp lệ trả về 0. Trong mode float, int với int
+    (trừ phép chia) cho kết quả int chính xác.
+    """
+    _check_mode(mode)
+    a = _operand(a, mode)
+    b = _operand(b, mode)
+
+    # Mọi phép toán Decimal dùng DECIMAL_PRECISION, như core/expression.py
+    with localcontext() as ctx:
+        ctx.prec = DECIMAL_PRECISION
+        if operation == "add":
+            return a + b
+        if operation == "subtract":
+            return a - b
+        if operation == "multiply":
+            return a * b
+        if operation == "divide":
+            if b == 0:
+                return Decimal("Infinity") if mode == "decimal" else float("inf")
+            return a / b
+    return 0
+
+
+def circle_area(radius: Any, mode: str = "float") -> Number:
+    """Diện tích hình tròn pi * r^2 trong mode đã chọn."""
+    radius = coerce(radius, mode)
+    with localcontext() as ctx:
+        ctx.prec = DECIMAL_PRECISION
+        return coerce(CIRCLE_PI, mode) * radius * radius
+
+
+def rectangle_area(length: Any, width: Any, mode: str = "float") -> Number:
+    """Diện tích hình chữ nhật trong mode đã chọn (int * int giữ nguyên int)."""
+    _check_mode(mode)
+    with localcontext() as ctx:
+        ctx.prec = DECIMAL_PRECISION
+        return _operand(length, mode) * _operand(width, mode)
+
+
+# ========================================
+# Batch variants
+# ========================================
+def _as_list(values: Any) -> List[Any]:
+    if NUMPY_AVAILABLE and isinstance(values, np.ndarray):
+        return values.tolist()
+    return list(values)
+
+
+def _use_numpy(mode: str) -> bool:
+    return NUMPY_AVAILABLE and mode == "float"
+
+
+def _broadcast(values: Any, size: int) -> List[Any]:
+    if isinstance(values, (str, int, float, Decimal, Fraction)):
+        return [values] * size
+    values = _as_list(values)
+    if len(values) != size:
+        raise ValueError(f"Batch size mismatch: expected {size}, got {len(values)}")
+    return values
+
+
+def batch_closed_form_sum(ns: Union[Sequence[int], Any]) -> List[int]:
+    """
+    Tính sum_1_to_n cho nhiều n cùng lúc.
+
+    Dùng NumPy khi mọi |n| đủ nhỏ để không tràn int64, còn lại dùng
+    số nguyên Python (bigint) nên luôn chính xác.
+    """
+    values = _as_list(ns)
+    if NUMPY_AVAILABLE and values and -_INT64_SAFE_N < min(values) and max(values) < _INT64_SAFE_N:
+        arr = np.maximum(np.asarray(values, dtype=np.int64), 0)
+        return (arr * (arr + 1) // 2).tolist()
+    return [closed_form_sum(n) for n in values]
+
+
+def batch_arithmetic(
+    a_values: Any,
+    b_values: Any,
+    operations: Union[str, Sequence[str]],
+    mode: str = "float"
+) -> List[Number]:
+    """
+    Thực hiện nhiều phép toán cùng lúc.
+
+    Args:
+        a_values: Danh sách/array toán hạng thứ nhất
+        b_values: Danh sách/array toán hạng thứ hai (hoặc một số để broadcast)
+        operations: Một phép toán cho tất cả, hoặc danh sách phép toán
+        mode: "float", "decimal" hoặc "fraction"
+
+    Returns:
+        Danh sách kết quả theo đúng thứ tự đầu vào
+    """
+    _check_mode(mode)
+    a_list = _as_list(a_values)
+    b_list = _broadcast(b_values, len(a_list))
+    ops = _broadcast(operations, len(a_list))
+
+    # Toàn số nguyên: tính từng phần tử để giữ kết quả int chính xác
+    if _use_numpy(mode) and not _all_ints(a_list, b_list):
+        a = np.asarray(a_list, dtype=np.float64)
+        b = np.asarray(b_list, dtype=np.float64)
+        op_arr = np.asarray(ops)
+        result = np.zeros_like(a)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            quotient = np.where(b != 0, a / np.where(b != 0, b, 1.0), np.inf)
+        result = np.where(op_arr == "add", a + b, result)
+        result = np.where(op_arr == "subtract", a - b, result)
+        result = np.where(op_arr == "multiply", a * b, result)
+        result = np.where(op_arr == "divide", quotient, result)
+        return result.tolist()
+
+    return [arithmetic(a, b, op, mode) for a, b, op in zip(a_list, b_list, ops)]
+
+
+def batch_circle_area(radii: Any, mode: str = "float") -> List[Number]:
+    """Diện tích nhiều hình tròn cùng lúc."""
+    _check_mode(mode)
+    radius_list = _as_list(radii)
+    if _use_numpy(mode):
+        r = np.asarray(radius_list, dtype=np.float64)
+        return (float(CIRCLE_PI) * r * r).tolist()
+    return [circle_area(r, mode) for r in radius_list]
+
+
+def batch_rectangle_area(lengths: Any, widths: Any, mode: str = "float") -> List[Number]:
+    """Diện tích nhiều hình chữ nhật cùng lúc."""
+    _check_mode(mode)
+    length_list = _as_list(lengths)
+    width_list = _broadcast(widths, len(length_list))
+    if _use_numpy(mode) and not _all_ints(length_list, width_list):
+        return (
+            np.asarray(length_list, dtype=np.float64) * np.asarray(width_list, dtype=np.float64)
+        ).tolist()
+    return [rectangle_area(l, w, mode) for l, w in zip(length_list, width_list)]
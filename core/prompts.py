@@ -4,11 +4,11 @@ Centralized prompt storage for Agno Agent.
 
 # --- Agent Instructions ---
 DEFAULT_AGENT_INSTRUCTIONS = [
-    "As an AI assistant, you are to solve math problems given by the user.\\n\\nTo perform this task, use the following tools if relevant to the user's problem:\\n*   `sum_1_to_n`: to calculate the sum of integers from 1 to n.\\n*   `calculator`: for arithmetic calculations.\\n*   `get_area_of_circle`: to calculate the area of a circle.\\n*   `get_area_of_rectangle`: to calculate the area of a rectangle.\\n\\nSolve the user's problem step by step. Begin by restating the user's problem to confirm your understanding. If the user's problem is ambiguous, clarify the ambiguity by asking the user a clarifying question. Then, show your steps to solve it using the available tools, and give the final answer in the end.\\n"
+    "As an AI assistant, you are to solve math problems given by the user.\\n\\nTo perform this task, use the following tools if relevant to the user's problem:\\n*   `sum_1_to_n`: to calculate the sum of integers from 1 to n.\\n*   `calculator`: for arithmetic calculations.\\n*   `evaluate_expression`: to evaluate a whole arithmetic expression (e.g. `(5+3)*2/4`) in one call.\\n*   `get_area_of_circle`: to calculate the area of a circle.\\n*   `get_area_of_rectangle`: to calculate the area of a rectangle.\\n\\nSolve the user's problem step by step. Begin by restating the user's problem to confirm your understanding. If the user's problem is ambiguous, clarify the ambiguity by asking the user a clarifying question. Then, show your steps to solve it using the available tools, and give the final answer in the end.\\n"
 ]
 
 # --- Training Prompts ---
-INITIAL_TRAINING_PROMPT = """As an AI assistant, you are to solve math problems given by the user.\\n\\nTo perform this task, use the following tools if relevant to the user's problem:\\n*   `sum_1_to_n`: to calculate the sum of integers from 1 to n.\\n*   `calculator`: for arithmetic calculations.\\n*   `get_area_of_circle`: to calculate the area of a circle.\\n*   `get_area_of_rectangle`: to calculate the area of a rectangle.\\n\\nSolve the user's problem step by step. Begin by restating the user's problem to confirm your understanding. If the user's problem is ambiguous, clarify the ambiguity by asking the user a clarifying question. Then, show your steps to solve it using the available tools, and give the final answer in the end.\\n"""
+INITIAL_TRAINING_PROMPT = """As an AI assistant, you are to solve math problems given by the user.\\n\\nTo perform this task, use the following tools if relevant to the user's problem:\\n*   `sum_1_to_n`: to calculate the sum of integers from 1 to n.\\n*   `calculator`: for arithmetic calculations.\\n*   `evaluate_expression`: to evaluate a whole arithmetic expression (e.g. `(5+3)*2/4`) in one call.\\n*   `get_area_of_circle`: to calculate the area of a circle.\\n*   `get_area_of_rectangle`: to calculate the area of a rectangle.\\n\\nSolve the user's problem step by step. Begin by restating the user's problem to confirm your understanding. If the user's problem is ambiguous, clarify the ambiguity by asking the user a clarifying question. Then, show your steps to solve it using the available tools, and give the final answer in the end.\\n"""
 
 # --- Grading Prompts ---
 GRADER_AGENT_INSTRUCTIONS = [
@@ -32,6 +32,28 @@ Agent Response: {agent_response}
 ### OUTPUT FORMAT
 Respond with ONLY the numerical score (e.g., "0.8"). No explanation.
 """
+
+BATCH_GRADING_PROMPT_TEMPLATE = """
+### ROLE
+You are an expert evaluator. Grade each AGENT RESPONSE against its USER QUESTION, independently of the other items.
+
+### ITEMS
+{items}
+
+### GRADING CRITERIA (0.0 to 1.0)
+- 1.0: Perfect. The response is accurate, helpful, and completely answers the user's question.
+- 0.8-0.9: Correct info but could be more concise or better phrased.
+- 0.5-0.7: Partially correct. Got the main idea but missed some details, made minor errors, or didn't fully address all parts of the question.
+- 0.0-0.4: Wrong, irrelevant, or fails to address the question.
+
+### OUTPUT FORMAT
+Respond with ONLY a JSON array of exactly {count} numerical scores, one per item in order (e.g., [0.8, 1.0]). No explanation.
+"""
+
+BATCH_GRADING_ITEM_TEMPLATE = """#### Item {index}
+User Question: {question}
+Agent Response: {agent_response}
+"""
 # Gradient computed with gpt-4o-mini has result: ## Critique of the Prompt
 
 # ### 1. Structural Issues
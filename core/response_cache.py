@@ -0,0 +1,195 @@
+"""
+Response cache module cho Agno Agent.
+
+Module này cache câu trả lời của agent theo exact-match:
+- Key gồm câu hỏi đã chuẩn hóa, hash của instructions, model id và tool set
+- Lưu trên đĩa (SQLite), evict theo tổng kích thước (LRU)
+- Tự xóa các entry của prompt cũ khi prompt đang dùng thay đổi
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_question(question: str) -> str:
+    """
+    Chuẩn hóa câu hỏi: Unicode NFC, không phân biệt hoa thường, gộp khoảng trắng,
+    bỏ dấu câu cuối câu.
+
+    "!" ngay sau chữ số là giai thừa ("5!") nên được giữ lại.
+    """
+    text = unicodedata.normalize("NFC", question).casefold()
+    text = re.sub(r"\s+", " ", text).strip()
+    trailing = re.search(r"[ ?.!]*$", text)
+    body = text[:trailing.start()]
+    if body[-1:].isdigit():
+        body += re.match(r"!*", trailing.group()).group()
+    return body
+
+
+def instructions_hash(instructions: Union[str, Sequence[str]]) -> str:
+    """Hash của instructions (string hoặc danh sách dòng)."""
+    if not isinstance(instructions, str):
+        instructions = "\n".join(instructions)
+    return hashlib.sha256(instructions.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Cache câu trả lời của agent, lưu trong SQLite với giới hạn kích thước."""
+
+    def __init__(self, path: Union[str, Path], max_bytes: int = 50 * 1024 * 1024):
+        """
+        Khởi tạo cache.
+
+        Args:
+            path: Đường dẫn file SQLite
+            max_bytes: Tổng kích thước câu trả lời tối đa được giữ
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.path),
+            timeout=5.0,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, instructions_hash TEXT NOT NULL, "
+            "question TEXT NOT NULL, content TEXT NOT NULL, "
+            "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_access ON responses (last_access)"
+        )
+
+    @staticmethod
+    def make_key(
+        question: str,
+        instructions_digest: str,
+        model_id: str,
+        tool_names: Sequence[str]
+    ) -> str:
+        """Tạo key từ câu hỏi đã chuẩn hóa, instructions hash, model và tools."""
+        payload = json.dumps(
+            [normalize_question(question), instructions_digest, model_id, sorted(tool_names)],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Lấy câu trả lời đã cache, None nếu chưa có."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, question: str, content: str, instructions_digest: str) -> None:
+        """Lưu câu trả lời và evict các entry ít dùng nhất nếu vượt max_bytes."""
+        size = len(content.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, instructions_hash, question, content, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, instructions_digest, question, content, size, time.time()),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+        ).fetchall()
+        to_delete: List[str] = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            to_delete.append(key)
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", [(k,) for k in to_delete])
+        self.evictions += len(to_delete)
+
+    def invalidate_except(self, instructions_digest: str) -> int:
+        """
+        Xóa mọi entry không thuộc instructions hiện tại.
+
+        Returns:
+            Số entry đã xóa
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE instructions_hash != ?", (instructions_digest,)
+            )
+            removed = cursor.rowcount
+        if removed:
+            logger.info(f"Response cache: invalidated {removed} entries from previous prompts")
+        return removed
+
+    def clear(self) -> None:
+        """Xóa toàn bộ cache."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê cache."""
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": count,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+_shared_caches: Dict[str, ResponseCache] = {}
+_shared_lock = threading.Lock()
+
+
+def get_response_cache(path: Union[str, Path], max_bytes: int = 50 * 1024 * 1024) -> ResponseCache:
+    """Lấy ResponseCache dùng chung trong process cho một file."""
+    key = str(Path(path).absolute())
+    with _shared_lock:
+        cache = _shared_caches.get(key)
+        if cache is None:
+            cache = ResponseCache(path, max_bytes=max_bytes)
+            _shared_caches[key] = cache
+        return cache
@@ -0,0 +1,289 @@
+"""
+Intent router module cho Agno Agent.
+
+Module này trả lời trực tiếp các câu hỏi đơn giản chỉ cần một tool,
+không cần gọi LLM:
+- Diện tích hình chữ nhật / hình tròn
+- Tổng từ 1 đến n
+- Một phép toán hai số (cộng, trừ, nhân, chia)
+
+Hỗ trợ tiếng Việt và tiếng Anh. Khi độ tin cậy thấp, router trả về None
+để agent (LLM) xử lý.
+"""
+
+import logging
+import math
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .expression import MAX_EXPONENT, MAX_INT_BITS
+from .response_cache import normalize_question
+from .tools import calculator, get_area_of_circle, get_area_of_rectangle, sum_1_to_n
+
+
+logger = logging.getLogger(__name__)
+
+NUMBER = r"-?\d+(?:[.,]\d+)?(?:\s*(?:\^|\*\*)\s*\d+)?"
+_NUMBER_RE = re.compile(NUMBER)
+_VIETNAMESE_CHARS = re.compile(
+    r"[àáạảãâầấậẩẫăằắặẳẵèéẹẻẽêềếệểễìíịỉĩòóọỏõôồốộổỗơờớợởỡùúụủũưừứựửữỳýỵỷỹđ]"
+)
+
+_OPERATORS = [
+    ("add", r"\+|cộng|plus"),
+    ("subtract", r"-|trừ|minus"),
+    ("multiply", r"\*|x|×|nhân(?:\s+với)?|times|multiplied\s+by"),
+    ("divide", r"/|÷|chia(?:\s+cho)?|divided\s+by"),
+]
+_OPERATION_SYMBOLS = {"add": "+", "subtract": "-", "multiply": "×", "divide": "÷"}
+
+# Các từ đổi nghĩa bài toán (chu vi, đường chéo, tổng số chẵn...): để LLM xử lý
+_QUALIFIERS = re.compile(
+    r"chu vi|perimeter|circumference|đường chéo|diagonal|chẵn|lẻ|\beven\b|\bodd\b"
+    r"|bình phương|lập phương|square[sd]?\b|cube[sd]?\b|một nửa|\bhalf\b|\btwice\b|gấp đôi"
+    r"|nguyên tố|\bprimes?\b|chia hết|divisible|bội|multiples?\b"
+)
+
+# Từ được phép trong câu hỏi "explicit": mọi từ khác có thể là điều kiện
+# mà router không hiểu (ví dụ "chia hết cho 3", "prime")
+_PLAIN_WORDS = set("""
+tính hãy cho biết kết quả của là bằng bao nhiêu mấy có và với các số nguyên từ đến tới
+diện tích hình chữ nhật tròn chiều dài rộng bán kính đường tổng cộng trừ nhân chia
+what is what's the of a an area rectangle circle with length width radius diameter and
+sum integers numbers all from to calculate compute find plus minus times multiplied divided by
+r d cm m mm km dm units unit
+""".split())
+_WORD_RE = re.compile(r"[^\W\d_]+")
+
+_ARITHMETIC_PREFIX = re.compile(
+    r"^(?:hãy\s+)?(?:tính|kết quả(?:\s+của)?|what\s+is|what's|calculate|compute)\s*:?\s*"
+)
+_ARITHMETIC_SUFFIX = re.compile(r"\s*(?:=\s*\??|bằng\s+(?:bao\s+nhiêu|mấy)|là\s+bao\s+nhiêu)?\s*$")
+
+
+@dataclass
+class RouteResult:
+    """Kết quả của router cho một câu hỏi."""
+    intent: str
+    tool: str
+    args: Dict[str, Any]
+    result: Any
+    answer: str
+    confidence: float
+    explicit: bool = False  # Intent và tham số ghi rõ, không có từ nào router không hiểu
+
+
+def parse_number(text: str) -> float:
+    """
+    Đọc một số: "5", "2.5", "2,5", "1,000", "10^9", "10**9".
+
+    Dấu phẩy theo sau đúng 3 chữ số được hiểu là phân cách hàng nghìn,
+    còn lại là dấu thập phân (kiểu Việt Nam).
+
+    Raises:
+        ValueError: Nếu lũy thừa vượt MAX_EXPONENT / MAX_INT_BITS
+    """
+    text = text.replace(" ", "")
+    power = re.split(r"\^|\*\*", text)
+    if len(power) == 2:
+        # Cùng giới hạn với core.expression để không treo vì bigint quá lớn
+        base, exponent = parse_number(power[0]), int(power[1])
+        if exponent > MAX_EXPONENT:
+            raise ValueError(f"Exponent exceeds limit of {MAX_EXPONENT}")
+        if isinstance(base, int) and base.bit_length() * exponent > MAX_INT_BITS:
+            raise ValueError(f"Result exceeds {MAX_INT_BITS}-bit integer limit")
+        return base ** exponent
+    if re.fullmatch(r"-?\d{1,3}(?:,\d{3})+", text):
+        text = text.replace(",", "")
+    text = text.replace(",", ".")
+    value = float(text)
+    return int(value) if value.is_integer() and "." not in text else value
+
+
+def format_number(value: Any) -> str:
+    """Hiển thị số gọn: bỏ .0 của số nguyên, tối đa 10 chữ số có nghĩa."""
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < 1e15:
+            return str(int(value))
+        return f"{value:.10g}"
+    return str(value)
+
+
+class IntentRouter:
+    """Router xác định intent và gọi tool trực tiếp."""
+
+    def __init__(self, min_confidence: float = 0.9):
+        """
+        Khởi tạo router.
+
+        Args:
+            min_confidence: Độ tin cậy tối thiểu để trả lời thay LLM
+        """
+        self.min_confidence = min_confidence
+        self.hits = 0
+        self.misses = 0
+        self.intent_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    # ----------------------------------------
+    # Intent parsers
+    # ----------------------------------------
+    @staticmethod
+    def _labelled(text: str, labels: str) -> Optional[float]:
+        match = re.search(rf"\b(?:{labels})\b\s*(?:là|bằng|=|of|is)?\s*({NUMBER})", text)
+        return parse_number(match.group(1)) if match else None
+
+    def _rectangle(self, text: str, numbers: List[str], vi: bool) -> Optional[RouteResult]:
+        if not (re.search(r"hình chữ nhật|rectangle", text) and re.search(r"diện tích|area", text)):
+            return None
+        length = self._labelled(text, r"chiều dài|dài|length")
+        width = self._labelled(text, r"chiều rộng|rộng|width")
+        confidence = 1.0
+        if length is None or width is None:
+            if len(numbers) != 2:
+                return None
+            length, width = (parse_number(n) for n in numbers)
+            confidence = 0.7
+        elif len(numbers) != 2:
+            confidence = 0.5
+
+        area = get_area_of_rectangle(length, width)
+        l, w, a = format_number(length), format_number(width), format_number(area)
+        answer = (
+            f"Diện tích hình chữ nhật có chiều dài {l} và chiều rộng {w} là {l} × {w} = {a}."
+            if vi else
+            f"The area of a rectangle with length {l} and width {w} is {l} × {w} = {a}."
+        )
+        return RouteResult("rectangle_area", "get_area_of_rectangle",
+                           {"length": length, "width": width}, area, answer, confidence)
+
+    def _circle(self, text: str, numbers: List[str], vi: bool) -> Optional[RouteResult]:
+        if not (re.search(r"hình tròn|circle", text) and re.search(r"diện tích|area", text)):
+            return None
+        confidence = 1.0
+        radius = self._labelled(text, r"bán kính|radius|r")
+        if radius is None:
+            diameter = self._labelled(text, r"đường kính|diameter|d")
+            if diameter is not None:
+                radius = diameter / 2
+            elif len(numbers) == 1:
+                radius = parse_number(numbers[0])
+                confidence = 0.7
+            else:
+                return None
+        if len(numbers) != 1:
+            confidence = 0.5
+
+        area = get_area_of_circle(radius)
+        r, a = format_number(radius), format_number(area)
+        answer = (
+            f"Diện tích hình tròn có bán kính {r} là 3.14159 × {r}² = {a}."
+            if vi else
+            f"The area of a circle with radius {r} is 3.14159 × {r}² = {a}."
+        )
+        return RouteResult("circle_area", "get_area_of_circle",
+                           {"radius": radius}, area, answer, confidence)
+
+    def _sum(self, text: str, numbers: List[str], vi: bool) -> Optional[RouteResult]:
+        if not re.search(r"tổng|sum|cộng", text):
+            return None
+        match = re.search(
+            rf"(?:từ|from|of)?\s*1\s*(?:đến|tới|to|\.\.\.?|-)\s*({NUMBER})", text
+        )
+        if match is None:
+            return None
+        n = parse_number(match.group(1))
+        if not isinstance(n, int):
+            return None
+        confidence = 1.0 if len(numbers) == 2 else 0.5
+
+        total = sum_1_to_n(n)
+        answer = (
+            f"Tổng các số nguyên từ 1 đến {n} là {n} × ({n} + 1) / 2 = {total}."
+            if vi else
+            f"The sum of the integers from 1 to {n} is {n} × ({n} + 1) / 2 = {total}."
+        )
+        return RouteResult("sum_1_to_n", "sum_1_to_n", {"n": n}, total, answer, confidence)
+
+    def _arithmetic(self, text: str, numbers: List[str], vi: bool) -> Optional[RouteResult]:
+        expr = _ARITHMETIC_SUFFIX.sub("", _ARITHMETIC_PREFIX.sub("", text))
+        for operation, pattern in _OPERATORS:
+            match = re.fullmatch(rf"({NUMBER})\s*(?:{pattern})\s*({NUMBER})", expr)
+            if match is None:
+                continue
+            a, b = parse_number(match.group(1)), parse_number(match.group(2))
+            if operation == "divide" and b == 0:
+                return None
+            result = calculator(a, b, operation)
+            if isinstance(result, float) and not math.isfinite(result):
+                return None
+            sa, sb, sr = format_number(a), format_number(b), format_number(result)
+            symbol = _OPERATION_SYMBOLS[operation]
+            answer = f"Kết quả: {sa} {symbol} {sb} = {sr}." if vi else f"Result: {sa} {symbol} {sb} = {sr}."
+            return RouteResult("arithmetic", "calculator",
+                               {"a": a, "b": b, "operation": operation}, result, answer, 1.0)
+        return None
+
+    # ----------------------------------------
+    # Public API
+    # ----------------------------------------
+    def classify(self, question: str) -> Optional[RouteResult]:
+        """
+        Xác định intent và tính kết quả, không áp dụng ngưỡng tin cậy.
+
+        Returns:
+            RouteResult tốt nhất hoặc None nếu không nhận ra intent
+            (hoặc câu hỏi có từ đổi nghĩa bài toán như chu vi, số chẵn)
+        """
+        # Giữ "!" của giai thừa ("3 + 5!") để câu hỏi đó không khớp phép cộng
+        text = normalize_question(question)
+        if _QUALIFIERS.search(text):
+            return None
+        numbers = _NUMBER_RE.findall(text)
+        vi = bool(_VIETNAMESE_CHARS.search(text))
+
+        best: Optional[RouteResult] = None
+        for parser in (self._rectangle, self._circle, self._sum, self._arithmetic):
+            try:
+                candidate = parser(text, numbers, vi)
+            except (ValueError, OverflowError, ZeroDivisionError):
+                candidate = None
+            if candidate and (best is None or candidate.confidence > best.confidence):
+                best = candidate
+        if best is not None:
+            best.explicit = best.confidence >= 1.0 and all(
+                word in _PLAIN_WORDS for word in _WORD_RE.findall(text)
+            )
+        return best
+
+    def route(self, question: str) -> Optional[RouteResult]:
+        """
+        Trả lời câu hỏi nếu đủ tin cậy, ngược lại trả về None.
+
+        Args:
+            question: Câu hỏi của người dùng
+
+        Returns:
+            RouteResult hoặc None (cần fallback về LLM)
+        """
+        result = self.classify(question)
+        with self._lock:
+            if result is None or result.confidence < self.min_confidence:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.intent_counts[result.intent] = self.intent_counts.get(result.intent, 0) + 1
+        logger.debug(f"Router answered '{question}' via {result.tool}({result.args})")
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Tỉ lệ câu hỏi được router trả lời."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "intents": dict(self.intent_counts),
+        }
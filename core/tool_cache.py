@@ -0,0 +1,298 @@
+"""
+Tool result cache module cho Agno Agent.
+
+Module này cung cấp cache cho các tool thuần (pure functions):
+- LRU eviction với kích thước giới hạn
+- TTL (time-to-live) cho từng entry
+- Opt-in theo từng tool
+- Lưu xuống đĩa (SQLite) để dùng chung giữa các process
+- Key gồm hash source code của tool: sửa tool thì cache cũ (kể cả trên đĩa) không còn dùng
+- Trả về bản sao của kết quả mutable (list, dict...) để caller sửa không làm hỏng cache
+- Bộ đếm hit/miss
+"""
+
+import copy
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from fractions import Fraction
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+from agno.tools.function import Function
+
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+_IMMUTABLE = (type(None), bool, int, float, complex, str, bytes, Decimal, Fraction)
+
+
+def _detach(value: Any) -> Any:
+    """Bản sao của giá trị mutable; giá trị immutable trả về nguyên."""
+    return value if isinstance(value, _IMMUTABLE) else copy.deepcopy(value)
+
+
+def tool_version(func: Callable) -> str:
+    """Hash source code của tool (tên qualname nếu không đọc được source)."""
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = f"{func.__module__}.{func.__qualname__}"
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+
+
+class ToolCache:
+    """LRU/TTL cache cho kết quả tool, có thể persist xuống SQLite."""
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: Optional[float] = None,
+        persist_path: Optional[Union[str, Path]] = None
+    ):
+        """
+        Khởi tạo cache.
+
+        Args:
+            max_size: Số entry tối đa (trong bộ nhớ và trên đĩa)
+            ttl: Thời gian sống của entry tính bằng giây (None = không hết hạn)
+            persist_path: Đường dẫn file SQLite (None = chỉ giữ trong bộ nhớ)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.persist_path = Path(persist_path) if persist_path else None
+
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if self.persist_path is not None:
+            self._open_store()
+
+    # ----------------------------------------
+    # Persistence
+    # ----------------------------------------
+    def _open_store(self) -> None:
+        self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.persist_path),
+            timeout=5.0,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tool_cache ("
+            "key TEXT PRIMARY KEY, created_at REAL NOT NULL, value BLOB NOT NULL, "
+            "accessed_at REAL NOT NULL DEFAULT 0)"
+        )
+        # File tạo trước khi có accessed_at: thêm cột, lấy created_at làm lần dùng cuối
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tool_cache)")}
+        if "accessed_at" not in columns:
+            self._conn.execute("ALTER TABLE tool_cache ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE tool_cache SET accessed_at = created_at")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS tool_cache_accessed_at ON tool_cache (accessed_at)"
+        )
+        logger.info(f"Tool cache persisted at: {self.persist_path}")
+
+    def _load_from_store(self, key: str) -> Any:
+        row = self._conn.execute(
+            "SELECT created_at, value FROM tool_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return _MISSING
+        created_at, blob = row
+        if self._is_expired(created_at):
+            self._conn.execute("DELETE FROM tool_cache WHERE key = ?", (key,))
+            self.expirations += 1
+            return _MISSING
+        value = pickle.loads(blob)
+        self._touch_in_store(key)
+        self._remember(key, created_at, value)
+        return value
+
+    def _touch_in_store(self, key: str) -> None:
+        """Cập nhật lần dùng cuối của entry trên đĩa (LRU giữa các process)."""
+        try:
+            self._conn.execute(
+                "UPDATE tool_cache SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+        except sqlite3.Error as e:
+            logger.debug(f"Could not update tool cache access time: {e}")
+
+    def _write_to_store(self, key: str, created_at: float, value: Any) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO tool_cache (key, created_at, value, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, created_at, pickle.dumps(value), created_at),
+        )
+        # Giữ kích thước trên đĩa trong giới hạn, bỏ các entry lâu không dùng nhất
+        self._conn.execute(
+            "DELETE FROM tool_cache WHERE key IN ("
+            "SELECT key FROM tool_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_size,),
+        )
+
+    # ----------------------------------------
+    # Core API
+    # ----------------------------------------
+    @staticmethod
+    def make_key(tool_name: str, args: tuple, kwargs: dict, version: str = "") -> str:
+        """Tạo key ổn định từ tên tool, version (hash source) và tham số."""
+        payload = json.dumps(
+            {"tool": tool_name, "version": version, "args": args, "kwargs": kwargs},
+            sort_keys=True,
+            default=repr,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    def _remember(self, key: str, created_at: float, value: Any) -> None:
+        self._entries[key] = (created_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Lấy giá trị theo key, trả về default nếu không có hoặc đã hết hạn."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if not self._is_expired(created_at):
+                    self._entries.move_to_end(key)
+                    if self._conn is not None:
+                        self._touch_in_store(key)
+                    self.hits += 1
+                    return _detach(value)
+                del self._entries[key]
+                self.expirations += 1
+
+            if self._conn is not None:
+                value = self._load_from_store(key)
+                if value is not _MISSING:
+                    self.hits += 1
+                    return _detach(value)
+
+            self.misses += 1
+            return default
+
+    def set(self, key: str, value: Any) -> None:
+        """Lưu giá trị vào cache."""
+        created_at = time.time()
+        # Giữ bản sao: caller sửa value sau khi set không làm hỏng entry
+        value = _detach(value)
+        with self._lock:
+            self._remember(key, created_at, value)
+            if self._conn is not None:
+                try:
+                    self._write_to_store(key, created_at, value)
+                except (sqlite3.Error, pickle.PicklingError) as e:
+                    logger.warning(f"Could not persist tool cache entry: {e}")
+
+    def clear(self) -> None:
+        """Xóa toàn bộ cache (cả trên đĩa)."""
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM tool_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê hit/miss của cache."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def wrap(self, func: Callable) -> Callable:
+        """
+        Bọc một pure function để dùng cache.
+
+        Wrapper giữ nguyên tên, docstring và signature nên
+        Function.from_callable sinh ra cùng schema như hàm gốc. Key gồm
+        hash source của func, nên sửa tool thì không dùng lại kết quả cũ.
+        """
+        tool_name = func.__name__
+        version = tool_version(func)
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Chuẩn hóa positional/keyword/default để cùng lời gọi cho cùng key
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = self.make_key(tool_name, (), bound.arguments, version)
+            value = self.get(key, _MISSING)
+            if value is _MISSING:
+                value = func(*args, **kwargs)
+                self.set(key, value)
+            return value
+
+        wrapper.cache = self
+        return wrapper
+
+
+# ========================================
+# Shared caches
+# ========================================
+_shared_caches: Dict[tuple, ToolCache] = {}
+_shared_lock = threading.Lock()
+
+
+def get_tool_cache(
+    max_size: int = 1024,
+    ttl: Optional[float] = None,
+    persist_path: Optional[Union[str, Path]] = None
+) -> ToolCache:
+    """
+    Lấy ToolCache dùng chung trong process cho cùng một cấu hình.
+
+    Mọi agent (và mọi rollout) trong process cùng cấu hình sẽ chia sẻ
+    một cache; persist_path cho phép chia sẻ giữa các process.
+    """
+    key = (max_size, ttl, str(persist_path) if persist_path else None)
+    with _shared_lock:
+        cache = _shared_caches.get(key)
+        if cache is None:
+            cache = ToolCache(max_size=max_size, ttl=ttl, persist_path=persist_path)
+            _shared_caches[key] = cache
+        return cache
+
+
+def cached_function(func: Callable, cache: Optional[ToolCache]) -> Function:
+    """
+    Tạo agno Function từ callable, có cache nếu được cung cấp.
+
+    Args:
+        func: Pure tool function
+        cache: ToolCache (None = không cache)
+
+    Returns:
+        agno Function
+    """
+    if cache is None:
+        return Function.from_callable(func)
+    return Function.from_callable(cache.wrap(func))
@@ -4,47 +4,168 @@ Tool functions module cho Agno Agent.
 Module này chứa các tool functions mà agent có thể sử dụng:
 - sum_1_to_n: Tính tổng từ 1 đến n
 - calculator: Máy tính đơn giản với 4 phép toán cơ bản
+- get_area_of_circle, get_area_of_rectangle: Diện tích hình học
+- batch_*: Các biến thể xử lý nhiều bài toán trong một lần gọi tool
+- evaluate_expression: Tính cả một biểu thức số học trong một lần gọi
+
+Phần tính toán nằm trong core.numeric và core.expression.
 """
 
+from typing import List
+
+from .expression import ExpressionError, evaluate
+
+from .numeric import (
+    arithmetic,
+    batch_arithmetic,
+    batch_circle_area,
+    batch_closed_form_sum,
+    batch_rectangle_area,
+    circle_area,
+    closed_form_sum,
+    rectangle_area,
+)
+
 
 def sum_1_to_n(n: int) -> int:
+    """
+    Calculate the sum of integers from 1 to n.
+
+    Args:
+        n: Upper bound (returns 0 if n < 1)
+
+    Returns:
+        Sum 1 + 2 + ... + n
+    """
+    return closed_form_sum(n)
 
-    if n < 1:
-        return 0
-    return sum(range(1, n + 1))
 
+def calculator(a: float, b: float, operation: str, mode: str = "float") -> float:
+    """
+    Simple calculator.
 
-def calculator(a: float, b: float, operation: str) -> float:
+    Args:
+        a: First operand
+        b: Second operand
+        operation: One of "add", "subtract", "multiply", "divide"
+        mode: "float" (default), "decimal" or "fraction" for exact arithmetic
 
-    operations = {
-        "add": a + b,
-        "subtract": a - b,
-        "multiply": a * b,
-        "divide": a / b if b != 0 else float('inf')
-    }
-    return operations.get(operation, 0)
+    Returns:
+        Result of the operation
+    """
+    return arithmetic(a, b, operation, mode)
 
 def get_area_of_circle(radius: float) -> float:
     """
     Get area of circle.
-    
+
     Args:
         radius: Radius of circle
-        
+
     Returns:
         Area of circle
     """
-    return 3.14159 * radius * radius
+    return circle_area(radius)
 
 def get_area_of_rectangle(length: float, width: float) -> float:
     """
     Get area of rectangle.
-    
+
     Args:
         length: Length of rectangle
         width: Width of rectangle
-        
+
     Returns:
         Area of rectangle
     """
-    return length * width
\ No newline at end of file
+    return rectangle_area(length, width)
+
+
+def batch_sum_1_to_n(ns: List[int]) -> List[int]:
+    """
+    Calculate sum_1_to_n for many values of n in one call.
+
+    Args:
+        ns: List of upper bounds
+
+    Returns:
+        List of sums, in the same order as ns
+    """
+    return batch_closed_form_sum(ns)
+
+
+def batch_calculator(a: List[float], b: List[float], operations: List[str], mode: str = "float") -> list:
+    """
+    Run many calculator operations in one call.
+
+    Args:
+        a: List of first operands
+        b: List of second operands
+        operations: List of operations ("add", "subtract", "multiply", "divide")
+        mode: "float" (default), "decimal" or "fraction" for exact arithmetic
+
+    Returns:
+        List of results, in input order
+    """
+    return batch_arithmetic(a, b, operations, mode)
+
+
+def batch_get_area_of_circle(radii: List[float]) -> List[float]:
+    """
+    Get areas of many circles in one call.
+
+    Args:
+        radii: List of radii
+
+    Returns:
+        List of areas, in input order
+    """
+    return batch_circle_area(radii)
+
+
+def batch_get_area_of_rectangle(lengths: List[float], widths: List[float]) -> List[float]:
+    """
+    Get areas of many rectangles in one call.
+
+    Args:
+        lengths: List of lengths
+        widths: List of widths
+
+    Returns:
+        List of areas, in input order
+    """
+    return batch_rectangle_area(lengths, widths)
+
+
+def evaluate_expression(expression: str, mode: str = "float") -> str:
+    """
+    Evaluate a whole arithmetic expression in one call.
+
+    Supports + - * / // % ** (or ^), parentheses and negative numbers,
+    e.g. "(5+3)*2/4". Use this instead of chaining several calculator calls.
+
+    Args:
+        expression: Arithmetic expression using numbers only
+        mode: "float" (default), "decimal" or "fraction" for exact arithmetic
+
+    Returns:
+        The value of the expression, or an error message
+    """
+    try:
+        return str(evaluate(expression, mode))
+    except ExpressionError as e:
+        return f"Error: {e}"
+
+
+# Các tool thuần (cùng input luôn cho cùng output), an toàn để cache
+CACHEABLE_TOOLS = (
+    "sum_1_to_n",
+    "calculator",
+    "get_area_of_circle",
+    "get_area_of_rectangle",
+    "batch_sum_1_to_n",
+    "batch_calculator",
+    "batch_get_area_of_circle",
+    "batch_get_area_of_rectangle",
+    "evaluate_expression",
+)
@@ -0,0 +1,210 @@
+"""
+Tracing module cho Agno Agent.
+
+Module này thiết lập OpenTelemetry tracing một lần cho mỗi process:
+- Head-based sampling theo tỉ lệ
+- Export bất đồng bộ qua queue có giới hạn (BatchSpanProcessor)
+- Chọn nơi ghi span: JsonDb, OTLP, file hoặc none
+- Bộ đếm span đã export / bị drop
+"""
+
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource, SERVICE_NAME
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+from .config import AgentConfig
+
+
+logger = logging.getLogger(__name__)
+
+TRACING_SINKS = ("jsondb", "otlp", "file", "none")
+
+
+class FileSpanExporter(SpanExporter):
+    """Ghi span ra file dạng JSON lines."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                for span in spans:
+                    f.write(json.dumps(json.loads(span.to_json())) + "\n")
+            return SpanExportResult.SUCCESS
+        except OSError as e:
+            logger.warning(f"Could not write spans to {self.path}: {e}")
+            return SpanExportResult.FAILURE
+
+    def shutdown(self) -> None:
+        pass
+
+
+class CountingSpanExporter(SpanExporter):
+    """Bọc một exporter để đếm số span export thành công / thất bại."""
+
+    def __init__(self, exporter: SpanExporter):
+        self.exporter = exporter
+        self.exported = 0
+        self.failed = 0
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        result = self.exporter.export(spans)
+        if result == SpanExportResult.SUCCESS:
+            self.exported += len(spans)
+        else:
+            self.failed += len(spans)
+        return result
+
+    def shutdown(self) -> None:
+        self.exporter.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.exporter.force_flush(timeout_millis)
+
+
+class CountingBatchSpanProcessor(BatchSpanProcessor):
+    """BatchSpanProcessor đếm số span bị drop khi queue đầy."""
+
+    def __init__(self, exporter: SpanExporter, max_queue_size: int, **kwargs):
+        super().__init__(exporter, max_queue_size=max_queue_size, **kwargs)
+        self.max_queue_size = max_queue_size
+        self.queued = 0
+        self.dropped = 0
+        self._count_lock = threading.Lock()
+
+    def _queue_length(self) -> int:
+        # Queue nội bộ của SDK; nếu không truy cập được thì không đếm drop
+        queue = getattr(getattr(self, "_batch_processor", None), "_queue", None)
+        return len(queue) if queue is not None else 0
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if span.context is not None and span.context.trace_flags.sampled:
+            with self._count_lock:
+                if self._queue_length() >= self.max_queue_size:
+                    self.dropped += 1
+                else:
+                    self.queued += 1
+        super().on_end(span)
+
+
+@dataclass
+class TracingState:
+    """Trạng thái tracing của process."""
+    sink: str
+    sample_ratio: float
+    provider: Optional[TracerProvider] = None
+    processor: Optional[CountingBatchSpanProcessor] = None
+    exporter: Optional[CountingSpanExporter] = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Bộ đếm span của pipeline."""
+        return {
+            "sink": self.sink,
+            "sample_ratio": self.sample_ratio,
+            "queued": self.processor.queued if self.processor else 0,
+            "dropped": self.processor.dropped if self.processor else 0,
+            "exported": self.exporter.exported if self.exporter else 0,
+            "export_failed": self.exporter.failed if self.exporter else 0,
+        }
+
+
+_state: Optional[TracingState] = None
+_state_lock = threading.Lock()
+
+
+def _create_exporter(config: AgentConfig, db: Any) -> SpanExporter:
+    sink = config.tracing_sink
+    if sink == "jsondb":
+        if db is None:
+            raise RuntimeError("Database must be initialized before setting up tracing")
+        from agno.tracing.exporter import DatabaseSpanExporter
+        return DatabaseSpanExporter(db=db)
+    if sink == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(endpoint=config.tracing_otlp_endpoint, timeout=30)
+    if sink == "file":
+        path = config.tracing_file_path or Path(config.db_path).parent / "traces.jsonl"
+        return FileSpanExporter(path)
+    raise ValueError(f"Unknown tracing sink '{sink}', expected one of {TRACING_SINKS}")
+
+
+def configure_tracing(config: AgentConfig, db: Any = None) -> TracingState:
+    """
+    Thiết lập tracing pipeline, chỉ một lần cho mỗi process.
+
+    Các lần gọi sau trả về pipeline đã có (không thêm processor mới).
+
+    Args:
+        config: Cấu hình agent (các trường tracing_*)
+        db: Database cho sink "jsondb"
+
+    Returns:
+        TracingState của process
+    """
+    global _state
+    with _state_lock:
+        if _state is not None:
+            if (_state.sink, _state.sample_ratio) != (config.tracing_sink, config.tracing_sample_ratio):
+                logger.warning(
+                    f"Tracing already initialized (sink={_state.sink}, "
+                    f"sample_ratio={_state.sample_ratio}); ignoring new settings"
+                )
+            return _state
+
+        if config.tracing_sink == "none":
+            _state = TracingState(sink="none", sample_ratio=0.0)
+            logger.info("Tracing disabled")
+            return _state
+
+        exporter = CountingSpanExporter(_create_exporter(config, db))
+        processor = CountingBatchSpanProcessor(
+            exporter,
+            max_queue_size=config.tracing_queue_size,
+            max_export_batch_size=min(config.tracing_export_batch_size, config.tracing_queue_size),
+            schedule_delay_millis=config.tracing_schedule_delay_millis,
+        )
+
+        # Nếu process đã có TracerProvider (ví dụ OTLP của training) thì gắn thêm vào
+        provider = trace.get_tracer_provider()
+        if isinstance(provider, TracerProvider):
+            logger.info("Reusing existing TracerProvider; its sampler is kept")
+        else:
+            provider = TracerProvider(
+                resource=Resource(attributes={SERVICE_NAME: config.tracing_service_name}),
+                sampler=ParentBased(TraceIdRatioBased(config.tracing_sample_ratio)),
+            )
+            trace.set_tracer_provider(provider)
+        provider.add_span_processor(processor)
+
+        from openinference.instrumentation.agno import AgnoInstrumentor
+        AgnoInstrumentor().instrument(tracer_provider=provider)
+
+        _state = TracingState(
+            sink=config.tracing_sink,
+            sample_ratio=config.tracing_sample_ratio,
+            provider=provider,
+            processor=processor,
+            exporter=exporter,
+        )
+        logger.info(
+            f"OpenTelemetry tracing enabled (sink={config.tracing_sink}, "
+            f"sample_ratio={config.tracing_sample_ratio}, queue={config.tracing_queue_size})"
+        )
+        return _state
+
+
+def get_tracing_stats() -> Dict[str, Any]:
+    """Bộ đếm span của process (rỗng nếu tracing chưa được thiết lập)."""
+    return _state.stats() if _state is not None else {}
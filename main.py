@@ -47,8 +47,8 @@ def main() -> None:
             "diện tích hình chữ nhật có chiều dài 5 và chiều rộng 3",
         ]
         
-        # Chạy câu hỏi
-        manager.run_questions(questions)
+        # Chạy câu hỏi (stream câu trả lời ngay khi có)
+        manager.run_questions(questions, stream=True)
         
     except Exception as e:
         logger.error(f"Application error: {e}", exc_info=True)
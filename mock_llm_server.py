@@ -0,0 +1,432 @@
+#!/usr/bin/env python
+"""
+Mock LLM server tương thích OpenAI chat-completions, dùng để load test.
+
+Trả lời theo luật (không cần provider thật):
+- Câu hỏi tính toán: gọi tool (tool call) theo IntentRouter, rồi trả lời từ kết quả tool
+- Prompt của grader: trả điểm (hoặc JSON array điểm cho batch grading)
+- Câu trả lời theo script: --script file JSON [{"pattern": regex, "reply": text}, ...]
+Hỗ trợ streaming (SSE), latency/jitter/tail latency, giới hạn concurrency
+(mô phỏng hàng đợi của provider) và inject lỗi 429/500.
+
+Trỏ client vào server:
+    AGENT_MODEL_PROVIDER=openai OPENAI_API_BASE=http://127.0.0.1:8765/v1   (AgnoAgentManager)
+    OPENAI_API_BASE_URL=http://127.0.0.1:8765/v1                          (training: rollout, grader, APO)
+
+Usage:
+    python mock_llm_server.py --port 8765 --latency 0.3 --jitter 0.1
+    python mock_llm_server.py --tail-rate 0.05 --tail-latency 3 --rate-limit-rate 0.02 --max-concurrency 8
+    curl http://127.0.0.1:8765/stats
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.router import IntentRouter
+
+
+@dataclass
+class MockSettings:
+    """Cấu hình mock server."""
+    latency: float = 0.0            # Latency cơ bản mỗi request (giây)
+    jitter: float = 0.0             # Cộng thêm ngẫu nhiên 0..jitter giây
+    tail_rate: float = 0.0          # Tỉ lệ request chậm bất thường
+    tail_latency: float = 0.0       # Latency thêm của request chậm
+    error_rate: float = 0.0         # Tỉ lệ trả 500
+    rate_limit_rate: float = 0.0    # Tỉ lệ trả 429
+    retry_after: float = 1.0        # Header Retry-After của 429
+    max_concurrency: int = 0        # Số request xử lý đồng thời (0 = không giới hạn)
+    grader_score: float = 0.8       # Điểm trả cho prompt của grader
+    chunk_size: int = 16            # Số ký tự mỗi chunk khi streaming
+    seed: Optional[int] = None
+    script: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def _text(content: Any) -> str:
+    """Nội dung message: string hoặc danh sách content parts."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return ""
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class MockBrain:
+    """Quyết định câu trả lời cho một request chat-completions."""
+
+    def __init__(self, settings: MockSettings):
+        self.settings = settings
+        self.router = IntentRouter(min_confidence=0.5)
+        self.script = [(re.compile(pattern, re.IGNORECASE), reply) for pattern, reply in settings.script]
+
+    def _grade(self, prompt: str) -> str:
+        count = re.search(r"JSON array of exactly (\d+)", prompt)
+        if count:
+            return json.dumps([self.settings.grader_score] * int(count.group(1)))
+        return str(self.settings.grader_score)
+
+    def respond(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Returns:
+            {"content": str} hoặc {"tool_calls": [{"name": ..., "arguments": {...}}]}
+        """
+        messages = body.get("messages") or []
+        users = [_text(m.get("content")) for m in messages if m.get("role") == "user"]
+        question = users[-1] if users else ""
+        last = messages[-1] if messages else {}
+
+        if "expert evaluator" in question:
+            return {"content": self._grade(question)}
+        for pattern, reply in self.script:
+            if pattern.search(question):
+                return {"content": reply}
+
+        if last.get("role") == "tool":
+            results = []
+            for message in reversed(messages):
+                if message.get("role") != "tool":
+                    break
+                results.append(_text(message.get("content")))
+            return {"content": f"Kết quả: {', '.join(reversed(results))}."}
+
+        route = self.router.classify(question)
+        tool_names = {
+            tool.get("function", {}).get("name")
+            for tool in body.get("tools") or []
+        }
+        if route is not None and route.tool in tool_names:
+            return {"tool_calls": [{"name": route.tool, "arguments": route.args}]}
+        if route is not None:
+            return {"content": route.answer}
+        return {"content": f"Đây là câu trả lời mô phỏng cho: {question[:80]}"}
+
+
+class MockStats:
+    """Thống kê phía server: số request, lỗi, hàng đợi và latency."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.errors = 0
+            self.rate_limited = 0
+            self.tool_calls = 0
+            self.in_flight = 0
+            self.max_in_flight = 0
+            self.queue_waits: List[float] = []
+            self.latencies: List[float] = []
+
+    def start(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def finish(self, latency: float, queue_wait: float) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.latencies.append(latency)
+            self.queue_waits.append(queue_wait)
+
+    @staticmethod
+    def _percentile(values: List[float], q: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies, waits = list(self.latencies), list(self.queue_waits)
+            snapshot = {
+                "requests": self.requests,
+                "errors": self.errors,
+                "rate_limited": self.rate_limited,
+                "tool_calls": self.tool_calls,
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+            }
+        snapshot.update({
+            f"latency_p{int(q * 100)}": round(self._percentile(latencies, q), 4)
+            for q in (0.5, 0.9, 0.99)
+        })
+        snapshot["queue_wait_p90"] = round(self._percentile(waits, 0.9), 4)
+        return snapshot
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, settings: MockSettings):
+        super().__init__(address, MockHandler)
+        self.settings = settings
+        self.brain = MockBrain(settings)
+        self.stats = MockStats()
+        self.rng = random.Random(settings.seed)
+        self.rng_lock = threading.Lock()
+        self.slots = (
+            threading.BoundedSemaphore(settings.max_concurrency)
+            if settings.max_concurrency > 0 else None
+        )
+
+    def draw(self) -> Tuple[float, float]:
+        """Một số ngẫu nhiên cho lỗi và một delay, theo thứ tự request (tái lập được với seed)."""
+        s = self.settings
+        with self.rng_lock:
+            roll = self.rng.random()
+            delay = s.latency + self.rng.uniform(0, s.jitter)
+            if s.tail_rate and self.rng.random() < s.tail_rate:
+                delay += s.tail_latency
+        return roll, delay
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: MockServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") == "/stats":
+            self._send_json(200, self.server.stats.snapshot())
+        elif self.path.rstrip("/") == "/v1/models":
+            self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if self.path.rstrip("/") == "/stats/reset":
+            self.server.stats.reset()
+            self._send_json(200, {"ok": True})
+            return
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+        try:
+            body = json.loads(raw or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON", "type": "invalid_request_error"}})
+            return
+
+        server, stats = self.server, self.server.stats
+        stats.start()
+        arrived = time.perf_counter()
+        queue_wait = 0.0
+        try:
+            if server.slots is not None:
+                server.slots.acquire()
+            queue_wait = time.perf_counter() - arrived
+            try:
+                self._handle_completion(body)
+            finally:
+                if server.slots is not None:
+                    server.slots.release()
+        finally:
+            stats.finish(time.perf_counter() - arrived, queue_wait)
+
+    def _handle_completion(self, body: Dict[str, Any]) -> None:
+        server, settings, stats = self.server, self.server.settings, self.server.stats
+        roll, delay = server.draw()
+        if delay:
+            time.sleep(delay)
+
+        if roll < settings.rate_limit_rate:
+            with stats._lock:
+                stats.rate_limited += 1
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit exceeded (mock)", "type": "rate_limit_error", "code": "rate_limit_exceeded"}},
+                {"Retry-After": f"{settings.retry_after:g}"},
+            )
+            return
+        if roll < settings.rate_limit_rate + settings.error_rate:
+            with stats._lock:
+                stats.errors += 1
+            self._send_json(500, {"error": {"message": "Internal error (mock)", "type": "server_error"}})
+            return
+
+        answer = server.brain.respond(body)
+        if "tool_calls" in answer:
+            with stats._lock:
+                stats.tool_calls += 1
+        model = body.get("model", "mock")
+        prompt_tokens = sum(_estimate_tokens(_text(m.get("content"))) for m in body.get("messages") or [])
+        content = answer.get("content")
+        tool_calls = [
+            {
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": {"name": call["name"], "arguments": json.dumps(call["arguments"])},
+            }
+            for call in answer.get("tool_calls", [])
+        ]
+        completion_tokens = _estimate_tokens(content or json.dumps(answer.get("tool_calls", [])))
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        finish_reason = "tool_calls" if tool_calls else "stop"
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:16]}"
+
+        if body.get("stream"):
+            self._stream(completion_id, model, content, tool_calls, finish_reason, usage,
+                         (body.get("stream_options") or {}).get("include_usage", False))
+            return
+
+        message: Dict[str, Any] = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": usage,
+        })
+
+    def _stream(
+        self,
+        completion_id: str,
+        model: str,
+        content: Optional[str],
+        tool_calls: List[Dict[str, Any]],
+        finish_reason: str,
+        usage: Dict[str, int],
+        include_usage: bool
+    ) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def chunk(delta: Dict[str, Any], finish: Optional[str] = None, **extra: Any) -> None:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                **extra,
+            }
+            self.wfile.write(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8"))
+
+        chunk({"role": "assistant", "content": ""})
+        if tool_calls:
+            chunk({"tool_calls": [{"index": i, **call} for i, call in enumerate(tool_calls)]})
+        else:
+            size = max(1, self.server.settings.chunk_size)
+            for start in range(0, len(content or ""), size):
+                chunk({"content": content[start:start + size]})
+        chunk({}, finish_reason)
+        if include_usage:
+            payload = {
+                "id": completion_id, "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": model, "choices": [], "usage": usage,
+            }
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def start_mock_server(
+    settings: Optional[MockSettings] = None,
+    host: str = "127.0.0.1",
+    port: int = 0
+) -> MockServer:
+    """
+    Chạy mock server trong background thread (port 0 = chọn port trống).
+
+    Returns:
+        MockServer; dùng server.base_url cho client và server.shutdown() để dừng
+    """
+    server = MockServer((host, port), settings or MockSettings())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _load_script(path: Optional[str]) -> List[Tuple[str, str]]:
+    if not path:
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [(item["pattern"], item["reply"]) for item in json.load(f)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible mock LLM server")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Base latency per request (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra uniform latency 0..jitter (seconds)")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="Fraction of requests with tail latency")
+    parser.add_argument("--tail-latency", type=float, default=0.0, help="Extra latency of slow requests (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After of 429 responses (seconds)")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="Requests served at once (0 = unlimited)")
+    parser.add_argument("--grader-score", type=float, default=0.8, help="Score returned to grader prompts")
+    parser.add_argument("--script", type=str, default=None, help="JSON file of {pattern, reply} rules")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for latency and errors")
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        latency=args.latency,
+        jitter=args.jitter,
+        tail_rate=args.tail_rate,
+        tail_latency=args.tail_latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        max_concurrency=args.max_concurrency,
+        grader_score=args.grader_score,
+        seed=args.seed,
+        script=_load_script(args.script),
+    )
+    server = MockServer((args.host, args.port), settings)
+    print(f"🧪 Mock LLM server on {server.base_url} (stats: http://{args.host}:{args.port}/stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
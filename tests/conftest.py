@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Cho phép chạy `pytest` (không qua `python -m`) từ mọi thư mục
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
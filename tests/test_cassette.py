@@ -0,0 +1,46 @@
+import json
+
+import httpx
+
+from training.engine.cassette import request_key
+
+
+URL = "https://api.example.com/v1/chat/completions"
+BODY = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "What is 2 + 2?"}]}
+
+
+def _request(url=URL, body=BODY, method="POST", **kwargs):
+    return httpx.Request(method, url, content=json.dumps(body).encode("utf-8"), **kwargs)
+
+
+def test_same_request_same_key():
+    assert request_key(_request()) == request_key(_request())
+
+
+def test_json_key_order_does_not_change_key():
+    reordered = {"messages": BODY["messages"], "model": BODY["model"]}
+    assert request_key(_request(body=reordered)) == request_key(_request())
+
+
+def test_api_key_in_query_and_headers_is_ignored():
+    plain = request_key(_request(url=URL + "?alt=json"))
+    assert request_key(_request(url=URL + "?key=secret&alt=json")) == plain
+    assert request_key(_request(url=URL + "?alt=json", headers={"Authorization": "Bearer secret"})) == plain
+
+
+def test_query_order_does_not_change_key():
+    assert request_key(_request(url=URL + "?a=1&b=2")) == request_key(_request(url=URL + "?b=2&a=1"))
+
+
+def test_body_url_and_method_change_key():
+    base = request_key(_request())
+    assert request_key(_request(body={**BODY, "temperature": 0})) != base
+    assert request_key(_request(url="https://api.example.com/v1/embeddings")) != base
+    assert request_key(_request(method="PUT")) != base
+
+
+def test_non_json_body():
+    first = httpx.Request("POST", URL, content=b"not json")
+    second = httpx.Request("POST", URL, content=b"not json")
+    assert request_key(first) == request_key(second)
+    assert request_key(first) != request_key(httpx.Request("POST", URL, content=b"other"))
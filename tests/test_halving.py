@@ -0,0 +1,36 @@
+import random
+
+from training.engine.halving import halve, halving_rungs
+
+
+def test_rungs_double_up_to_batch_size():
+    assert halving_rungs(8, 2) == [2, 4, 8]
+    assert halving_rungs(10, 2) == [2, 4, 8, 10]
+    assert halving_rungs(5, 1) == [1, 2, 4, 5]
+
+
+def test_rungs_with_small_batch():
+    assert halving_rungs(1, 2) == [1]
+    assert halving_rungs(2, 4) == [2]
+    assert halving_rungs(3, 0) == [1, 2, 3]
+
+
+def test_halve_keeps_better_half_rounded_up():
+    scores = {0: 0.1, 1: 0.9, 2: 0.5, 3: 0.7, 4: 0.3}
+    assert halve(scores, random.Random(0)) == [1, 3, 2]
+
+
+def test_halve_single_candidate():
+    assert halve({3: 0.0}) == [3]
+
+
+def test_halve_breaks_ties_at_random():
+    scores = {i: 0.5 for i in range(4)}
+    kept = {tuple(sorted(halve(scores, random.Random(seed)))) for seed in range(20)}
+    assert all(len(k) == 2 for k in kept)
+    assert len(kept) > 1
+
+
+def test_halve_is_reproducible_with_seed():
+    scores = {i: 0.5 for i in range(6)}
+    assert halve(scores, random.Random(42)) == halve(scores, random.Random(42))
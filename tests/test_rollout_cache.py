@@ -0,0 +1,31 @@
+from training.engine.rollout_cache import rollout_key
+
+
+PROMPT = "You are a math tutor.\nSolve: {question}\n"
+
+
+def test_same_rollout_same_key():
+    assert rollout_key(PROMPT, "t1", "gpt-4o-mini", ["calculator"]) == rollout_key(
+        PROMPT, "t1", "gpt-4o-mini", ["calculator"]
+    )
+
+
+def test_prompt_whitespace_does_not_change_key():
+    reformatted = "  You are a   math tutor.\n\n\tSolve: {question}  \n\n"
+    assert rollout_key(PROMPT, "t1", "m") == rollout_key(reformatted, "t1", "m")
+
+
+def test_tool_order_does_not_change_key():
+    assert rollout_key(PROMPT, "t1", "m", ["a", "b"]) == rollout_key(PROMPT, "t1", "m", ["b", "a"])
+
+
+def test_task_id_type_does_not_change_key():
+    assert rollout_key(PROMPT, 7, "m") == rollout_key(PROMPT, "7", "m")
+
+
+def test_each_component_changes_key():
+    base = rollout_key(PROMPT, "t1", "m", ["calculator"])
+    assert rollout_key(PROMPT + "Show your work.", "t1", "m", ["calculator"]) != base
+    assert rollout_key(PROMPT, "t2", "m", ["calculator"]) != base
+    assert rollout_key(PROMPT, "t1", "other-model", ["calculator"]) != base
+    assert rollout_key(PROMPT, "t1", "m", ["calculator", "sum_1_to_n"]) != base
@@ -0,0 +1,53 @@
+import pytest
+
+from training.engine.verifier import LocalVerifier
+
+
+@pytest.fixture(scope="module")
+def verifier():
+    return LocalVerifier(tolerance=0.1)
+
+
+def test_correct_final_answer(verifier):
+    verdict = verifier.verify("12 × 5 = 60. The answer is 60.", "What is 12 * 5?")
+    assert verdict.score == 1.0
+    assert verdict.intent == "arithmetic"
+    assert verdict.expected == 60
+
+
+def test_wrong_final_answer(verifier):
+    assert verifier.verify("The answer is 75.", "What is 12 * 5?").score == 0.0
+
+
+def test_thousands_separators(verifier):
+    question = "Tính tổng từ 1 đến 100"
+    assert verifier.verify("Đáp án: 5.050", question).score == 1.0
+    assert verifier.verify("The sum is 5,050", question).score == 1.0
+
+
+def test_rounded_pi_answer(verifier):
+    verdict = verifier.verify("Area = 3.14159 × 2² = 12.57", "What is the area of a circle with radius 2?")
+    assert verdict.score == 1.0
+
+
+def test_correct_midway_but_different_conclusion_goes_to_llm(verifier):
+    response = "First I got 60, but rechecking, the final answer is 61."
+    assert verifier.verify(response, "What is 12 * 5?").score is None
+
+
+def test_several_numbers_without_conclusion(verifier):
+    assert verifier.verify("Maybe 60, maybe 61", "What is 12 * 5?").score is None
+
+
+def test_close_but_not_matching_goes_to_llm(verifier):
+    assert verifier.verify("The answer is 61", "What is 12 * 5?").score is None
+
+
+def test_unknown_or_qualified_questions_go_to_llm(verifier):
+    assert verifier.verify("The answer is 20", "What is the perimeter of a rectangle with length 4 and width 6?").score is None
+    assert verifier.verify("The answer is 42", "Who wrote Hamlet?").score is None
+    assert verifier.verify("The answer is 55", "Sum of the even numbers from 1 to 10").score is None
+
+
+def test_response_without_numbers(verifier):
+    assert verifier.verify("I don't know.", "What is 12 * 5?").score is None
@@ -23,6 +23,13 @@ from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from agno.tools import Function
 from core.tools import *
+from core.tool_cache import cached_function, get_tool_cache
+from training.engine.agent_pool import AgentPool
+from training.engine.grader import GraderService, verify_locally
+from training.engine.cassette import async_cassette_client, cassette_from_env
+from training.engine.rate_limiter import (
+    RateLimiter, async_rate_limited_client, gemini_client_params, get_rate_limiter, quota_name
+)
 # Load environment variables FIRST before any other code
 load_dotenv()
 
@@ -78,11 +85,12 @@ class AgentConfig:
     use_best_prompt: bool = True
     fallback_to_default: bool = True
     google_api_key: Optional[str] = None
+    # Pure tools share one process-wide result cache across rollouts
     tools: list = field(default_factory=lambda: [
-        Function.from_callable(sum_1_to_n),
-        Function.from_callable(calculator),
-        Function.from_callable(get_area_of_circle),
-        Function.from_callable(get_area_of_rectangle)
+        cached_function(sum_1_to_n, get_tool_cache()),
+        cached_function(calculator, get_tool_cache()),
+        cached_function(get_area_of_circle, get_tool_cache()),
+        cached_function(get_area_of_rectangle, get_tool_cache())
     ])
 
 @dataclass
@@ -95,6 +103,12 @@ class TrainingConfig:
     max_real_data_age_days: int = 30
     otlp_endpoint: str = "http://localhost:4318/v1/traces"
     agent_id: str = "agno-agent-setup"
+    agent_pool_size: int = 16
+    # Gemini quota shared by agent and grader calls (free tier gemini-2.0-flash)
+    requests_per_minute: Optional[int] = 15
+    tokens_per_minute: Optional[int] = 1_000_000
+    rate_limit_max_retries: int = 5
+    rate_limit_path: str = str(Path(__file__).parent / "rate_limiter.sqlite")  # shared by runners and the APO client
 
 
 # --- Prompts ---
@@ -453,45 +467,67 @@ def prepare_datasets(training_config: TrainingConfig) -> Tuple[List[dict], List[
 
 # --- Grading & Rollout ---
 
+_rate_limiter: Optional[RateLimiter] = None
+
+def get_gemini_rate_limiter(training_config: Optional[TrainingConfig] = None) -> RateLimiter:
+    """Token-bucket limiter for every Gemini call (requests/min and tokens/min, 429 backoff), shared across processes."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        training_config = training_config or TrainingConfig()
+        _rate_limiter = get_rate_limiter(
+            training_config.requests_per_minute,
+            training_config.tokens_per_minute,
+            training_config.rate_limit_max_retries,
+            path=training_config.rate_limit_path,
+            name=quota_name(os.getenv("GOOGLE_API_KEY"))
+        )
+    return _rate_limiter
+
+_grader_service: Optional[GraderService] = None
+
+def get_grader_service() -> GraderService:
+    """Long-lived Gemini grader: one client and grader agent reused across rollouts, with a persistent grade cache."""
+    global _grader_service
+    if _grader_service is None:
+        _grader_service = GraderService(
+            llm_client=Gemini(
+                id="gemini-2.0-flash", api_key=os.getenv("GOOGLE_API_KEY"),
+                client_params=gemini_client_params(get_gemini_rate_limiter(), cassette_from_env())
+            ),
+            cache_path=Path(__file__).parent / "grade_cache.sqlite"
+        )
+    return _grader_service
+
 def llm_grade_response(agent_response: str, question: str, llm_client: Gemini) -> float:
-    grading_prompt = GRADING_PROMPT_TEMPLATE.format(question=question, agent_response=agent_response)
-    grader_agent = Agent(
-        model=llm_client,
-        description="You are an expert evaluator for AI responses.",
-        instructions=GRADER_AGENT_INSTRUCTIONS,
-        markdown=False
-    )
-    try:
-        response = grader_agent.run(grading_prompt)
-        content = str(response.content).strip()
-        score_match = re.search(r'([01]?\.\d+)', content)
-        if score_match: return min(1.0, max(0.0, float(score_match.group(1))))
-        if "1.0" in content or "1" == content: return 1.0
-        if "0.0" in content or "0" == content: return 0.0
-        return 0.0
-    except Exception:
-        return 0.0
+    return GraderService(llm_client=llm_client).grade(agent_response, question)
 
 def calculate_reward(agent_response: str, question: str, llm_client: Optional[Gemini] = None) -> float:
     """Calculate reward for agent response.
     
     Returns fixed reward to avoid rate limiting from grader API calls.
     Set ENABLE_LLM_GRADER=true in .env to enable LLM grading.
+    Math answers are verified locally first; Gemini grades only inconclusive ones.
     """
-    if llm_client is None:
-        api_key = os.getenv("GOOGLE_API_KEY")
-        llm_client = Gemini(
-            id="gemini-2.0-flash",
-            api_key=api_key
-        )
-    return llm_grade_response(agent_response, question, llm_client)
+    score = verify_locally(agent_response, question)
+    if score is not None:
+        return score
+    if llm_client is not None:
+        return llm_grade_response(agent_response, question, llm_client)
+    return get_grader_service().grade(agent_response, question)
+
+
+def create_model(config: AgentConfig) -> Gemini:
+    return Gemini(
+        id=config.model_id, api_key=config.google_api_key,
+        client_params=gemini_client_params(get_gemini_rate_limiter(), cassette_from_env())
+    )
 
 
-def create_agent_with_prompt(prompt_template: str, config: AgentConfig, db: JsonDb) -> Agent:
+def create_agent_with_prompt(prompt_template: str, config: AgentConfig, db: JsonDb, model: Optional[Gemini] = None) -> Agent:
     instructions = [line.strip() for line in prompt_template.strip().split('\\n') if line.strip()]
     tools = getattr(config, 'tools', [])
     agent = Agent(
-        model=Gemini(id=config.model_id, api_key=config.google_api_key),
+        model=model or create_model(config),
         tools=tools, instructions=instructions, db=db,
         user_id=config.user_id, session_id=config.session_id,
         add_history_to_context=False, markdown=True, debug_mode=False
@@ -499,25 +535,36 @@ def create_agent_with_prompt(prompt_template: str, config: AgentConfig, db: Json
     return agent
 
 
+_agent_pool: Optional[AgentPool] = None
+
+def get_agent_pool(max_size: int = 16) -> AgentPool:
+    global _agent_pool
+    if _agent_pool is None:
+        _agent_pool = AgentPool(agent_factory=create_agent_with_prompt, model_factory=create_model, max_size=max_size)
+    return _agent_pool
+
+
 @agl.rollout
 def agno_agent_rollout(task: dict, prompt_template: agl.PromptTemplate, **resources) -> float:
     config = resources.get("config") or AgentConfig()
     db = resources.get("db")
     training_config = resources.get("training_config") or TrainingConfig()
     
-    # Wait BEFORE API call to avoid rate limiting
-    time.sleep(6)
+    # Model calls are throttled by the shared token-bucket limiter instead of a fixed sleep
+    limiter = get_gemini_rate_limiter(training_config)
     
-    agent = create_agent_with_prompt(str(prompt_template), config, db)
-    
-    try:
-        response = agent.run(task["question"])
-        reward = calculate_reward(response.content, task["question"])
-        logger.info(f"Task {task['task_id']}: Q='{task['question'][:30]}...', Reward={reward:.2f}")
-        return reward
-    except Exception as e:
-        logger.error(f"Error in rollout: {e}")
-        return 0.0
+    pool = get_agent_pool(training_config.agent_pool_size)
+    with pool.lease(str(prompt_template), config, db) as agent:
+        try:
+            response = agent.run(task["question"])
+            reward = calculate_reward(response.content, task["question"])
+            logger.info(f"Task {task['task_id']}: Q='{task['question'][:30]}...', Reward={reward:.2f}")
+            logger.debug(f"Agent pool stats: {pool.stats()}")
+            logger.debug(f"Rate limiter stats: {limiter.stats()}")
+            return reward
+        except Exception as e:
+            logger.error(f"Error in rollout: {e}")
+            return 0.0
 
 
 def setup_trainer(initial_prompt: str, algorithm_type: str, n_runners: int, config: AgentConfig, db: JsonDb, training_config: TrainingConfig, store_url: str) -> Optional[object]:
@@ -528,7 +575,13 @@ def setup_trainer(initial_prompt: str, algorithm_type: str, n_runners: int, conf
     api_key = os.getenv("GOOGLE_API_KEY")
     base_url = "https://generativelanguage.googleapis.com/v1beta/openai/"
 
-    async_client = AsyncOpenAI(api_key=api_key, base_url=base_url)
+    # Gradient/edit calls share the Gemini quota with the rollouts and grader
+    # AGENT_CASSETTE_MODE=record|replay|auto records/replays every Gemini call (runners inherit the env)
+    http_client = async_rate_limited_client(get_gemini_rate_limiter(training_config))
+    cassette = cassette_from_env()
+    if cassette is not None:
+        http_client = async_cassette_client(cassette, http_client)
+    async_client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
     
     if algorithm_type == "apo":
         algo = APO(
@@ -1,6 +1,15 @@
-from dataclasses import dataclass
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, fields
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
+# Runner processes only get the resources agentlightning passes to a rollout
+# (prompt_template, rollout), so the trainer hands its settings over via env.
+TRAINING_CONFIG_ENV = "AGENT_TRAINING_CONFIG"
+
 @dataclass
 class TrainingConfig:
     """Configuration for training process."""
@@ -14,10 +23,48 @@ class TrainingConfig:
     # === Algorithm Settings ===
     algorithm: str = "apo"
     # learning_rate is removed as it's not used in APO
+    apo_eval_mode: str = "full"  # Beam candidate evaluation: "full" (whole val batch) or "halving" (successive halving)
+    halving_min_tasks: int = 2  # Validation tasks per candidate in the first halving rung
+    
+    # === Rollout Settings ===
+    use_agent_pool: bool = True
+    agent_pool_size: int = 16
+    async_rollout: bool = False  # Await agent and grader calls (agno_agent_rollout_async)
+    rollout_cache_policy: str = "run"  # Reuse validation rewards: "always", "run" or "off"
+    rollout_cache_path: Optional[str] = None  # None = training/utils/rollout_cache.sqlite
+    session_store: str = "memory"  # Rollout sessions: "memory", "none", "sharded" or "json" (JsonDb)
+    session_shard_dir: Optional[str] = None  # None = training/utils/sessions ("sharded")
+    rollout_timeout: Optional[float] = None  # Per-rollout budget in seconds (agent + tools + grader), None = no limit
+    timeout_reward: float = 0.0  # Reward of rollouts that exceed rollout_timeout
+    speculative_percentile: Optional[float] = None  # Start a backup run of rollouts slower than this latency percentile (e.g. 90), None = off
+    speculative_min_samples: int = 20  # Completed rollouts needed before speculating
+    speculative_window: int = 200  # Recent rollout latencies kept per runner
+    
+    # === Rate Limit Settings (provider quota, None = unlimited) ===
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+    rate_limit_max_retries: int = 5
+    rate_limit_shared: bool = True  # Share the quota across runner processes and the APO client
+    rate_limit_path: Optional[str] = None  # None = training/utils/rate_limiter.sqlite
+    
+    # === Record/Replay Settings (None = live calls) ===
+    cassette_mode: Optional[str] = None  # "record", "replay" or "auto"
+    cassette_path: Optional[str] = None  # None = training/utils/cassettes/llm_calls.sqlite
+    cassette_latency: Optional[str] = None  # Replay latency: None, "recorded" or seconds
     
     # === Reward Settings ===
+    use_local_verification: bool = True  # Grade math answers locally before the LLM grader
     use_llm_grader: bool = True
+    grader_model_id: str = "gpt-4o-mini"
+    grader_batch_size: int = 8  # Max responses per batch grading call
+    grade_cache_enabled: bool = True
+    grade_cache_path: Optional[str] = None  # None = training/utils/grade_cache.sqlite
+    grade_cache_max_entries: int = 100_000
     reward_tolerance: float = 0.1
+    adaptive_grading: bool = False  # Resample the grader only while the reward is undecided
+    grading_threshold: float = 0.5
+    grading_max_samples: int = 5
+    grading_confidence: float = 0.95
     
     # === Task Settings ===
     task_type: str = "conversation"
@@ -26,3 +73,22 @@ class TrainingConfig:
     use_real_data: bool = True
     user_data_db_path: str = "agno_memory.db"
     max_real_data_age_days: int = 30
+
+
+def configure_training_config_env(settings: TrainingConfig) -> None:
+    """Make the training settings visible to this process and the runner processes it starts."""
+    os.environ[TRAINING_CONFIG_ENV] = json.dumps(asdict(settings))
+
+
+def training_config_from_env() -> TrainingConfig:
+    """TrainingConfig from AGENT_TRAINING_CONFIG, or the defaults if it is not set."""
+    raw = os.getenv(TRAINING_CONFIG_ENV)
+    if not raw:
+        return TrainingConfig()
+    try:
+        values = json.loads(raw)
+    except ValueError as e:
+        logger.warning(f"Ignoring invalid {TRAINING_CONFIG_ENV}: {e}")
+        return TrainingConfig()
+    known = {f.name for f in fields(TrainingConfig)}
+    return TrainingConfig(**{key: value for key, value in values.items() if key in known})
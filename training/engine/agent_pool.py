@@ -0,0 +1,172 @@
+"""
+Agent Pool module.
+
+Module này giữ các agent đã dựng sẵn cho training rollouts:
+- Pool agent theo key (prompt hash, model key, tool set); model key gồm model id,
+  API key và base URL vì agent gắn với model client của config đã tạo ra nó
+- Dùng chung model client (keep-alive) giữa các agent cùng model
+- Giới hạn kích thước với LRU eviction
+- Thống kê hit/miss của pool
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Tuple
+
+from agno.agent import Agent
+
+
+logger = logging.getLogger(__name__)
+
+PoolKey = Tuple[str, Tuple[str, Optional[str], Optional[str]], Tuple[str, ...]]
+
+
+def _tool_names(tools: Optional[list]) -> Tuple[str, ...]:
+    """Tên các tool, dùng làm một phần của pool key."""
+    names = []
+    for tool in tools or []:
+        names.append(getattr(tool, "name", None) or getattr(tool, "__name__", repr(tool)))
+    return tuple(sorted(names))
+
+
+def model_key(config: Any) -> Tuple[str, Optional[str], Optional[str]]:
+    """Key cho model client: cùng model, API key và base URL thì dùng chung."""
+    api_key = getattr(config, "openai_api_key", None) or getattr(config, "google_api_key", None)
+    return (config.model_id, api_key, getattr(config, "openai_api_base", None))
+
+
+class AgentPool:
+    """Pool agent và model client dùng lại giữa các rollout."""
+
+    def __init__(
+        self,
+        agent_factory: Callable[..., Agent],
+        model_factory: Callable[[Any], Any],
+        max_size: int = 16
+    ):
+        """
+        Khởi tạo pool.
+
+        Args:
+            agent_factory: Hàm tạo agent, nhận (prompt_template, config, db, model=...)
+            model_factory: Hàm tạo model client từ config
+            max_size: Số agent rảnh tối đa được giữ trong pool
+        """
+        self.agent_factory = agent_factory
+        self.model_factory = model_factory
+        self.max_size = max_size
+
+        self._idle: "OrderedDict[PoolKey, Deque[Agent]]" = OrderedDict()
+        self._models: Dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.in_use = 0
+
+    def make_key(self, prompt_template: str, config: Any) -> PoolKey:
+        """Tạo pool key từ prompt, model key (model id, API key, base URL) và tool set."""
+        prompt_hash = hashlib.sha256(prompt_template.encode("utf-8")).hexdigest()
+        return (prompt_hash, model_key(config), _tool_names(getattr(config, "tools", None)))
+
+    def get_model(self, config: Any) -> Any:
+        """Lấy model client dùng chung cho config, tạo mới nếu chưa có."""
+        key = model_key(config)
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = self.model_factory(config)
+                self._models[key] = model
+                logger.info(f"Created shared model client for {config.model_id}")
+            return model
+
+    def _idle_count(self) -> int:
+        return sum(len(agents) for agents in self._idle.values())
+
+    def acquire(self, prompt_template: str, config: Any, db: Any = None) -> Agent:
+        """
+        Lấy một agent cho prompt/config, tạo mới nếu pool không có sẵn.
+
+        Agent được lấy ra khỏi pool cho tới khi release() nên không bị
+        dùng đồng thời bởi hai rollout.
+        """
+        key = self.make_key(prompt_template, config)
+        with self._lock:
+            agents = self._idle.get(key)
+            if agents:
+                agent = agents.pop()
+                if not agents:
+                    del self._idle[key]
+                self.hits += 1
+                self.in_use += 1
+                agent._pool_key = key
+                agent.db = db
+                return agent
+            self.misses += 1
+            self.in_use += 1
+
+        try:
+            agent = self.agent_factory(
+                prompt_template=prompt_template,
+                config=config,
+                db=db,
+                model=self.get_model(config)
+            )
+        except Exception:
+            with self._lock:
+                self.in_use -= 1
+            raise
+        agent._pool_key = key
+        return agent
+
+    def release(self, agent: Agent) -> None:
+        """Trả agent về pool, evict agent rảnh cũ nhất nếu vượt giới hạn."""
+        key = getattr(agent, "_pool_key", None)
+        with self._lock:
+            self.in_use -= 1
+            if key is None:
+                return
+            self._idle.setdefault(key, deque()).append(agent)
+            self._idle.move_to_end(key)
+
+            while self._idle_count() > self.max_size:
+                oldest_key, agents = next(iter(self._idle.items()))
+                agents.popleft()
+                if not agents:
+                    del self._idle[oldest_key]
+                self.evictions += 1
+
+    @contextmanager
+    def lease(self, prompt_template: str, config: Any, db: Any = None) -> Iterator[Agent]:
+        """Context manager: acquire() rồi release() khi xong."""
+        agent = self.acquire(prompt_template, config, db)
+        try:
+            yield agent
+        finally:
+            self.release(agent)
+
+    def clear(self) -> None:
+        """Xóa toàn bộ agent rảnh và model client."""
+        with self._lock:
+            self._idle.clear()
+            self._models.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê của pool."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "idle": self._idle_count(),
+                "in_use": self.in_use,
+                "keys": len(self._idle),
+                "model_clients": len(self._models),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,332 @@
+"""
+Cassette module cho training (record/replay LLM calls).
+
+Module này ghi lại và phát lại các HTTP call tới model provider:
+- record: gọi provider thật và lưu response theo hash của request
+- replay: trả response đã lưu, không cần network (có thể giả lập latency)
+- auto: replay nếu đã có, ngược lại gọi thật và ghi lại
+- Lưu trong SQLite nên nhiều runner process ghi chung một cassette được
+- Bật bằng biến môi trường để runner process con cũng dùng cassette
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlencode
+
+import httpx
+
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_MODES = ("record", "replay", "auto")
+CASSETTE_MODE_ENV = "AGENT_CASSETTE_MODE"
+CASSETTE_PATH_ENV = "AGENT_CASSETTE_PATH"
+CASSETTE_LATENCY_ENV = "AGENT_CASSETTE_LATENCY"
+DEFAULT_CASSETTE_PATH = Path(__file__).parent.parent / "utils" / "cassettes" / "llm_calls.sqlite"
+
+# Không lưu: body được lưu sau khi giải nén; key/token không được ghi ra đĩa
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+_DROPPED_QUERY = {"key", "api_key", "api-key"}
+
+
+class CassetteMissError(httpx.TransportError):
+    """Request không có trong cassette khi đang replay."""
+
+
+def request_key(request: httpx.Request) -> str:
+    """Hash của request: method, URL (bỏ API key trong query) và JSON body đã chuẩn hóa."""
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(request.url.query.decode("ascii"))
+        if k.lower() not in _DROPPED_QUERY
+    ))
+    body = request.content or b""
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True, ensure_ascii=False).encode("utf-8")
+    except ValueError:
+        pass
+    payload = b"\n".join([
+        request.method.encode("ascii"),
+        f"{request.url.scheme}://{request.url.host}{request.url.path}?{query}".encode("utf-8"),
+        body,
+    ])
+    return hashlib.sha256(payload).hexdigest()
+
+
+class Cassette:
+    """Kho request-hash → response trên đĩa."""
+
+    def __init__(
+        self,
+        path: Union[str, Path] = DEFAULT_CASSETTE_PATH,
+        mode: str = "auto",
+        latency: Optional[Union[str, float]] = None
+    ):
+        """
+        Khởi tạo cassette.
+
+        Args:
+            path: File SQLite của cassette
+            mode: "record", "replay" hoặc "auto"
+            latency: Latency giả lập khi replay: None (trả ngay), "recorded"
+                (bằng thời gian đã ghi) hoặc số giây cố định
+        """
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}', expected one of {CASSETTE_MODES}")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._cursors: Dict[str, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.path),
+            timeout=30.0,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS interactions ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, "
+            "method TEXT NOT NULL, url TEXT NOT NULL, status INTEGER NOT NULL, "
+            "headers TEXT NOT NULL, body BLOB NOT NULL, elapsed REAL NOT NULL, "
+            "created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_interactions_key ON interactions (key)")
+
+    def _replay_delay(self, elapsed: float) -> float:
+        if self.latency is None:
+            return 0.0
+        if self.latency == "recorded":
+            return elapsed
+        return float(self.latency)
+
+    def lookup(self, key: str) -> Optional[Tuple[httpx.Response, float]]:
+        """
+        Lấy response đã ghi cho request.
+
+        Cùng một request được ghi nhiều lần (ví dụ sampling) sẽ được phát lại
+        lần lượt theo thứ tự ghi, rồi quay vòng.
+
+        Returns:
+            (response, delay giả lập) hoặc None nếu chưa có
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, headers, body, elapsed FROM interactions WHERE key = ? ORDER BY id",
+                (key,),
+            ).fetchall()
+            if not rows:
+                self.misses += 1
+                return None
+            index = self._cursors.get(key, 0)
+            self._cursors[key] = index + 1
+            self.hits += 1
+
+        status, headers, body, elapsed = rows[index % len(rows)]
+        response = httpx.Response(status, headers=json.loads(headers), content=body)
+        return response, self._replay_delay(elapsed)
+
+    def record(self, key: str, request: httpx.Request, response: httpx.Response, elapsed: float) -> None:
+        """Ghi response (đã đọc hết body) của một request."""
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS}
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO interactions (key, method, url, status, headers, body, elapsed, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, request.method, str(request.url.copy_with(query=None)), response.status_code,
+                 json.dumps(headers), response.content, elapsed, time.time()),
+            )
+            self.recorded += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê cassette."""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM interactions").fetchone()[0]
+        return {
+            "path": str(self.path),
+            "mode": self.mode,
+            "interactions": count,
+            "hits": self.hits,
+            "misses": self.misses,
+            "recorded": self.recorded,
+        }
+
+
+def _recordable(response: httpx.Response) -> bool:
+    # Lỗi tạm thời (429, 5xx) không được ghi để replay không lặp lại chúng
+    return response.status_code < 500 and response.status_code != 429
+
+
+class CassetteTransport(httpx.BaseTransport):
+    """httpx transport ghi/phát lại request qua một Cassette."""
+
+    def __init__(self, cassette: Cassette, transport: Optional[httpx.BaseTransport] = None):
+        self.cassette = cassette
+        self._transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        key = request_key(request)
+        if self.cassette.mode != "record":
+            hit = self.cassette.lookup(key)
+            if hit is not None:
+                response, delay = hit
+                if delay:
+                    time.sleep(delay)
+                return response
+            if self.cassette.mode == "replay":
+                raise CassetteMissError(f"No cassette entry for {request.method} {request.url.path} ({key[:12]})")
+
+        start = time.perf_counter()
+        response = self._transport.handle_request(request)
+        response.read()
+        if _recordable(response):
+            self.cassette.record(key, request, response, time.perf_counter() - start)
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncCassetteTransport(httpx.AsyncBaseTransport):
+    """Bản async của CassetteTransport."""
+
+    def __init__(self, cassette: Cassette, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.cassette = cassette
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        key = request_key(request)
+        if self.cassette.mode != "record":
+            hit = self.cassette.lookup(key)
+            if hit is not None:
+                response, delay = hit
+                if delay:
+                    await asyncio.sleep(delay)
+                return response
+            if self.cassette.mode == "replay":
+                raise CassetteMissError(f"No cassette entry for {request.method} {request.url.path} ({key[:12]})")
+
+        start = time.perf_counter()
+        response = await self._transport.handle_async_request(request)
+        await response.aread()
+        if _recordable(response):
+            self.cassette.record(key, request, response, time.perf_counter() - start)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def has_transport(client: Any, transport_type: type) -> bool:
+    """Client có transport loại transport_type ở đâu đó trong chuỗi transport bọc nhau không."""
+    transport = getattr(client, "_transport", None)
+    while transport is not None:
+        if isinstance(transport, transport_type):
+            return True
+        transport = getattr(transport, "_transport", None)
+    return False
+
+
+def cassette_client(cassette: Cassette, client: Optional[httpx.Client] = None) -> httpx.Client:
+    """httpx.Client đi qua cassette; request thật đi qua transport của `client` (nếu có)."""
+    inner = client._transport if client is not None else None
+    return httpx.Client(transport=CassetteTransport(cassette, inner), follow_redirects=True)
+
+
+def async_cassette_client(cassette: Cassette, client: Optional[httpx.AsyncClient] = None) -> httpx.AsyncClient:
+    """Bản async của cassette_client()."""
+    inner = client._transport if client is not None else None
+    return httpx.AsyncClient(transport=AsyncCassetteTransport(cassette, inner), follow_redirects=True)
+
+
+_cassettes: Dict[Tuple[str, str, Any], Cassette] = {}
+_installed: List[Any] = [None, None]
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(
+    path: Union[str, Path] = DEFAULT_CASSETTE_PATH,
+    mode: str = "auto",
+    latency: Optional[Union[str, float]] = None
+) -> Cassette:
+    """Lấy Cassette dùng chung trong process cho một file và mode."""
+    key = (str(Path(path).absolute()), mode, latency)
+    with _cassettes_lock:
+        cassette = _cassettes.get(key)
+        if cassette is None:
+            cassette = Cassette(path, mode, latency)
+            _cassettes[key] = cassette
+        return cassette
+
+
+def configure_cassette_env(
+    mode: Optional[str],
+    path: Optional[Union[str, Path]] = None,
+    latency: Optional[Union[str, float]] = None
+) -> None:
+    """Bật cassette cho process hiện tại và các runner process con (qua biến môi trường)."""
+    if not mode:
+        return
+    os.environ[CASSETTE_MODE_ENV] = mode
+    os.environ[CASSETTE_PATH_ENV] = str(path or DEFAULT_CASSETTE_PATH)
+    if latency is not None:
+        os.environ[CASSETTE_LATENCY_ENV] = str(latency)
+
+
+def cassette_from_env() -> Optional[Cassette]:
+    """Cassette theo AGENT_CASSETTE_MODE / _PATH / _LATENCY, None nếu không bật."""
+    mode = os.getenv(CASSETTE_MODE_ENV, "").strip().lower()
+    if not mode or mode == "off":
+        return None
+    latency: Optional[Union[str, float]] = os.getenv(CASSETTE_LATENCY_ENV) or None
+    if latency is not None and latency != "recorded":
+        latency = float(latency)
+    return get_cassette(os.getenv(CASSETTE_PATH_ENV) or DEFAULT_CASSETTE_PATH, mode, latency)
+
+
+def install_cassette_from_env() -> Optional[Cassette]:
+    """Cài cassette theo biến môi trường (nếu bật) và trả về nó."""
+    cassette = cassette_from_env()
+    if cassette is not None:
+        install_cassette(cassette)
+    return cassette
+
+
+def install_cassette(cassette: Cassette) -> None:
+    """
+    Cho mọi model dùng httpx client mặc định của agno (OpenAIChat, ...) đi qua cassette.
+
+    Client mặc định hiện tại (ví dụ client có rate limiter) được giữ làm đường
+    gọi thật bên trong cassette. Gọi lại khi đã cài không làm gì.
+    """
+    from agno.utils.http import (
+        get_default_async_client,
+        get_default_sync_client,
+        set_default_async_client,
+        set_default_sync_client,
+    )
+
+    with _cassettes_lock:
+        sync_client, async_client = get_default_sync_client(), get_default_async_client()
+        if sync_client is not _installed[0] and not has_transport(sync_client, CassetteTransport):
+            _installed[0] = cassette_client(cassette, sync_client)
+            set_default_sync_client(_installed[0])
+        if async_client is not _installed[1] and not has_transport(async_client, AsyncCassetteTransport):
+            _installed[1] = async_cassette_client(cassette, async_client)
+            set_default_async_client(_installed[1])
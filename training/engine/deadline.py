@@ -0,0 +1,259 @@
+"""
+Deadline module cho training rollouts.
+
+Module này giới hạn thời gian của một rollout (agent run + tool + grader):
+- Deadline nằm trong ContextVar nên đi theo rollout xuống mọi model call,
+  kể cả trong thread/task con được tạo với context hiện tại
+- httpx transport cắt timeout của request theo thời gian còn lại và dừng
+  ngay khi deadline đã hết (hủy hợp tác, không kill thread)
+- run_with_deadline / arun_with_deadline trả quyền điều khiển cho runner
+  đúng hạn; phần việc còn dang dở tự dừng ở model call kế tiếp
+"""
+
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+import httpx
+
+from .cassette import has_transport
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_current_deadline: contextvars.ContextVar[Optional["Deadline"]] = contextvars.ContextVar(
+    "rollout_deadline", default=None
+)
+
+
+class RolloutTimeout(Exception):
+    """Rollout vượt quá thời gian cho phép."""
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """Model call bị dừng vì deadline của rollout đã hết."""
+
+
+class Deadline:
+    """Thời hạn của một rollout."""
+
+    def __init__(self, budget: Optional[float]):
+        """
+        Args:
+            budget: Số giây tối đa tính từ bây giờ (None = không giới hạn,
+                chỉ dừng khi bị cancel)
+        """
+        self.budget = budget
+        self.expires_at = math.inf if budget is None else time.monotonic() + budget
+        self.cancelled = False
+
+    def remaining(self) -> float:
+        """Số giây còn lại (0 nếu đã hết hoặc đã bị hủy, inf nếu không giới hạn)."""
+        if self.cancelled:
+            return 0.0
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def wait_timeout(self) -> Optional[float]:
+        """remaining() dùng làm timeout khi chờ (None nếu không giới hạn)."""
+        remaining = self.remaining()
+        return None if math.isinf(remaining) else remaining
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def cancel(self) -> None:
+        """Hủy: mọi model call sau đó của rollout dừng ngay."""
+        self.cancelled = True
+
+    def split(self) -> "Deadline":
+        """Deadline cùng thời hạn nhưng hủy được riêng (cho một lần chạy của rollout)."""
+        child = Deadline(None)
+        child.budget = self.budget
+        child.expires_at = self.expires_at
+        return child
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Deadline của rollout đang chạy trong context hiện tại."""
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Đặt deadline cho context hiện tại trong khối with."""
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, int] = {"rollouts": 0, "timeouts": 0, "aborted_calls": 0}
+
+
+def _count(key: str) -> None:
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def get_deadline_stats() -> Dict[str, int]:
+    """Số rollout có deadline, số rollout timeout và số model call bị dừng."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def start_in_thread(fn: Callable[[], T], deadline: Deadline) -> "concurrent.futures.Future[T]":
+    """Chạy fn() trong daemon thread với context hiện tại và deadline đã cho."""
+    future: "concurrent.futures.Future[T]" = concurrent.futures.Future()
+    context = contextvars.copy_context()
+    context.run(_current_deadline.set, deadline)
+
+    def target() -> None:
+        try:
+            future.set_result(context.run(fn))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=target, name="rollout-deadline", daemon=True).start()
+    return future
+
+
+def run_with_deadline(fn: Callable[[], T], deadline: Deadline) -> T:
+    """
+    Chạy fn() trong thread riêng, chờ tối đa tới deadline.
+
+    Raises:
+        RolloutTimeout: Hết thời gian; fn() vẫn chạy nốt trong thread nền
+            nhưng mọi model call tiếp theo của nó dừng ngay
+    """
+    _count("rollouts")
+    future = start_in_thread(fn, deadline)
+    try:
+        result = future.result(timeout=deadline.wait_timeout())
+    except concurrent.futures.TimeoutError:
+        deadline.cancel()
+        _count("timeouts")
+        raise RolloutTimeout(f"Rollout exceeded its {deadline.budget:g}s budget") from None
+    if deadline.expired:
+        # Xong sau deadline (ví dụ lỗi model call bị agent bắt lại): vẫn là timeout
+        _count("timeouts")
+        raise RolloutTimeout(f"Rollout exceeded its {deadline.budget:g}s budget")
+    return result
+
+
+async def arun_with_deadline(fn: Callable[[], Awaitable[T]], deadline: Deadline) -> T:
+    """
+    Bản async của run_with_deadline(): task bị cancel khi hết thời gian.
+
+    Không chờ task xử lý xong việc cancel (agent có thể bắt CancelledError
+    để dọn dẹp); deadline đã bị hủy nên phần còn lại tự dừng ở model call kế tiếp.
+
+    Raises:
+        RolloutTimeout: Hết thời gian
+    """
+    _count("rollouts")
+    with deadline_scope(deadline):
+        task = asyncio.ensure_future(fn())
+    done, _ = await asyncio.wait({task}, timeout=deadline.wait_timeout())
+    if not done:
+        deadline.cancel()
+        task.cancel()
+        task.add_done_callback(discard_result)
+        _count("timeouts")
+        raise RolloutTimeout(f"Rollout exceeded its {deadline.budget:g}s budget")
+    result = task.result()
+    if deadline.expired:
+        _count("timeouts")
+        raise RolloutTimeout(f"Rollout exceeded its {deadline.budget:g}s budget")
+    return result
+
+
+def discard_result(task: "asyncio.Future[Any]") -> None:
+    """Lấy kết quả của task bị bỏ để asyncio không cảnh báo exception chưa đọc."""
+    if not task.cancelled():
+        task.exception()
+
+
+def _apply_deadline(request: httpx.Request) -> None:
+    """Cắt timeout của request theo deadline hiện tại; dừng nếu đã hết."""
+    deadline = current_deadline()
+    if deadline is None:
+        return
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        _count("aborted_calls")
+        raise DeadlineExceeded("Rollout deadline exceeded", request=request)
+    if math.isinf(remaining):
+        return
+    timeout = dict(request.extensions.get("timeout") or {})
+    for key in ("connect", "read", "write", "pool"):
+        value = timeout.get(key)
+        timeout[key] = remaining if value is None else min(value, remaining)
+    request.extensions["timeout"] = timeout
+
+
+class DeadlineTransport(httpx.BaseTransport):
+    """httpx transport áp deadline của rollout cho mỗi request."""
+
+    def __init__(self, transport: Optional[httpx.BaseTransport] = None):
+        self._transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        _apply_deadline(request)
+        return self._transport.handle_request(request)
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncDeadlineTransport(httpx.AsyncBaseTransport):
+    """Bản async của DeadlineTransport."""
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        _apply_deadline(request)
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+_install_lock = threading.Lock()
+
+
+def install_deadline_transport() -> None:
+    """
+    Cho mọi model dùng httpx client mặc định của agno đi qua deadline transport.
+
+    Bọc ngoài cùng (sau limiter và cassette) để request không chờ quota khi
+    rollout đã hết giờ. Gọi lại khi đã cài không làm gì.
+    """
+    from agno.utils.http import (
+        get_default_async_client,
+        get_default_sync_client,
+        set_default_async_client,
+        set_default_sync_client,
+    )
+
+    with _install_lock:
+        sync_client, async_client = get_default_sync_client(), get_default_async_client()
+        if not has_transport(sync_client, DeadlineTransport):
+            set_default_sync_client(httpx.Client(
+                transport=DeadlineTransport(sync_client._transport), follow_redirects=True
+            ))
+        if not has_transport(async_client, AsyncDeadlineTransport):
+            set_default_async_client(httpx.AsyncClient(
+                transport=AsyncDeadlineTransport(async_client._transport), follow_redirects=True
+            ))
@@ -0,0 +1,144 @@
+"""
+Grade cache module cho training.
+
+Module này cache điểm của grader theo nội dung (content-addressed):
+- Key là hash của câu hỏi, response, grading template và grader model
+- Lưu trên đĩa (SQLite) nên dùng chung giữa các runner và các lần chạy lại
+- Giới hạn số entry, evict entry ít dùng nhất (LRU)
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Union
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GRADE_CACHE_PATH = Path(__file__).parent.parent / "utils" / "grade_cache.sqlite"
+
+
+def template_hash(template: str, instructions: Sequence[str] = ()) -> str:
+    """Hash của grading template và instructions của grader agent."""
+    payload = json.dumps([template, list(instructions)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class GradeCache:
+    """Cache điểm grader, lưu trong SQLite với giới hạn số entry."""
+
+    def __init__(self, path: Union[str, Path], max_entries: int = 100_000):
+        """
+        Khởi tạo cache.
+
+        Args:
+            path: Đường dẫn file SQLite
+            max_entries: Số điểm tối đa được giữ
+        """
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.path),
+            timeout=5.0,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS grades ("
+            "key TEXT PRIMARY KEY, model_id TEXT NOT NULL, "
+            "score REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_grades_access ON grades (last_access)"
+        )
+
+    @staticmethod
+    def make_key(question: str, agent_response: str, template_digest: str, model_id: str) -> str:
+        """Tạo key từ câu hỏi, response, template hash và grader model."""
+        payload = json.dumps(
+            [question, agent_response, template_digest, model_id], ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[float]:
+        """Lấy điểm đã cache, None nếu chưa có."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT score FROM grades WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE grades SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, score: float, model_id: str) -> None:
+        """Lưu điểm và evict các entry ít dùng nhất nếu vượt max_entries."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO grades (key, model_id, score, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, model_id, score, time.time()),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        count = self._conn.execute("SELECT COUNT(*) FROM grades").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM grades WHERE key IN "
+            "(SELECT key FROM grades ORDER BY last_access ASC LIMIT ?)",
+            (excess,),
+        )
+        self.evictions += excess
+
+    def clear(self) -> None:
+        """Xóa toàn bộ cache."""
+        with self._lock:
+            self._conn.execute("DELETE FROM grades")
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê cache."""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM grades").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": count,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+_shared_caches: Dict[str, GradeCache] = {}
+_shared_lock = threading.Lock()
+
+
+def get_grade_cache(path: Union[str, Path] = DEFAULT_GRADE_CACHE_PATH, max_entries: int = 100_000) -> GradeCache:
+    """Lấy GradeCache dùng chung trong process cho một file."""
+    key = str(Path(path).absolute())
+    with _shared_lock:
+        cache = _shared_caches.get(key)
+        if cache is None:
+            cache = GradeCache(path, max_entries=max_entries)
+            _shared_caches[key] = cache
+        return cache
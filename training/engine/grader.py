@@ -5,43 +5,756 @@ Module này đánh giá agent responses và tính rewards:
 - Exact match grading
 - Partial credit grading
 - LLM-based grading (optional)
+- GraderService: grader agent và client dùng lại giữa các rollout
+- Batch grading: chấm nhiều response trong một lần gọi LLM
+- Grade cache: bỏ qua grader cho các cặp (câu hỏi, response) đã chấm
+- Reward cascade: chấm local bằng core/tools.py trước, chỉ gọi LLM khi chưa kết luận được
+- Adaptive grading: lấy thêm mẫu grader chỉ khi điểm chưa rõ đúng/sai so với ngưỡng
 """
+import os
 import re
+import json
+import asyncio
+import math
 import logging
-from typing import Union, Optional
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Union, Optional, Any, Dict, List, Sequence, Tuple
+from agno.agent import Agent
 from agno.models.openai import OpenAIChat
+
+from .grade_cache import DEFAULT_GRADE_CACHE_PATH, GradeCache, get_grade_cache, template_hash
+from .verifier import LocalVerifier
 logger = logging.getLogger(__name__)
 
 
+def create_grader_agent(llm_client: Any) -> Agent:
+    """
+    Create the grader agent used by LLM grading.
+
+    Args:
+        llm_client: Model client for the grader
+
+    Returns:
+        Grader Agent instance
+    """
+    from core.prompts import GRADER_AGENT_INSTRUCTIONS
+
+    return Agent(
+        model=llm_client,
+        description="You are an expert evaluator for AI responses.",
+        instructions=GRADER_AGENT_INSTRUCTIONS,
+        markdown=False
+    )
+
+
+def parse_score(content: str) -> Optional[float]:
+    """
+    Extract a score in [0.0, 1.0] from grader output.
+
+    Returns:
+        Score, or None if no score could be parsed
+    """
+    content = content.strip()
+    score_match = re.search(r'([01]?\.\d+)', content)
+    if score_match:
+        return min(1.0, max(0.0, float(score_match.group(1))))
+
+    # Fallback for "1" or "0"
+    if "1.0" in content or content == "1": return 1.0
+    if "0.0" in content or content == "0": return 0.0
+    return None
+
+
+def parse_batch_scores(content: str, count: int) -> List[Optional[float]]:
+    """
+    Extract a JSON array of scores from batch grader output.
+
+    The array must contain exactly `count` entries; otherwise no item can be
+    trusted and every entry is None. Entries that are not valid scores are None.
+    """
+    start, end = content.find("["), content.rfind("]")
+    if start == -1 or end <= start:
+        return [None] * count
+    try:
+        values = json.loads(content[start:end + 1])
+    except ValueError:
+        return [None] * count
+    if not isinstance(values, list) or len(values) != count:
+        return [None] * count
+
+    scores: List[Optional[float]] = []
+    for value in values:
+        if isinstance(value, bool):
+            scores.append(None)
+        elif isinstance(value, (int, float)):
+            scores.append(min(1.0, max(0.0, float(value))))
+        elif isinstance(value, str):
+            scores.append(parse_score(value))
+        else:
+            scores.append(None)
+    return scores
+
+
+@dataclass
+class AdaptiveGrading:
+    """Settings of adaptive (sequential) multi-sample grading."""
+    threshold: float = 0.5          # Decision threshold the reward is compared with
+    max_samples: int = 5            # Hard cap on grader samples per response
+    confidence: float = 0.95        # Confidence level of the interval
+    prior_std: float = 0.2          # Assumed grader noise before variance is observed
+
+    @property
+    def variant(self) -> str:
+        return f"adaptive:{self.threshold}:{self.max_samples}:{self.confidence}:{self.prior_std}"
+
+
+@dataclass
+class AdaptiveResult:
+    """Outcome of adaptive grading for one response."""
+    score: float
+    samples: int
+    decided: bool
+    half_width: float
+    cached: bool = False
+
+
+class SequentialTest:
+    """
+    Running mean of grader samples with a normal confidence interval.
+
+    The variance estimate is shrunk towards prior_std**2 (one pseudo
+    observation), so a single clear-cut sample can already be decided while
+    noisy graders are sampled again.
+    """
+
+    def __init__(self, settings: AdaptiveGrading):
+        self.settings = settings
+        self.z = NormalDist().inv_cdf((1 + settings.confidence) / 2)
+        self.scores: List[float] = []
+
+    def add(self, score: float) -> None:
+        self.scores.append(score)
+
+    @property
+    def mean(self) -> float:
+        return sum(self.scores) / len(self.scores) if self.scores else 0.0
+
+    @property
+    def half_width(self) -> float:
+        n = len(self.scores)
+        if n == 0:
+            return math.inf
+        mean = self.mean
+        sum_sq = sum((x - mean) ** 2 for x in self.scores)
+        variance = (self.settings.prior_std ** 2 + sum_sq) / n
+        return self.z * math.sqrt(variance / n)
+
+    @property
+    def decided(self) -> bool:
+        return bool(self.scores) and abs(self.mean - self.settings.threshold) > self.half_width
+
+    @property
+    def done(self) -> bool:
+        return self.decided or len(self.scores) >= self.settings.max_samples
+
+    def result(self) -> AdaptiveResult:
+        return AdaptiveResult(self.mean, len(self.scores), self.decided, self.half_width)
+
+
+class GraderService:
+    """
+    Long-lived LLM grader.
+
+    Holds one model client (keep-alive connections) and a pre-built grader
+    agent, so grading does not rebuild them for every rollout. Each thread
+    gets its own grader agent on top of the shared client.
+
+    grade_batch() grades several responses in one call. With cache_path set,
+    scores are looked up in a persistent GradeCache before calling the LLM.
+    """
+
+    def __init__(
+        self,
+        llm_client: Optional[Any] = None,
+        model_id: str = "gpt-4o-mini",
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_batch_size: int = 8,
+        cache_path: Optional[Union[str, os.PathLike]] = None,
+        cache_max_entries: int = 100_000
+    ):
+        """
+        Initialize the grader service.
+
+        Args:
+            llm_client: Model client to use (an OpenAIChat is created if None)
+            model_id: Grader model id when creating the client
+            api_key: API key when creating the client (default: OPENAI_API_KEY)
+            base_url: Base URL when creating the client
+            max_batch_size: Maximum number of responses per batch grading call
+            cache_path: SQLite file of the grade cache (None = no cache)
+            cache_max_entries: Maximum number of cached grades
+        """
+        if llm_client is not None:
+            model_id = getattr(llm_client, "id", None) or model_id
+        self.model_id = model_id
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_batch_size = max(1, max_batch_size)
+        self.cache_path = str(cache_path) if cache_path else None
+        self.cache_max_entries = cache_max_entries
+        self._llm_client = llm_client
+        self._init_runtime()
+
+    def _init_runtime(self) -> None:
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.graded = 0
+        self.fallbacks = 0
+        self.sample_counts: Dict[str, int] = {}
+        self.sample_histogram: Counter = Counter()
+
+    def __getstate__(self):
+        # Client, agents and locks are rebuilt lazily after pickling (e.g. in runner processes)
+        state = {
+            key: value for key, value in self.__dict__.items()
+            if key in (
+                "model_id", "api_key", "base_url", "max_batch_size",
+                "cache_path", "cache_max_entries"
+            )
+        }
+        state["_llm_client"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_runtime()
+
+    @property
+    def llm_client(self) -> Any:
+        """Shared grader model client."""
+        with self._lock:
+            if self._llm_client is None:
+                from .cassette import install_cassette_from_env
+                install_cassette_from_env()
+                self._llm_client = OpenAIChat(
+                    id=self.model_id,
+                    api_key=self.api_key or os.getenv("OPENAI_API_KEY"),
+                    base_url=self.base_url
+                )
+            return self._llm_client
+
+    @property
+    def cache(self) -> Optional[GradeCache]:
+        """Shared persistent grade cache, None if disabled."""
+        if self.cache_path is None:
+            return None
+        return get_grade_cache(self.cache_path, self.cache_max_entries)
+
+    def _cache_key(self, question: str, agent_response: str, variant: str = "", batch: bool = False) -> str:
+        # Keyed by the template that produced the score: single and batch grades are cached apart
+        from core.prompts import (
+            BATCH_GRADING_ITEM_TEMPLATE,
+            BATCH_GRADING_PROMPT_TEMPLATE,
+            GRADER_AGENT_INSTRUCTIONS,
+            GRADING_PROMPT_TEMPLATE,
+        )
+        if batch:
+            template = BATCH_GRADING_PROMPT_TEMPLATE + BATCH_GRADING_ITEM_TEMPLATE
+        else:
+            template = GRADING_PROMPT_TEMPLATE
+        digest = template_hash(template, GRADER_AGENT_INSTRUCTIONS)
+        model_id = f"{self.model_id}|{variant}" if variant else self.model_id
+        return GradeCache.make_key(question, agent_response, digest, model_id)
+
+    def _cached_scores(self, items: Sequence[Tuple[str, str]]) -> List[Optional[float]]:
+        cache = self.cache
+        if cache is None:
+            return [None] * len(items)
+        scores = []
+        for q, r in items:
+            score = cache.get(self._cache_key(q, r))
+            if score is None:
+                score = cache.get(self._cache_key(q, r, batch=True))
+            scores.append(score)
+        return scores
+
+    def _store_scores(
+        self,
+        items: Sequence[Tuple[str, str]],
+        scores: Sequence[Tuple[Optional[float], bool]]
+    ) -> None:
+        cache = self.cache
+        if cache is None:
+            return
+        for (q, r), (score, batch) in zip(items, scores):
+            if score is not None:
+                cache.set(self._cache_key(q, r, batch=batch), score, self.model_id)
+
+    @property
+    def grader_agent(self) -> Agent:
+        """Pre-built grader agent for the current thread."""
+        agent = getattr(self._local, "agent", None)
+        if agent is None:
+            agent = create_grader_agent(self.llm_client)
+            self._local.agent = agent
+        return agent
+
+    def _count_call(self) -> None:
+        with self._lock:
+            self.calls += 1
+
+    def _count_graded(self, graded: int, fallbacks: int = 0) -> None:
+        with self._lock:
+            self.graded += graded
+            self.fallbacks += fallbacks
+
+    @staticmethod
+    def _single_prompt(question: str, agent_response: str) -> str:
+        from core.prompts import GRADING_PROMPT_TEMPLATE
+        return GRADING_PROMPT_TEMPLATE.format(question=question, agent_response=agent_response)
+
+    @staticmethod
+    def _batch_prompt(items: Sequence[Tuple[str, str]]) -> str:
+        from core.prompts import BATCH_GRADING_PROMPT_TEMPLATE, BATCH_GRADING_ITEM_TEMPLATE
+        blocks = "\n".join(
+            BATCH_GRADING_ITEM_TEMPLATE.format(index=i, question=q, agent_response=r)
+            for i, (q, r) in enumerate(items, start=1)
+        )
+        return BATCH_GRADING_PROMPT_TEMPLATE.format(items=blocks, count=len(items))
+
+    def _parse_single(self, content: str) -> Optional[float]:
+        self._count_graded(1)
+        score = parse_score(content)
+        if score is None:
+            logger.warning(f"Could not parse score from content: {content}")
+        return score
+
+    def _parse_batch(self, content: Optional[str], count: int) -> List[Optional[float]]:
+        scores = parse_batch_scores(content, count) if content is not None else [None] * count
+        missing = sum(score is None for score in scores)
+        if missing:
+            logger.warning(f"Batch grading: {missing}/{count} scores unusable, falling back per item")
+        self._count_graded(count - missing, missing)
+        return scores
+
+    def _grade_one(self, agent_response: str, question: str) -> Optional[float]:
+        self._count_call()
+        try:
+            response = self.grader_agent.run(self._single_prompt(question, agent_response))
+        except Exception:
+            logger.exception("LLM grading failed due to unexpected error")
+            self._count_graded(1)
+            return None
+        return self._parse_single(str(response.content))
+
+    async def _agrade_one(self, agent_response: str, question: str) -> Optional[float]:
+        self._count_call()
+        try:
+            response = await self.grader_agent.arun(self._single_prompt(question, agent_response))
+        except Exception:
+            logger.exception("LLM grading failed due to unexpected error")
+            self._count_graded(1)
+            return None
+        return self._parse_single(str(response.content))
+
+    def _grade_chunk(self, items: Sequence[Tuple[str, str]]) -> List[Tuple[Optional[float], bool]]:
+        # (score, graded with the batch template) per item
+        if len(items) == 1:
+            question, agent_response = items[0]
+            return [(self._grade_one(agent_response, question), False)]
+
+        self._count_call()
+        try:
+            content = str(self.grader_agent.run(self._batch_prompt(items)).content)
+        except Exception:
+            logger.exception("Batch LLM grading failed, grading items one by one")
+            content = None
+        scores = self._parse_batch(content, len(items))
+        return [
+            (score, True) if score is not None else (self._grade_one(r, q), False)
+            for score, (q, r) in zip(scores, items)
+        ]
+
+    async def _agrade_chunk(self, items: Sequence[Tuple[str, str]]) -> List[Tuple[Optional[float], bool]]:
+        if len(items) == 1:
+            question, agent_response = items[0]
+            return [(await self._agrade_one(agent_response, question), False)]
+
+        self._count_call()
+        try:
+            content = str((await self.grader_agent.arun(self._batch_prompt(items))).content)
+        except Exception:
+            logger.exception("Batch LLM grading failed, grading items one by one")
+            content = None
+        scores = self._parse_batch(content, len(items))
+        fallbacks = await asyncio.gather(*(
+            self._agrade_one(r, q) for score, (q, r) in zip(scores, items) if score is None
+        ))
+        fallback_iter = iter(fallbacks)
+        return [(score, True) if score is not None else (next(fallback_iter), False) for score in scores]
+
+    def _split_cached(self, items: Sequence[Tuple[str, str]]):
+        items = [tuple(item) for item in items]
+        scores = self._cached_scores(items)
+        pending = list(dict.fromkeys(item for item, score in zip(items, scores) if score is None))
+        chunks = [
+            pending[start:start + self.max_batch_size]
+            for start in range(0, len(pending), self.max_batch_size)
+        ]
+        return items, scores, pending, chunks
+
+    def _merge_scores(self, items, scores, pending, graded) -> List[float]:
+        self._store_scores(pending, graded)
+        fresh = {item: score for item, (score, _) in zip(pending, graded)}
+        return [
+            (score if score is not None else fresh.get(item)) or 0.0
+            for item, score in zip(items, scores)
+        ]
+
+    def grade_batch(self, items: Sequence[Tuple[str, str]]) -> List[float]:
+        """
+        Grade several (question, agent_response) pairs with as few LLM calls as possible.
+
+        Cached grades are used first and duplicate pairs are graded once. The
+        rest are sent in chunks of max_batch_size, each chunk in one call that
+        asks for a JSON array of scores. Items whose score cannot be parsed are
+        graded individually. Failed grades count as 0.0 and are not cached;
+        other grades are cached under the template (single or batch) that
+        produced them.
+
+        Args:
+            items: Sequence of (question, agent_response) pairs
+
+        Returns:
+            Reward values between 0.0 and 1.0, in input order
+        """
+        items, scores, pending, chunks = self._split_cached(items)
+        graded: List[Tuple[Optional[float], bool]] = []
+        for chunk in chunks:
+            graded.extend(self._grade_chunk(chunk))
+        return self._merge_scores(items, scores, pending, graded)
+
+    async def agrade_batch(self, items: Sequence[Tuple[str, str]]) -> List[float]:
+        """Async version of grade_batch(); chunks are graded concurrently."""
+        items, scores, pending, chunks = self._split_cached(items)
+        results = await asyncio.gather(*(self._agrade_chunk(chunk) for chunk in chunks))
+        graded = [graded_item for chunk_scores in results for graded_item in chunk_scores]
+        return self._merge_scores(items, scores, pending, graded)
+
+    async def agrade(self, agent_response: str, question: str) -> float:
+        """Async version of grade()."""
+        return (await self.agrade_batch([(question, agent_response)]))[0]
+
+    def grade(self, agent_response: str, question: str) -> float:
+        """
+        Grade an agent response with the shared grader agent.
+
+        Args:
+            agent_response: Agent's text response
+            question: The user's original question
+
+        Returns:
+            Reward value between 0.0 and 1.0
+        """
+        return self.grade_batch([(question, agent_response)])[0]
+
+    def _adaptive_cached(self, question: str, agent_response: str, settings: AdaptiveGrading) -> Optional[AdaptiveResult]:
+        cache = self.cache
+        if cache is None:
+            return None
+        score = cache.get(self._cache_key(question, agent_response, settings.variant))
+        if score is None:
+            return None
+        return AdaptiveResult(score, 0, True, 0.0, cached=True)
+
+    def _adaptive_finish(
+        self,
+        question: str,
+        agent_response: str,
+        settings: AdaptiveGrading,
+        test: SequentialTest,
+        task_id: Optional[str]
+    ) -> AdaptiveResult:
+        result = test.result()
+        with self._lock:
+            self.sample_histogram[result.samples] += 1
+            if task_id is not None:
+                self.sample_counts[task_id] = result.samples
+        cache = self.cache
+        if cache is not None and result.samples:
+            cache.set(self._cache_key(question, agent_response, settings.variant),
+                      result.score, self.model_id)
+        return result
+
+    def grade_adaptive(
+        self,
+        agent_response: str,
+        question: str,
+        settings: Optional[AdaptiveGrading] = None,
+        task_id: Optional[str] = None
+    ) -> AdaptiveResult:
+        """
+        Grade with as many grader samples as needed to decide against a threshold.
+
+        Samples the grader until the confidence interval of the mean score no
+        longer contains settings.threshold, or max_samples is reached. Failed
+        samples are skipped (they still count towards max_samples).
+
+        Args:
+            agent_response: Agent's text response
+            question: The user's original question
+            settings: Adaptive grading settings
+            task_id: Task id under which the sample count is recorded
+
+        Returns:
+            AdaptiveResult with the mean score and number of samples used
+        """
+        settings = settings or AdaptiveGrading()
+        cached = self._adaptive_cached(question, agent_response, settings)
+        if cached is not None:
+            if task_id is not None:
+                self.sample_counts[task_id] = 0
+            return cached
+
+        test = SequentialTest(settings)
+        for _ in range(settings.max_samples):
+            score = self._grade_one(agent_response, question)
+            if score is not None:
+                test.add(score)
+            if test.decided:
+                break
+        return self._adaptive_finish(question, agent_response, settings, test, task_id)
+
+    async def agrade_adaptive(
+        self,
+        agent_response: str,
+        question: str,
+        settings: Optional[AdaptiveGrading] = None,
+        task_id: Optional[str] = None
+    ) -> AdaptiveResult:
+        """Async version of grade_adaptive()."""
+        settings = settings or AdaptiveGrading()
+        cached = self._adaptive_cached(question, agent_response, settings)
+        if cached is not None:
+            if task_id is not None:
+                self.sample_counts[task_id] = 0
+            return cached
+
+        test = SequentialTest(settings)
+        for _ in range(settings.max_samples):
+            score = await self._agrade_one(agent_response, question)
+            if score is not None:
+                test.add(score)
+            if test.decided:
+                break
+        return self._adaptive_finish(question, agent_response, settings, test, task_id)
+
+    def stats(self) -> dict:
+        """Grader call and grade cache statistics."""
+        stats = {
+            "llm_calls": self.calls,
+            "graded": self.graded,
+            "fallbacks": self.fallbacks,
+            "responses_per_call": self.graded / self.calls if self.calls else 0.0,
+        }
+        if self.sample_histogram:
+            total = sum(self.sample_histogram.values())
+            stats["adaptive"] = {
+                "responses": total,
+                "mean_samples": sum(n * c for n, c in self.sample_histogram.items()) / total,
+                "samples_histogram": dict(sorted(self.sample_histogram.items())),
+            }
+        cache = self.cache
+        if cache is not None:
+            stats["cache"] = cache.stats()
+        return stats
+
+
+_graders: Dict[tuple, GraderService] = {}
+_graders_lock = threading.Lock()
+
+
+def get_grader_service(
+    model_id: str = "gpt-4o-mini",
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    max_batch_size: int = 8,
+    cache_path: Optional[Union[str, os.PathLike]] = DEFAULT_GRADE_CACHE_PATH,
+    cache_max_entries: int = 100_000
+) -> GraderService:
+    """
+    Get the process-wide GraderService for a grader configuration.
+
+    Every rollout of a runner process with the same settings shares one
+    service (model client, grader agents and grade cache).
+    """
+    key = (
+        model_id, api_key, base_url, max_batch_size,
+        str(cache_path) if cache_path else None, cache_max_entries
+    )
+    with _graders_lock:
+        grader = _graders.get(key)
+        if grader is None:
+            grader = GraderService(
+                model_id=model_id,
+                api_key=api_key,
+                base_url=base_url,
+                max_batch_size=max_batch_size,
+                cache_path=cache_path,
+                cache_max_entries=cache_max_entries
+            )
+            _graders[key] = grader
+        return grader
+
+
+_verifiers: Dict[float, LocalVerifier] = {}
+_cascade_stats = {"local": 0, "llm": 0}
+_cascade_lock = threading.Lock()
+
+
+def verify_locally(agent_response: str, question: str, tolerance: float = 0.1) -> Optional[float]:
+    """
+    First stage of the reward cascade: grade math answers without the LLM.
+
+    Args:
+        agent_response: Agent's text response
+        question: The user's original question
+        tolerance: Relative error above which a final answer is judged wrong
+
+    Returns:
+        1.0 or 0.0 when the local ground truth is conclusive, otherwise None
+    """
+    with _cascade_lock:
+        verifier = _verifiers.get(tolerance)
+        if verifier is None:
+            verifier = _verifiers[tolerance] = LocalVerifier(tolerance=tolerance)
+    score = verifier.verify(agent_response, question).score
+    with _cascade_lock:
+        _cascade_stats["local" if score is not None else "llm"] += 1
+    return score
+
+
+def get_cascade_stats() -> Dict[str, Any]:
+    """How many rewards were decided locally vs. passed on to the LLM grader."""
+    with _cascade_lock:
+        total = _cascade_stats["local"] + _cascade_stats["llm"]
+        return {
+            **_cascade_stats,
+            "local_rate": _cascade_stats["local"] / total if total else 0.0,
+        }
+
+
 def calculate_reward(
     agent_response: str,
     question: str,
     use_llm_grader: bool = True,
-    llm_client: Optional[OpenAIChat] = None
+    llm_client: Optional[OpenAIChat] = None,
+    grader: Optional[GraderService] = None,
+    local_verification: bool = True,
+    tolerance: float = 0.1,
+    adaptive: Optional[AdaptiveGrading] = None,
+    task_id: Optional[str] = None
 ) -> float:
     """
     Calculate reward for agent response based on the question quality.
-    
+
+    Reward cascade: local verification against ground truth computed with
+    core/tools.py, then the grader's persistent grade cache, then the LLM.
+
     Args:
         agent_response: Agent's text response
         question: The user's original question
         use_llm_grader: Whether to use LLM for grading
         llm_client: LLM client for grading
-        
+        grader: Grader service (default: the process-wide service)
+        local_verification: Whether to try local verification first
+        tolerance: Relative error above which local verification judges an answer wrong
+        adaptive: Adaptive multi-sample grading settings (None = single sample)
+        task_id: Task id for per-task sample counts of adaptive grading
+
     Returns:
         Reward value between 0.0 and 1.0
     """
+    if local_verification:
+        score = verify_locally(agent_response, question, tolerance)
+        if score is not None:
+            return score
+
     # Use LLM Grader (Primary strategy for reference-free grading)
     if use_llm_grader:
-        if llm_client is None:
-            import os
-            llm_client = OpenAIChat(id="gpt-4o-mini", api_key=os.getenv("OPENAI_API_KEY"))
-            
-        return llm_grade_response(agent_response, question, llm_client)
-    
+        if llm_client is not None:
+            return llm_grade_response(agent_response, question, llm_client)
+
+        grader = grader or get_grader_service()
+        if adaptive is not None:
+            return grader.grade_adaptive(agent_response, question, adaptive, task_id).score
+        return grader.grade(agent_response, question)
+
     return 0.0
 
 
+async def acalculate_reward(
+    agent_response: str,
+    question: str,
+    use_llm_grader: bool = True,
+    grader: Optional[GraderService] = None,
+    local_verification: bool = True,
+    tolerance: float = 0.1,
+    adaptive: Optional[AdaptiveGrading] = None,
+    task_id: Optional[str] = None
+) -> float:
+    """Async version of calculate_reward()."""
+    if local_verification:
+        score = verify_locally(agent_response, question, tolerance)
+        if score is not None:
+            return score
+    if not use_llm_grader:
+        return 0.0
+    grader = grader or get_grader_service()
+    if adaptive is not None:
+        return (await grader.agrade_adaptive(agent_response, question, adaptive, task_id)).score
+    return await grader.agrade(agent_response, question)
+
+
+def calculate_rewards(
+    items: Sequence[Tuple[str, str]],
+    use_llm_grader: bool = True,
+    grader: Optional[GraderService] = None,
+    local_verification: bool = True,
+    tolerance: float = 0.1
+) -> List[float]:
+    """
+    Calculate rewards for several (question, agent_response) pairs at once.
+
+    Args:
+        items: Sequence of (question, agent_response) pairs
+        use_llm_grader: Whether to use LLM for grading
+        grader: Grader service (default: the process-wide service)
+        local_verification: Whether to try local verification first
+        tolerance: Relative error above which local verification judges an answer wrong
+
+    Returns:
+        Reward values between 0.0 and 1.0, in input order
+    """
+    scores: List[Optional[float]] = [
+        verify_locally(r, q, tolerance) if local_verification else None
+        for q, r in items
+    ]
+    remaining = [item for item, score in zip(items, scores) if score is None]
+    if not remaining:
+        return scores
+    if use_llm_grader:
+        graded = iter((grader or get_grader_service()).grade_batch(remaining))
+    else:
+        graded = iter([0.0] * len(remaining))
+    return [score if score is not None else next(graded) for score in scores]
+
+
 def llm_grade_response(
     agent_response: str,
     question: str,
@@ -49,38 +762,7 @@ def llm_grade_response(
 ) -> float:
     """
     Use LLM to grade agent response semantically based on the question.
+
+    Builds a one-off grader agent; prefer GraderService for repeated grading.
     """
-    from core.prompts import GRADING_PROMPT_TEMPLATE
-    grading_prompt = GRADING_PROMPT_TEMPLATE.format(
-        question=question,
-        agent_response=agent_response
-    )
-    
-    from agno.agent import Agent
-    from core.prompts import GRADER_AGENT_INSTRUCTIONS
-    
-    grader_agent = Agent(
-        model=llm_client,
-        description="You are an expert evaluator for AI responses.",
-        instructions=GRADER_AGENT_INSTRUCTIONS,
-        markdown=False
-    )
-    
-    try:
-        response = grader_agent.run(grading_prompt)
-        content = str(response.content).strip()
-        
-        # Extract score
-        score_match = re.search(r'([01]?\.\d+)', content)
-        if score_match:
-            return min(1.0, max(0.0, float(score_match.group(1))))
-        
-        # Fallback for "1" or "0"
-        if "1.0" in content or content == "1": return 1.0
-        if "0.0" in content or content == "0": return 0.0
-        
-        logger.warning(f"Could not parse score from content: {content}")
-        return 0.0
-    except Exception:
-        logger.exception("LLM grading failed due to unexpected error")
-        return 0.0
+    return GraderService(llm_client=llm_client).grade(agent_response, question)
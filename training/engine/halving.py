@@ -0,0 +1,207 @@
+"""
+Successive halving module cho APO.
+
+APO mặc định chấm mọi prompt ứng viên trên toàn bộ validation batch. Module
+này chấm theo từng vòng (rung) để tốn ít agent/grader call hơn:
+- Rung đầu chấm mọi ứng viên trên một tập con ngẫu nhiên nhỏ của batch
+- Bỏ nửa kém hơn (hòa điểm ở ngưỡng thì chọn ngẫu nhiên)
+- Rung sau gấp đôi số task cho các ứng viên còn lại, tới khi còn một ứng viên
+  hoặc đã dùng hết batch
+Mọi ứng viên trong một rung được chấm trên cùng các task (tập con lồng nhau
+của cùng một thứ tự ngẫu nhiên), nên điểm trung bình so sánh được với nhau;
+reward của rung trước được dùng lại, chỉ chạy phần task mới.
+
+SuccessiveHalvingAPO override method nội bộ của APO (agentlightning==0.3.0);
+check_apo_compat() kiểm tra các method đó trước khi dùng.
+"""
+
+import asyncio
+import inspect
+import logging
+import math
+import random
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    from agentlightning.algorithm.apo import APO
+except ImportError:
+    APO = None
+
+
+logger = logging.getLogger(__name__)
+
+
+# Method nội bộ của APO mà SuccessiveHalvingAPO override hoặc gọi, với tham số cần có
+_APO_INTERNALS = {
+    "_evaluate_and_select_beam": ("candidates", "resource_name", "val_dataset_iterator", "round_num"),
+    "evaluate_prompt_on_batch": ("prompt", "resource_name", "dataset", "mode", "prefix"),
+    "_format_log_prefix": ("round_num", "prompt_version"),
+    "_log": ("level", "message", "prefix"),
+}
+
+
+def check_apo_compat() -> Optional[str]:
+    """
+    Kiểm tra APO đã cài có đúng các method nội bộ mà SuccessiveHalvingAPO dùng.
+
+    Returns:
+        Mô tả chỗ không khớp, None nếu dùng được
+    """
+    if APO is None:
+        return "agentlightning.algorithm.apo is not available"
+    for name, params in _APO_INTERNALS.items():
+        method = getattr(APO, name, None)
+        if method is None:
+            return f"APO.{name} no longer exists"
+        found = [p for p in inspect.signature(method).parameters if p != "self"]
+        if name == "_evaluate_and_select_beam":
+            # Được override: signature phải khớp đúng, và vẫn là coroutine
+            if tuple(found) != params or not inspect.iscoroutinefunction(method):
+                return f"APO.{name}{inspect.signature(method)} does not match the overridden signature"
+        elif not set(params) <= set(found):
+            return f"APO.{name}{inspect.signature(method)} is missing parameters {sorted(set(params) - set(found))}"
+    return None
+
+
+def halving_rungs(n_tasks: int, min_tasks: int = 2) -> List[int]:
+    """
+    Số task của mỗi rung: min_tasks, gấp đôi mỗi rung, kết thúc ở n_tasks.
+
+    Ví dụ: halving_rungs(8, 2) == [2, 4, 8]
+    """
+    size = max(1, min(min_tasks, n_tasks))
+    rungs = [size]
+    while size < n_tasks:
+        size = min(size * 2, n_tasks)
+        rungs.append(size)
+    return rungs
+
+
+def halve(scores: Dict[int, float], rng: Optional[random.Random] = None) -> List[int]:
+    """
+    Giữ nửa tốt hơn theo điểm (làm tròn lên); hòa điểm ở ngưỡng thì chọn ngẫu nhiên.
+
+    Args:
+        scores: Điểm trung bình theo index ứng viên, trên cùng các task
+        rng: Nguồn ngẫu nhiên để phá hòa (None = random mặc định)
+
+    Returns:
+        Index các ứng viên còn lại, điểm cao trước
+    """
+    ids = list(scores)
+    (rng or random).shuffle(ids)
+    ranked = sorted(ids, key=lambda i: scores[i], reverse=True)
+    return ranked[:math.ceil(len(ranked) / 2)]
+
+
+if APO is not None:
+    class SuccessiveHalvingAPO(APO):
+        """APO chọn beam bằng successive halving thay vì chấm mọi ứng viên trên cả batch."""
+
+        def __init__(self, *args: Any, halving_min_tasks: int = 2, halving_seed: Optional[int] = None, **kwargs: Any):
+            """
+            Args:
+                halving_min_tasks: Số validation task của rung đầu
+                halving_seed: Seed chọn tập con (None = ngẫu nhiên)
+                *args, **kwargs: Tham số của APO
+            """
+            super().__init__(*args, **kwargs)
+            self.halving_min_tasks = halving_min_tasks
+            self._rng = random.Random(halving_seed)
+            self.rollouts_run = 0
+            self.rollouts_full = 0
+
+        async def _evaluate_and_select_beam(
+            self,
+            candidates: List[Any],
+            resource_name: str,
+            val_dataset_iterator: Any,
+            round_num: int,
+        ) -> List[Any]:
+            """
+            Chấm ứng viên bằng successive halving và chọn beam_width prompt tốt nhất.
+
+            Beam xếp theo rung cuối mà ứng viên tới được, rồi theo điểm ở rung đó.
+            """
+            display_round = round_num + 1
+            round_prefix = self._format_log_prefix(round_num=display_round)
+            val_batch = list(next(val_dataset_iterator))
+            # Một thứ tự ngẫu nhiên cho cả vòng: rung k là prefix, giống nhau cho mọi ứng viên
+            tasks = self._rng.sample(val_batch, len(val_batch))
+            rungs = halving_rungs(len(tasks), self.halving_min_tasks)
+            self._log(
+                logging.INFO,
+                f"Successive halving of {len(candidates)} candidates over {rungs} validation tasks",
+                prefix=round_prefix,
+            )
+
+            rewards: Dict[int, List[float]] = {i: [] for i in range(len(candidates))}
+            reached: Dict[int, int] = {}
+            alive = list(range(len(candidates)))
+            for rung, size in enumerate(rungs):
+                await asyncio.gather(*[
+                    self._extend(candidates[i], rewards[i], resource_name, tasks[:size], display_round)
+                    for i in alive
+                ])
+                scores = {i: sum(rewards[i]) / max(1, len(rewards[i])) for i in alive}
+                for i in alive:
+                    candidates[i].score = scores[i]
+                    reached[i] = rung
+                self._log(
+                    logging.INFO,
+                    f"Rung {rung + 1}/{len(rungs)} ({size} tasks): "
+                    + ", ".join(f"{candidates[i].version}:{scores[i]:.3f}" for i in alive),
+                    prefix=round_prefix,
+                )
+                if size == len(tasks) or len(alive) == 1:
+                    break
+                alive = halve(scores, self._rng)
+
+            self.rollouts_full += len(candidates) * len(tasks)
+            self._log(
+                logging.INFO,
+                f"Successive halving ran {self.rollouts_run} of {self.rollouts_full} validation rollouts so far",
+                prefix=round_prefix,
+            )
+
+            ranked = sorted(
+                range(len(candidates)),
+                key=lambda i: (reached.get(i, -1), candidates[i].score or 0.0),
+                reverse=True,
+            )
+            selected_prompts = [candidates[i] for i in ranked[: self.beam_width]]
+            self._log(
+                logging.INFO,
+                f"Top {len(selected_prompts)} candidates on validation dataset: "
+                f"{[f'{p.version}:{p.score:.3f}' for p in selected_prompts]}",
+                prefix=round_prefix,
+            )
+            if len(selected_prompts) == 0:
+                raise ValueError("No beam candidates any more")
+            return selected_prompts
+
+        async def _extend(
+            self,
+            prompt: Any,
+            rewards: List[float],
+            resource_name: str,
+            tasks: Sequence[Any],
+            display_round: int,
+        ) -> None:
+            """Chạy prompt trên các task chưa chấm trong tasks, nối reward vào rewards."""
+            new_tasks = tasks[len(rewards):]
+            if not new_tasks:
+                return
+            results, _ = await self.evaluate_prompt_on_batch(
+                prompt,
+                resource_name,
+                new_tasks,
+                mode="val",
+                prefix=self._format_log_prefix(round_num=display_round, prompt_version=prompt.version),
+            )
+            self.rollouts_run += len(new_tasks)
+            # Rollout không xong (timeout của batch) tính 0 để mọi ứng viên có cùng số task
+            scored = [r["final_reward"] or 0.0 for r in results]
+            rewards.extend(scored + [0.0] * (len(new_tasks) - len(scored)))
+else:
+    SuccessiveHalvingAPO = None
@@ -0,0 +1,501 @@
+"""
+Rate limiter module cho training.
+
+Module này điều tiết request tới model provider theo quota thật, thay cho
+việc sleep cố định trước mỗi rollout:
+- Token bucket theo requests/phút và tokens/phút
+- Gặp 429 thì chờ theo Retry-After (hoặc backoff lũy thừa) rồi thử lại,
+  mọi request khác trong process cũng tạm dừng
+- httpx transport để gắn vào OpenAI (agno global client) và Gemini client
+- SharedRateLimiter: trạng thái bucket nằm trong file SQLite, dùng chung
+  giữa mọi runner process và APO client trên cùng máy
+"""
+
+import asyncio
+import json
+import logging
+import random
+import re
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import httpx
+
+from .deadline import DeadlineExceeded, current_deadline
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPLETION_TOKENS = 256
+DEFAULT_RATE_LIMIT_PATH = Path(__file__).parent.parent / "utils" / "rate_limiter.sqlite"
+
+_RETRY_DELAY_RE = re.compile(r'"retryDelay"\s*:\s*"(\d+(?:\.\d+)?)s"')
+_HTTPX_LIMITS = httpx.Limits(max_connections=1000, max_keepalive_connections=200)
+
+
+class TokenBucket:
+    """Token bucket: dung lượng `capacity`, nạp lại `rate` đơn vị mỗi giây."""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Số giây cần chờ trước khi lấy được `amount` (0 nếu lấy được ngay)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """Giới hạn requests/phút và tokens/phút cho một provider key."""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        completion_tokens: int = DEFAULT_COMPLETION_TOKENS
+    ):
+        """
+        Khởi tạo limiter.
+
+        Args:
+            requests_per_minute: Số request tối đa mỗi phút (None = không giới hạn)
+            tokens_per_minute: Số token tối đa mỗi phút (None = không giới hạn)
+            max_retries: Số lần thử lại tối đa khi gặp 429
+            base_delay: Delay ban đầu của backoff (giây) khi không có Retry-After
+            max_delay: Delay tối đa của backoff (giây)
+            completion_tokens: Số token output ước lượng cho mỗi request
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.completion_tokens = completion_tokens
+
+        self._requests = (
+            TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+            if requests_per_minute else None
+        )
+        self._tokens = (
+            TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+            if tokens_per_minute else None
+        )
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+        self.acquired = 0
+        self.waited_seconds = 0.0
+        self.rate_limited = 0
+
+    def _reserve(self, tokens: int) -> float:
+        """Lấy quota nếu đủ; ngược lại trả về số giây cần chờ."""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._blocked_until - now
+            if self._requests is not None:
+                wait = max(wait, self._requests.wait_time(1, now))
+            if self._tokens is not None and tokens:
+                wait = max(wait, self._tokens.wait_time(tokens, now))
+            if wait > 0:
+                return wait
+
+            if self._requests is not None:
+                self._requests.take(1)
+            if self._tokens is not None and tokens:
+                self._tokens.take(tokens)
+            self.acquired += 1
+            return 0.0
+
+    async def _areserve(self, tokens: int) -> float:
+        """Bản async của _reserve(); bucket trong bộ nhớ nên gọi thẳng."""
+        return self._reserve(tokens)
+
+    @staticmethod
+    def _check_deadline(wait: float) -> None:
+        # Không chờ quota quá deadline của rollout đang chạy
+        deadline = current_deadline()
+        if deadline is not None and wait >= deadline.remaining():
+            raise DeadlineExceeded(f"Rate limit wait of {wait:.1f}s exceeds the rollout deadline")
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Chờ (blocking) đến khi đủ quota cho một request.
+
+        Args:
+            tokens: Số token ước lượng của request
+
+        Returns:
+            Tổng số giây đã chờ
+
+        Raises:
+            DeadlineExceeded: Nếu phải chờ quá deadline của rollout hiện tại
+        """
+        waited = 0.0
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                break
+            self._check_deadline(wait)
+            time.sleep(wait)
+            waited += wait
+        if waited:
+            with self._lock:
+                self.waited_seconds += waited
+        return waited
+
+    async def aacquire(self, tokens: int = 0) -> float:
+        """Bản async của acquire()."""
+        waited = 0.0
+        while True:
+            wait = await self._areserve(tokens)
+            if wait <= 0:
+                break
+            self._check_deadline(wait)
+            await asyncio.sleep(wait)
+            waited += wait
+        if waited:
+            with self._lock:
+                self.waited_seconds += waited
+        return waited
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay trước lần thử lại: Retry-After nếu có, ngược lại backoff lũy thừa có jitter."""
+        if retry_after is not None:
+            return min(self.max_delay, max(0.0, retry_after))
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    def penalize(self, delay: float) -> None:
+        """Sau một 429: tạm dừng mọi request trong `delay` giây."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            self.rate_limited += 1
+
+    async def apenalize(self, delay: float) -> None:
+        """Bản async của penalize()."""
+        self.penalize(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê limiter."""
+        return {
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "acquired": self.acquired,
+            "waited_seconds": round(self.waited_seconds, 3),
+            "rate_limited": self.rate_limited,
+        }
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    RateLimiter dùng chung giữa các process.
+
+    Mức bucket và thời điểm hết 429-pause được lưu trong một file SQLite;
+    mỗi lần lấy quota là một transaction BEGIN IMMEDIATE, nên tổng request
+    của mọi process dùng cùng file và `name` không vượt quota.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = DEFAULT_RATE_LIMIT_PATH,
+        name: str = "default",
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        **kwargs: Any
+    ):
+        """
+        Khởi tạo limiter.
+
+        Args:
+            path: File SQLite chứa trạng thái bucket
+            name: Tên quota (ví dụ provider key); các process cùng name chia nhau quota
+            requests_per_minute: Số request tối đa mỗi phút (None = không giới hạn)
+            tokens_per_minute: Số token tối đa mỗi phút (None = không giới hạn)
+            **kwargs: Các tham số còn lại của RateLimiter
+        """
+        super().__init__(requests_per_minute, tokens_per_minute, **kwargs)
+        self.path = Path(path)
+        self.name = name
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.path),
+            timeout=30.0,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "name TEXT PRIMARY KEY, requests REAL NOT NULL, tokens REAL NOT NULL, "
+            "updated REAL NOT NULL, blocked_until REAL NOT NULL)"
+        )
+
+    def _transaction(self, update):
+        """Chạy `update(row, now)` trong một transaction độc quyền, trả về kết quả của nó."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT requests, tokens, updated, blocked_until FROM buckets WHERE name = ?",
+                    (self.name,),
+                ).fetchone()
+                if row is None:
+                    row = (self.requests_per_minute or 0.0, self.tokens_per_minute or 0.0, now, 0.0)
+                result, new_row = update(row, now)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, requests, tokens, updated, blocked_until) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (self.name, *new_row),
+                )
+                self._conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _reserve(self, tokens: int) -> float:
+        def update(row, now):
+            requests, token_level, updated, blocked_until = row
+            elapsed = max(0.0, now - updated)
+            wait = blocked_until - now
+
+            if self.requests_per_minute:
+                capacity = self.requests_per_minute
+                requests = min(capacity, requests + elapsed * capacity / 60.0)
+                wait = max(wait, (min(1, capacity) - requests) * 60.0 / capacity)
+            if self.tokens_per_minute and tokens:
+                capacity = self.tokens_per_minute
+                token_level = min(capacity, token_level + elapsed * capacity / 60.0)
+                wait = max(wait, (min(tokens, capacity) - token_level) * 60.0 / capacity)
+            elif self.tokens_per_minute:
+                token_level = min(self.tokens_per_minute, token_level + elapsed * self.tokens_per_minute / 60.0)
+
+            if wait <= 0:
+                if self.requests_per_minute:
+                    requests -= min(1, self.requests_per_minute)
+                if self.tokens_per_minute and tokens:
+                    token_level -= min(tokens, self.tokens_per_minute)
+                wait = 0.0
+            return wait, (requests, token_level, now, blocked_until)
+
+        wait = self._transaction(update)
+        if wait <= 0:
+            self.acquired += 1
+        return wait
+
+    async def _areserve(self, tokens: int) -> float:
+        # Transaction SQLite có thể chờ lock (busy timeout): chạy trong thread, không chặn event loop
+        return await asyncio.to_thread(self._reserve, tokens)
+
+    async def apenalize(self, delay: float) -> None:
+        await asyncio.to_thread(self.penalize, delay)
+
+    def penalize(self, delay: float) -> None:
+        def update(row, now):
+            requests, token_level, updated, blocked_until = row
+            return None, (requests, token_level, updated, max(blocked_until, now + delay))
+
+        self._transaction(update)
+        with self._lock:
+            self.rate_limited += 1
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({"shared": str(self.path), "name": self.name})
+        return stats
+
+
+def parse_retry_after(response: httpx.Response) -> Optional[float]:
+    """
+    Đọc thời gian chờ từ response 429 (giây).
+
+    Hỗ trợ header retry-after-ms, Retry-After (giây hoặc HTTP date) và
+    trường "retryDelay" trong body lỗi của Gemini.
+    """
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000.0
+        if "retry-after" in headers:
+            value = headers["retry-after"]
+            try:
+                return float(value)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+
+    match = _RETRY_DELAY_RE.search(response.text or "")
+    return float(match.group(1)) if match else None
+
+
+def estimate_request_tokens(request: httpx.Request, completion_tokens: int = DEFAULT_COMPLETION_TOKENS) -> int:
+    """Ước lượng token của một request: ~4 byte/token cho input cộng phần output dự kiến."""
+    body = request.content or b""
+    if not body:
+        return 0
+    try:
+        payload = json.loads(body)
+        max_output = payload.get("max_completion_tokens") or payload.get("max_tokens")
+        if max_output is None:
+            max_output = (payload.get("generationConfig") or {}).get("maxOutputTokens")
+    except (ValueError, AttributeError):
+        max_output = None
+    return len(body) // 4 + int(max_output or completion_tokens)
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """httpx transport lấy quota trước mỗi request và thử lại khi gặp 429."""
+
+    def __init__(self, limiter: RateLimiter, transport: Optional[httpx.BaseTransport] = None):
+        self.limiter = limiter
+        self._transport = transport or httpx.HTTPTransport(limits=_HTTPX_LIMITS)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        tokens = estimate_request_tokens(request, self.limiter.completion_tokens)
+        attempt = 0
+        while True:
+            self.limiter.acquire(tokens)
+            response = self._transport.handle_request(request)
+            if response.status_code != 429 or attempt >= self.limiter.max_retries:
+                return response
+
+            response.read()
+            delay = self.limiter.backoff_delay(attempt, parse_retry_after(response))
+            response.close()
+            self.limiter.penalize(delay)
+            logger.warning(f"Rate limited (429), retrying in {delay:.1f}s (attempt {attempt + 1})")
+            attempt += 1
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """Bản async của RateLimitedTransport."""
+
+    def __init__(self, limiter: RateLimiter, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.limiter = limiter
+        self._transport = transport or httpx.AsyncHTTPTransport(limits=_HTTPX_LIMITS)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        tokens = estimate_request_tokens(request, self.limiter.completion_tokens)
+        attempt = 0
+        while True:
+            await self.limiter.aacquire(tokens)
+            response = await self._transport.handle_async_request(request)
+            if response.status_code != 429 or attempt >= self.limiter.max_retries:
+                return response
+
+            await response.aread()
+            delay = self.limiter.backoff_delay(attempt, parse_retry_after(response))
+            await response.aclose()
+            await self.limiter.apenalize(delay)
+            logger.warning(f"Rate limited (429), retrying in {delay:.1f}s (attempt {attempt + 1})")
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def rate_limited_client(limiter: RateLimiter) -> httpx.Client:
+    """httpx.Client đi qua limiter (cùng limits với client mặc định của agno)."""
+    return httpx.Client(transport=RateLimitedTransport(limiter), follow_redirects=True)
+
+
+def async_rate_limited_client(limiter: RateLimiter) -> httpx.AsyncClient:
+    """httpx.AsyncClient đi qua limiter."""
+    return httpx.AsyncClient(transport=AsyncRateLimitedTransport(limiter), follow_redirects=True)
+
+
+def gemini_client_params(limiter: RateLimiter, cassette: Optional[Any] = None) -> Dict[str, Any]:
+    """client_params cho agno Gemini để mọi request đi qua limiter (và cassette nếu có)."""
+    client, async_client = rate_limited_client(limiter), async_rate_limited_client(limiter)
+    if cassette is not None:
+        from .cassette import async_cassette_client, cassette_client
+        client, async_client = cassette_client(cassette, client), async_cassette_client(cassette, async_client)
+    return {"http_options": {"httpx_client": client, "httpx_async_client": async_client}}
+
+
+def quota_name(api_key: Optional[str], base_url: Optional[str] = None) -> str:
+    """Tên quota cho một provider key, không lộ key."""
+    import hashlib
+    payload = f"{base_url or ''}|{api_key or ''}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+_limiters: Dict[Tuple[Any, ...], RateLimiter] = {}
+_installed: Optional[RateLimiter] = None
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+    max_retries: int = 5,
+    path: Optional[Union[str, Path]] = None,
+    name: str = "default"
+) -> RateLimiter:
+    """
+    Lấy RateLimiter dùng chung trong process cho một cấu hình quota.
+
+    Args:
+        requests_per_minute: Số request tối đa mỗi phút
+        tokens_per_minute: Số token tối đa mỗi phút
+        max_retries: Số lần thử lại tối đa khi gặp 429
+        path: File SQLite để chia quota giữa các process (None = chỉ trong process)
+        name: Tên quota trong file dùng chung
+    """
+    key = (requests_per_minute, tokens_per_minute, max_retries,
+           str(Path(path).absolute()) if path else None, name)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            if path:
+                limiter = SharedRateLimiter(
+                    path, name, requests_per_minute, tokens_per_minute, max_retries=max_retries
+                )
+            else:
+                limiter = RateLimiter(requests_per_minute, tokens_per_minute, max_retries=max_retries)
+            _limiters[key] = limiter
+        return limiter
+
+
+def install_rate_limiter(limiter: RateLimiter) -> None:
+    """
+    Cho mọi model dùng httpx client mặc định của agno (OpenAIChat, ...) đi qua limiter.
+
+    Gọi trước khi tạo model client; gọi lại với cùng limiter không làm gì.
+    """
+    global _installed
+    from agno.utils.http import set_default_async_client, set_default_sync_client
+
+    with _limiters_lock:
+        if _installed is limiter:
+            return
+        set_default_sync_client(rate_limited_client(limiter))
+        set_default_async_client(async_rate_limited_client(limiter))
+        _installed = limiter
+    logger.info(f"Rate limiter installed: {limiter.stats()}")
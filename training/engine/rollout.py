@@ -2,12 +2,24 @@
 Training module cho Agent Lightning integration.
 
 Module này chứa:
-- Rollout function với @rollout decorator
+- Rollout function với @rollout decorator (sync và async)
 - Trainer setup
 - Agent creation với custom prompts
+- Agent pool dùng lại agent/model client giữa các rollout
+- Grader service dùng chung cho mọi rollout
+- Rate limiter theo quota của provider cho mọi model call
+- Cassette ghi/phát lại model call để chạy offline
+- Rollout cache dùng lại reward của (prompt, task) đã đánh giá
+- Session store nhẹ cho rollout thay cho JsonDb dùng chung
+- Deadline cho mỗi rollout, hủy hợp tác khi quá hạn
+- Chạy bản sao của rollout chậm (speculative execution), lấy lần xong trước
+- Successive halving khi APO chấm các prompt ứng viên
 """
 
 import logging
+import os
+import threading
+from contextlib import nullcontext
 from typing import Optional
 
 try:
@@ -27,22 +39,71 @@ except ImportError:
 
 from agno.agent import Agent
 from agno.models.openai import OpenAIChat
-from agno.tools.function import Function
 from agno.db.json import JsonDb
 
 from core.config import AgentConfig
 
-from .grader import calculate_reward
-from ..config import TrainingConfig
+from .agent_pool import AgentPool, _tool_names
+from .cassette import async_cassette_client, configure_cassette_env, install_cassette_from_env
+from .deadline import (
+    Deadline,
+    RolloutTimeout,
+    arun_with_deadline,
+    get_deadline_stats,
+    install_deadline_transport,
+    run_with_deadline,
+)
+from .grade_cache import DEFAULT_GRADE_CACHE_PATH
+from .halving import SuccessiveHalvingAPO, check_apo_compat
+from .grader import (
+    AdaptiveGrading,
+    GraderService,
+    acalculate_reward,
+    calculate_reward,
+    get_cascade_stats,
+    get_grader_service,
+)
+from .rate_limiter import (
+    DEFAULT_RATE_LIMIT_PATH,
+    RateLimiter,
+    async_rate_limited_client,
+    get_rate_limiter,
+    install_rate_limiter,
+    quota_name,
+)
+from .rollout_cache import configure_rollout_cache_env, rollout_cache_from_env, rollout_key
+from .session_store import configure_session_store_env, get_session_db, session_store_from_env
+from .speculation import arun_speculative, get_latency_tracker, run_speculative
+from ..config import TrainingConfig, configure_training_config_env, training_config_from_env
 
 
 logger = logging.getLogger(__name__)
 
 
+def create_model(config: AgentConfig) -> OpenAIChat:
+    """
+    Create the model client used by training agents.
+    
+    Args:
+        config: Agent configuration
+        
+    Returns:
+        OpenAIChat instance
+    """
+    install_cassette_from_env()
+    return OpenAIChat(
+        id=config.model_id,
+        api_key=config.openai_api_key,
+        base_url=config.openai_api_base
+    )
+
+
 def create_agent_with_prompt(
     prompt_template: str,
     config: AgentConfig,
-    db: JsonDb
+    db: Optional[JsonDb],
+    model: Optional[OpenAIChat] = None,
+    session_store: Optional[str] = None
 ) -> Agent:
     """
     Create Agno agent with custom prompt template.
@@ -50,11 +111,15 @@ def create_agent_with_prompt(
     Args:
         prompt_template: Prompt template string
         config: Agent configuration
-        db: Database instance
+        db: Database instance (used by the "json" session store)
+        model: Shared model client (a new one is created if None)
+        session_store: "memory", "none", "sharded" or "json"
+            (default: AGENT_SESSION_STORE, else "json")
         
     Returns:
         Configured Agent instance
     """
+    db = get_session_db(session_store or session_store_from_env(), db)
     # Split prompt template into instructions
     instructions = [
         line.strip() 
@@ -66,11 +131,7 @@ def create_agent_with_prompt(
     tools = getattr(config, 'tools', [])
     
     agent = Agent(
-        model=OpenAIChat(
-            id=config.model_id,
-            api_key=config.openai_api_key,
-            base_url=config.openai_api_base
-        ),
+        model=model or create_model(config),
         tools=tools,
         instructions=instructions,
         db=db,
@@ -84,11 +145,273 @@ def create_agent_with_prompt(
     return agent
 
 
+def get_training_rate_limiter(
+    training_config: TrainingConfig,
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None
+) -> Optional[RateLimiter]:
+    """
+    Get the rate limiter for a provider key, or None if no quota is configured.
+    
+    With rate_limit_shared, every runner process and the APO client draw
+    from the same quota through a shared SQLite file.
+    
+    Args:
+        training_config: Training configuration
+        api_key: Provider API key the quota belongs to
+        base_url: Provider base URL
+        
+    Returns:
+        RateLimiter instance or None
+    """
+    if not (training_config.requests_per_minute or training_config.tokens_per_minute):
+        return None
+    path = None
+    if training_config.rate_limit_shared:
+        path = training_config.rate_limit_path or DEFAULT_RATE_LIMIT_PATH
+    return get_rate_limiter(
+        training_config.requests_per_minute,
+        training_config.tokens_per_minute,
+        training_config.rate_limit_max_retries,
+        path=path,
+        name=quota_name(api_key, base_url)
+    )
+
+
+def provider_credentials(config: Optional[AgentConfig] = None) -> tuple:
+    """
+    API key and base URL of the training provider.
+    
+    Runner processes do not receive the trainer's AgentConfig, so both sides
+    fall back to the same environment variables as training/train.py.
+    
+    Returns:
+        (api_key, base_url)
+    """
+    if config is not None:
+        return config.openai_api_key, config.openai_api_base
+    return (
+        os.getenv("OPENAI_API_KEY_opr") or os.getenv("OPENAI_API_KEY"),
+        os.getenv("OPENAI_API_BASE_URL")
+    )
+
+
+def get_training_grader(
+    training_config: TrainingConfig,
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None
+) -> GraderService:
+    """
+    Get the process-wide grader for the training settings.
+    
+    Built in each runner process from the settings, so the grade cache and
+    grader model configured for training apply to rollouts.
+    
+    Args:
+        training_config: Training configuration
+        api_key: Provider API key
+        base_url: Provider base URL
+        
+    Returns:
+        GraderService instance
+    """
+    return get_grader_service(
+        model_id=training_config.grader_model_id,
+        api_key=api_key,
+        base_url=base_url,
+        max_batch_size=training_config.grader_batch_size,
+        cache_path=(
+            training_config.grade_cache_path or DEFAULT_GRADE_CACHE_PATH
+            if training_config.grade_cache_enabled else None
+        ),
+        cache_max_entries=training_config.grade_cache_max_entries
+    )
+
+
+_agent_pool: Optional[AgentPool] = None
+_agent_pool_lock = threading.Lock()
+
+
+def get_agent_pool(max_size: int = 16) -> AgentPool:
+    """
+    Get the process-wide agent pool used by rollouts.
+    
+    Args:
+        max_size: Maximum number of idle agents kept in the pool
+        
+    Returns:
+        AgentPool instance
+    """
+    global _agent_pool
+    with _agent_pool_lock:
+        if _agent_pool is None:
+            _agent_pool = AgentPool(
+                agent_factory=create_agent_with_prompt,
+                model_factory=create_model,
+                max_size=max_size
+            )
+        return _agent_pool
+
+
+def _prepare_rollout(resources: dict) -> tuple:
+    """
+    Resolve rollout resources and install the process-wide call layers.
+    
+    agentlightning does not pass custom resources to the rollout function,
+    so in runner processes the training settings (rate limits, grader,
+    timeouts) come from AGENT_TRAINING_CONFIG (set by setup_trainer).
+    
+    Returns:
+        (config, db, training_config, grader, adaptive settings or None)
+    """
+    config = resources.get("config") or AgentConfig()
+    db = resources.get("db")
+    training_config = resources.get("training_config") or training_config_from_env()
+    api_key, base_url = provider_credentials(resources.get("config"))
+    grader = resources.get("grader") or get_training_grader(training_config, api_key, base_url)
+    
+    # Throttle every model call (agent + grader) to the provider quota; same
+    # credentials as setup_trainer so runners and APO share one quota name
+    limiter = get_training_rate_limiter(training_config, api_key, base_url)
+    if limiter is not None:
+        install_rate_limiter(limiter)
+    install_cassette_from_env()
+    if training_config.rollout_timeout or training_config.speculative_percentile:
+        install_deadline_transport()
+    
+    adaptive = None
+    if training_config.adaptive_grading:
+        adaptive = AdaptiveGrading(
+            threshold=training_config.grading_threshold,
+            max_samples=training_config.grading_max_samples,
+            confidence=training_config.grading_confidence
+        )
+    return config, db, training_config, grader, adaptive
+
+
+def _lease_agent(
+    prompt_template: str,
+    config: AgentConfig,
+    db: Optional[JsonDb],
+    training_config: TrainingConfig
+):
+    """
+    Get an agent for the prompt template (pooled if enabled).
+    
+    Returns:
+        Context manager yielding the agent (one per run of the rollout)
+    """
+    db = get_session_db(session_store_from_env(training_config.session_store), db)
+    if training_config.use_agent_pool:
+        return get_agent_pool(training_config.agent_pool_size).lease(prompt_template, config, db)
+    return nullcontext(create_agent_with_prompt(
+        prompt_template=prompt_template,
+        config=config,
+        db=db
+    ))
+
+
+def _log_rollout(
+    task: dict,
+    reward: float,
+    grader: GraderService,
+    adaptive: Optional[AdaptiveGrading],
+    training_config: TrainingConfig
+) -> None:
+    samples = grader.sample_counts.get(task["task_id"]) if adaptive else None
+    logger.info(
+        f"Task {task['task_id']}: "
+        f"Q='{task['question'][:50]}...', "
+        f"Reward={reward:.2f}"
+        + (f", Samples={samples}" if samples is not None else "")
+    )
+    if training_config.use_agent_pool:
+        logger.debug(f"Agent pool stats: {get_agent_pool(training_config.agent_pool_size).stats()}")
+    if training_config.speculative_percentile:
+        logger.debug(f"Speculation stats: {_latency_tracker(training_config).stats()}")
+    logger.debug(f"Reward cascade stats: {get_cascade_stats()}")
+    logger.debug(f"Grader stats: {grader.stats()}")
+
+
+def _cached_reward(
+    task: dict,
+    prompt_template: str,
+    config: AgentConfig,
+    training_config: TrainingConfig,
+    rollout: Optional[object]
+) -> tuple:
+    """
+    Look up the reward of an identical earlier rollout.
+    
+    Only validation/test rollouts are served from the cache: APO builds its
+    critiques from the spans of training rollouts, so those always run.
+    
+    Returns:
+        (rollout cache or None, cache key, cached reward or None)
+    """
+    cache = rollout_cache_from_env(
+        training_config.rollout_cache_policy, training_config.rollout_cache_path
+    )
+    if cache is None:
+        return None, None, None
+    key = rollout_key(
+        prompt_template, task["task_id"], config.model_id,
+        _tool_names(getattr(config, "tools", None))
+    )
+    if getattr(rollout, "mode", None) == "train":
+        return cache, key, None
+    reward = cache.get(key)
+    if reward is not None:
+        logger.info(
+            f"Task {task['task_id']}: Reward={reward:.2f} (cached, "
+            f"{cache.hits} rollouts saved)"
+        )
+    return cache, key, reward
+
+
+def _timeout_reward(task: dict, training_config: TrainingConfig, error: Exception) -> float:
+    """Reward of a rollout that ran out of time, marked with a "timeout" status."""
+    reward = training_config.timeout_reward
+    logger.warning(
+        f"Task {task['task_id']}: Status=timeout ({error}), Reward={reward:.2f}"
+    )
+    if AGENT_LIGHTNING_AVAILABLE:
+        try:
+            agl.emit_object(
+                {"status": "timeout", "task_id": task["task_id"], "budget": training_config.rollout_timeout}
+            )
+        except Exception as e:
+            logger.debug(f"Could not emit timeout status: {e}")
+    logger.debug(f"Deadline stats: {get_deadline_stats()}")
+    return reward
+
+
+def _mark_backup_won(task: dict) -> None:
+    """
+    Mark a rollout whose untraced backup run finished first.
+
+    The spans already in its trace belong to the cancelled first run, whose
+    result was not used.
+    """
+    if not AGENT_LIGHTNING_AVAILABLE:
+        return
+    try:
+        agl.emit_object({"status": "speculative_backup_won", "task_id": task["task_id"]})
+    except Exception as e:
+        logger.debug(f"Could not emit speculation status: {e}")
+
+
+def _latency_tracker(training_config: TrainingConfig):
+    """Process-wide latency tracker for speculative re-execution."""
+    return get_latency_tracker(training_config.speculative_window, training_config.speculative_min_samples)
+
+
 if AGENT_LIGHTNING_AVAILABLE:
     @agl.rollout
     def agno_agent_rollout(
         task: dict,
         prompt_template: agl.PromptTemplate,
+        rollout: Optional[agl.Rollout] = None,
         **resources
     ) -> float:
         """
@@ -100,53 +423,124 @@ if AGENT_LIGHTNING_AVAILABLE:
         Args:
             task: Training task to solve
             prompt_template: Prompt template from Agent Lightning
+            rollout: Rollout metadata (mode) from Agent Lightning
             config: Agent configuration
             db: Database instance
-            training_config: Training configuration
+            training_config: Training configuration (default: AGENT_TRAINING_CONFIG)
+            grader: GraderService (default: built from the training settings)
             
         Returns:
             Reward value (0.0 to 1.0)
         """
-        # Extract resources
-        config = resources.get("config")
-        db = resources.get("db")
-        training_config = resources.get("training_config")
+        config, db, training_config, grader, adaptive = _prepare_rollout(resources)
+        cache, cache_key, cached = _cached_reward(
+            task, getattr(prompt_template, "template", str(prompt_template)),
+            config, training_config, rollout
+        )
+        if cached is not None:
+            return cached
+        def run_task() -> float:
+            # Run agent on the task, then grade the response
+            with _lease_agent(str(prompt_template), config, db, training_config) as agent:
+                response = agent.run(task["question"])
+                return calculate_reward(
+                    agent_response=response.content,
+                    question=task["question"],
+                    use_llm_grader=training_config.use_llm_grader,
+                    grader=grader,
+                    local_verification=training_config.use_local_verification,
+                    tolerance=training_config.reward_tolerance,
+                    adaptive=adaptive,
+                    task_id=task["task_id"]
+                )
+        
+        try:
+            if training_config.speculative_percentile:
+                reward = run_speculative(
+                    run_task, Deadline(training_config.rollout_timeout),
+                    _latency_tracker(training_config), training_config.speculative_percentile,
+                    on_backup_won=lambda: _mark_backup_won(task)
+                )
+            elif training_config.rollout_timeout:
+                reward = run_with_deadline(run_task, Deadline(training_config.rollout_timeout))
+            else:
+                reward = run_task()
+        except RolloutTimeout as e:
+            return _timeout_reward(task, training_config, e)
+        except Exception as e:
+            logger.error(f"Error in rollout for task {task['task_id']}: {e}")
+            return 0.0
+        
+        _log_rollout(task, reward, grader, adaptive, training_config)
+        if cache is not None:
+            cache.set(cache_key, reward)
+        return reward
+
+    @agl.rollout
+    async def agno_agent_rollout_async(
+        task: dict,
+        prompt_template: agl.PromptTemplate,
+        rollout: Optional[agl.Rollout] = None,
+        **resources
+    ) -> float:
+        """
+        Async-native rollout function for Agent Lightning.
         
-        # Use defaults if not provided
-        if config is None:
-            config = AgentConfig()
-        if training_config is None:
-            training_config = TrainingConfig()
+        Same as agno_agent_rollout(), but the agent run (model and tool turns)
+        and the grader calls are awaited, so the runner's event loop stays free
+        while the rollout waits on the provider.
         
-        # Create agent with the provided prompt template
-        agent = create_agent_with_prompt(
-            prompt_template=str(prompt_template),
-            config=config,
-            db=db
+        Args:
+            task: Training task to solve
+            prompt_template: Prompt template from Agent Lightning
+            rollout: Rollout metadata (mode) from Agent Lightning
+            **resources: Same resources as agno_agent_rollout()
+            
+        Returns:
+            Reward value (0.0 to 1.0)
+        """
+        config, db, training_config, grader, adaptive = _prepare_rollout(resources)
+        cache, cache_key, cached = _cached_reward(
+            task, getattr(prompt_template, "template", str(prompt_template)),
+            config, training_config, rollout
         )
+        if cached is not None:
+            return cached
+        async def run_task() -> float:
+            with _lease_agent(str(prompt_template), config, db, training_config) as agent:
+                response = await agent.arun(task["question"])
+                return await acalculate_reward(
+                    agent_response=response.content,
+                    question=task["question"],
+                    use_llm_grader=training_config.use_llm_grader,
+                    grader=grader,
+                    local_verification=training_config.use_local_verification,
+                    tolerance=training_config.reward_tolerance,
+                    adaptive=adaptive,
+                    task_id=task["task_id"]
+                )
         
-        # Run agent on the task
         try:
-            response = agent.run(task["question"])
-            
-            # Calculate reward
-            reward = calculate_reward(
-                agent_response=response.content,
-                question=task["question"],
-                use_llm_grader=training_config.use_llm_grader
-            )
-            
-            logger.info(
-                f"Task {task['task_id']}: "
-                f"Q='{task['question'][:50]}...', "
-                f"Reward={reward:.2f}"
-            )
-            
-            return reward
-            
+            if training_config.speculative_percentile:
+                reward = await arun_speculative(
+                    run_task, Deadline(training_config.rollout_timeout),
+                    _latency_tracker(training_config), training_config.speculative_percentile,
+                    on_backup_won=lambda: _mark_backup_won(task)
+                )
+            elif training_config.rollout_timeout:
+                reward = await arun_with_deadline(run_task, Deadline(training_config.rollout_timeout))
+            else:
+                reward = await run_task()
+        except RolloutTimeout as e:
+            return _timeout_reward(task, training_config, e)
         except Exception as e:
             logger.error(f"Error in rollout for task {task['task_id']}: {e}")
             return 0.0
+        
+        _log_rollout(task, reward, grader, adaptive, training_config)
+        if cache is not None:
+            cache.set(cache_key, reward)
+        return reward
 else:
     # Fallback if Agent Lightning not available
     def agno_agent_rollout(*args, **kwargs) -> float:
@@ -154,6 +548,26 @@ else:
         logger.error("Agent Lightning not installed. Cannot run rollout.")
         return 0.0
 
+    async def agno_agent_rollout_async(*args, **kwargs) -> float:
+        """Fallback async rollout function."""
+        logger.error("Agent Lightning not installed. Cannot run rollout.")
+        return 0.0
+
+
+def get_rollout_function(training_config: Optional[TrainingConfig] = None):
+    """
+    Get the rollout function selected by the training configuration.
+    
+    Args:
+        training_config: Training configuration
+        
+    Returns:
+        agno_agent_rollout_async if async_rollout is enabled, else agno_agent_rollout
+    """
+    if training_config is not None and training_config.async_rollout:
+        return agno_agent_rollout_async
+    return agno_agent_rollout
+
 
 def setup_trainer(
     initial_prompt: str,
@@ -182,22 +596,49 @@ def setup_trainer(
     
     # Create AsyncOpenAI client for APO algorithm
     from openai import AsyncOpenAI
-    import os
     
     # Use config from argument if available, else from env
-    api_key = config.openai_api_key if config else os.getenv("OPENAI_API_KEY_opr") or os.getenv("OPENAI_API_KEY")
-    base_url = config.openai_api_base if config else os.getenv("OPENAI_API_BASE_URL")
+    api_key, base_url = provider_credentials(config)
 
+    # Record/replay LLM calls here and in the runner processes (they inherit the env)
+    settings = training_config or TrainingConfig()
+    configure_training_config_env(settings)
+    configure_cassette_env(settings.cassette_mode, settings.cassette_path, settings.cassette_latency)
+    cassette = install_cassette_from_env()
+    
+    # One run id for every runner, so the "run" cache policy spans the whole run
+    run_id = configure_rollout_cache_env(settings.rollout_cache_policy, settings.rollout_cache_path)
+    logger.info(f"Rollout cache: {settings.rollout_cache_policy} (run {run_id})")
+    configure_session_store_env(settings.session_store, settings.session_shard_dir)
+    
+    # Gradient/edit calls draw from the same quota as the rollouts
+    limiter = get_training_rate_limiter(settings, api_key, base_url)
+    http_client = async_rate_limited_client(limiter) if limiter else None
+    if cassette is not None:
+        http_client = async_cassette_client(cassette, http_client)
     async_client = AsyncOpenAI(
         api_key=api_key,
-        base_url=base_url
+        base_url=base_url,
+        http_client=http_client
     )
     
     # Choose algorithm
     if algorithm_type == "apo":
         # APO Configuration with tuned hyperparameters
         # Based on agentlightning documentation best practices
-        algo = APO(
+        # "halving": score candidates on a growing random subset of the val batch
+        apo_class, apo_extra = APO, {}
+        if settings.apo_eval_mode == "halving":
+            # SuccessiveHalvingAPO overrides APO internals; fall back if they changed
+            problem = check_apo_compat()
+            if problem is None:
+                apo_class = SuccessiveHalvingAPO
+                apo_extra = {"halving_min_tasks": settings.halving_min_tasks}
+            else:
+                logger.error(f"Successive halving disabled, evaluating on the full val batch: {problem}")
+        elif settings.apo_eval_mode != "full":
+            raise ValueError(f"Unknown APO eval mode '{settings.apo_eval_mode}', expected 'full' or 'halving'")
+        algo = apo_class(
             async_openai_client=async_client,
             # Model configuration (override defaults which are invalid)
             gradient_model="gpt-4o-mini",      # For computing textual gradients/critiques
@@ -216,6 +657,7 @@ def setup_trainer(
             diversity_temperature=1.0,          # Temperature for diversity in generation
             rollout_batch_timeout=3600.0,       # Max wait time for rollout completion (seconds)
             run_initial_validation=True,        # Establish baseline before optimization
+            **apo_extra
         )
 
     prompt_resource = agl.PromptTemplate(
@@ -226,8 +668,7 @@ def setup_trainer(
     resources = {
         "main_prompt": prompt_resource,
         "config": config,
-        "db": db,
-        "training_config": training_config
+        "db": db
     }
 
     store = None
@@ -0,0 +1,199 @@
+"""
+Rollout cache module cho training.
+
+Module này cache reward của cả một rollout (agent run + grader):
+- Key là hash của prompt template (đã chuẩn hóa), task_id, model id và tool set
+- Policy "always": dùng lại reward giữa các lần chạy; "run": chỉ trong cùng
+  một lần training; "off": tắt
+- Lưu trong SQLite nên các runner process dùng chung
+- Thống kê số rollout đã tiết kiệm được
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Union
+
+
+logger = logging.getLogger(__name__)
+
+ROLLOUT_CACHE_POLICIES = ("always", "run", "off")
+ROLLOUT_CACHE_POLICY_ENV = "AGENT_ROLLOUT_CACHE_POLICY"
+ROLLOUT_CACHE_PATH_ENV = "AGENT_ROLLOUT_CACHE_PATH"
+RUN_ID_ENV = "AGENT_RUN_ID"
+DEFAULT_ROLLOUT_CACHE_PATH = Path(__file__).parent.parent / "utils" / "rollout_cache.sqlite"
+
+
+def normalize_prompt(prompt_template: str) -> str:
+    """Chuẩn hóa prompt: bỏ khoảng trắng thừa ở mỗi dòng và các dòng trống."""
+    lines = (re.sub(r"[ \t]+", " ", line).strip() for line in prompt_template.strip().splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def rollout_key(prompt_template: str, task_id: str, model_id: str, tools: Sequence[str] = ()) -> str:
+    """Key của rollout từ prompt đã chuẩn hóa, task_id, model id và tool set."""
+    prompt_hash = hashlib.sha256(normalize_prompt(prompt_template).encode("utf-8")).hexdigest()
+    payload = json.dumps([prompt_hash, str(task_id), model_id, sorted(tools)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RolloutCache:
+    """Cache reward của rollout, lưu trong SQLite."""
+
+    def __init__(self, path: Union[str, Path], policy: str = "run", run_id: Optional[str] = None):
+        """
+        Khởi tạo cache.
+
+        Args:
+            path: Đường dẫn file SQLite
+            policy: "always", "run" hoặc "off"
+            run_id: Id của lần training hiện tại (policy "run")
+        """
+        if policy not in ROLLOUT_CACHE_POLICIES:
+            raise ValueError(f"Unknown rollout cache policy '{policy}', expected one of {ROLLOUT_CACHE_POLICIES}")
+        self.path = Path(path)
+        self.policy = policy
+        self.run_id = run_id or uuid.uuid4().hex
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.path),
+            timeout=5.0,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rollouts ("
+            "key TEXT NOT NULL, run_id TEXT NOT NULL, reward REAL NOT NULL, "
+            "created_at REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0, "
+            "PRIMARY KEY (key, run_id))"
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.policy != "off"
+
+    def get(self, key: str) -> Optional[float]:
+        """Lấy reward đã cache theo policy, None nếu chưa có."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            if self.policy == "run":
+                row = self._conn.execute(
+                    "SELECT reward, run_id FROM rollouts WHERE key = ? AND run_id = ?", (key, self.run_id)
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT reward, run_id FROM rollouts WHERE key = ? ORDER BY created_at DESC LIMIT 1", (key,)
+                ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            # Đếm trong file để process chính thấy số rollout tiết kiệm của mọi runner
+            self._conn.execute(
+                "UPDATE rollouts SET hits = hits + 1 WHERE key = ? AND run_id = ?", (key, row[1])
+            )
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, reward: float) -> None:
+        """Lưu reward của một rollout hoàn tất."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rollouts (key, run_id, reward, created_at, hits) "
+                "VALUES (?, ?, ?, ?, COALESCE((SELECT hits FROM rollouts WHERE key = ? AND run_id = ?), 0))",
+                (key, self.run_id, reward, time.time(), key, self.run_id),
+            )
+            self.stored += 1
+
+    def clear(self) -> None:
+        """Xóa toàn bộ cache."""
+        with self._lock:
+            self._conn.execute("DELETE FROM rollouts")
+
+    def saved(self, run_id: Optional[str] = None) -> int:
+        """Số rollout đã tiết kiệm (mọi process) trong một run, mặc định là run hiện tại."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(hits), 0) FROM rollouts WHERE run_id = ?", (run_id or self.run_id,)
+            ).fetchone()
+        return row[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê cache; hits là số rollout process này đã tiết kiệm."""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM rollouts").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "policy": self.policy,
+            "entries": count,
+            "rollouts_saved": self.hits,
+            "misses": self.misses,
+            "stored": self.stored,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_caches: Dict[tuple, RolloutCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_rollout_cache(
+    path: Union[str, Path] = DEFAULT_ROLLOUT_CACHE_PATH,
+    policy: str = "run",
+    run_id: Optional[str] = None
+) -> RolloutCache:
+    """Lấy RolloutCache dùng chung trong process cho một file, policy và run."""
+    key = (str(Path(path).absolute()), policy, run_id)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = RolloutCache(path, policy, run_id)
+            _caches[key] = cache
+        return cache
+
+
+def configure_rollout_cache_env(
+    policy: Optional[str],
+    path: Optional[Union[str, Path]] = None,
+    run_id: Optional[str] = None
+) -> str:
+    """
+    Cấu hình rollout cache cho process hiện tại và các runner process con.
+
+    Returns:
+        Run id của lần training này
+    """
+    run_id = run_id or os.getenv(RUN_ID_ENV) or uuid.uuid4().hex
+    os.environ[RUN_ID_ENV] = run_id
+    if policy:
+        os.environ[ROLLOUT_CACHE_POLICY_ENV] = policy
+        os.environ[ROLLOUT_CACHE_PATH_ENV] = str(path or DEFAULT_ROLLOUT_CACHE_PATH)
+    return run_id
+
+
+def rollout_cache_from_env(
+    default_policy: str = "off",
+    default_path: Optional[Union[str, Path]] = None
+) -> Optional[RolloutCache]:
+    """RolloutCache theo AGENT_ROLLOUT_CACHE_POLICY / _PATH và AGENT_RUN_ID, None nếu tắt."""
+    policy = os.getenv(ROLLOUT_CACHE_POLICY_ENV, "").strip().lower() or default_policy
+    if policy == "off":
+        return None
+    path = os.getenv(ROLLOUT_CACHE_PATH_ENV) or default_path or DEFAULT_ROLLOUT_CACHE_PATH
+    return get_rollout_cache(path, policy, os.getenv(RUN_ID_ENV) or None)
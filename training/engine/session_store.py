@@ -0,0 +1,144 @@
+"""
+Session store module cho training.
+
+Rollout không cần lịch sử hội thoại (add_history_to_context=False), nên không
+cần ghi session vào JsonDb dùng chung. Module này cung cấp các backend nhẹ:
+- "memory": InMemoryDb trong process, chỉ giữ vài run gần nhất mỗi session
+- "none": không lưu session (agent chạy không có db)
+- "sharded": ghi nối tiếp (append-only) mỗi run thành một dòng JSONL,
+  mỗi runner process một file riêng nên không tranh chấp lock
+- "json": dùng db được truyền vào (JsonDb, hành vi cũ)
+Trace vẫn được gửi tới Lightning store qua OpenTelemetry, không phụ thuộc db.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from agno.db.base import BaseDb
+from agno.db.in_memory import InMemoryDb
+
+from .rollout_cache import RUN_ID_ENV
+
+
+logger = logging.getLogger(__name__)
+
+SESSION_STORES = ("memory", "none", "sharded", "json")
+SESSION_STORE_ENV = "AGENT_SESSION_STORE"
+SESSION_SHARD_DIR_ENV = "AGENT_SESSION_SHARD_DIR"
+DEFAULT_SESSION_SHARD_DIR = Path(__file__).parent.parent / "utils" / "sessions"
+
+
+class EphemeralSessionDb(InMemoryDb):
+    """InMemoryDb chỉ giữ max_runs run gần nhất của mỗi session."""
+
+    def __init__(self, max_runs: int = 8):
+        super().__init__()
+        self.max_runs = max_runs
+
+    def upsert_session(self, session: Any, deserialize: Optional[bool] = True) -> Any:
+        runs = getattr(session, "runs", None)
+        if runs and len(runs) > self.max_runs:
+            session.runs = runs[-self.max_runs:]
+        return super().upsert_session(session, deserialize=deserialize)
+
+
+class ShardedSessionLog(InMemoryDb):
+    """
+    Ghi run mới nhất của mỗi session vào file JSONL riêng của runner process.
+
+    Không giữ session trong bộ nhớ và không đọc lại: mỗi rollout bắt đầu
+    với session mới, file chỉ dùng để xem lại sau training.
+    """
+
+    def __init__(self, shard_dir: Union[str, Path] = DEFAULT_SESSION_SHARD_DIR, run_id: Optional[str] = None):
+        super().__init__()
+        self.shard_dir = Path(shard_dir)
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        prefix = f"{run_id}-" if run_id else ""
+        self.path = self.shard_dir / f"sessions-{prefix}{os.getpid()}.jsonl"
+        self._lock = threading.Lock()
+        self._file = None
+        self.written = 0
+
+    def upsert_session(self, session: Any, deserialize: Optional[bool] = True) -> Any:
+        runs = getattr(session, "runs", None) or []
+        if runs:
+            run = runs[-1]
+            record = {
+                "session_id": getattr(session, "session_id", None),
+                "agent_id": getattr(session, "agent_id", None),
+                "user_id": getattr(session, "user_id", None),
+                "written_at": time.time(),
+                "run": run.to_dict() if hasattr(run, "to_dict") else run,
+            }
+            line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+            with self._lock:
+                if self._file is None:
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write(line)
+                self._file.flush()
+                self.written += 1
+        return session if deserialize else session.to_dict()
+
+    def upsert_sessions(self, sessions: Any, deserialize: Optional[bool] = True, preserve_updated_at: bool = False) -> Any:
+        return [self.upsert_session(session, deserialize) for session in sessions if session is not None]
+
+
+_session_dbs: Dict[tuple, BaseDb] = {}
+_session_dbs_lock = threading.Lock()
+
+
+def get_session_db(
+    kind: str,
+    db: Optional[BaseDb] = None,
+    shard_dir: Optional[Union[str, Path]] = None
+) -> Optional[BaseDb]:
+    """
+    Lấy db cho agent training theo loại session store.
+
+    Args:
+        kind: "memory", "none", "sharded" hoặc "json"
+        db: Db dùng khi kind là "json"
+        shard_dir: Thư mục file JSONL cho "sharded"
+
+    Returns:
+        Db dùng chung trong process (None với "none")
+    """
+    if kind not in SESSION_STORES:
+        raise ValueError(f"Unknown session store '{kind}', expected one of {SESSION_STORES}")
+    if kind == "json":
+        return db
+    if kind == "none":
+        return None
+
+    shard_dir = shard_dir or os.getenv(SESSION_SHARD_DIR_ENV) or DEFAULT_SESSION_SHARD_DIR
+    key = (kind, str(Path(shard_dir).absolute()) if kind == "sharded" else None)
+    with _session_dbs_lock:
+        session_db = _session_dbs.get(key)
+        if session_db is None:
+            if kind == "memory":
+                session_db = EphemeralSessionDb()
+            else:
+                session_db = ShardedSessionLog(shard_dir, run_id=os.getenv(RUN_ID_ENV))
+                logger.info(f"Writing training sessions to {session_db.path}")
+            _session_dbs[key] = session_db
+        return session_db
+
+
+def configure_session_store_env(kind: Optional[str], shard_dir: Optional[Union[str, Path]] = None) -> None:
+    """Chọn session store cho process hiện tại và các runner process con."""
+    if not kind:
+        return
+    os.environ[SESSION_STORE_ENV] = kind
+    if shard_dir:
+        os.environ[SESSION_SHARD_DIR_ENV] = str(shard_dir)
+
+
+def session_store_from_env(default: str = "json") -> str:
+    """Loại session store theo AGENT_SESSION_STORE, hoặc default."""
+    return os.getenv(SESSION_STORE_ENV, "").strip().lower() or default
@@ -0,0 +1,273 @@
+"""
+Speculative execution module cho training rollouts.
+
+Latency của rollout có đuôi dài: một batch chỉ xong khi rollout chậm nhất xong.
+Module này giảm ảnh hưởng của rollout chậm bất thường (straggler):
+- LatencyTracker giữ phân phối latency của các rollout gần nhất trong process
+- Rollout chạy quá percentile đã cấu hình được chạy thêm một bản sao
+- Lần chạy nào xong trước được dùng, lần còn lại bị hủy qua Deadline riêng
+  (model call kế tiếp của nó dừng ngay)
+- Bản sao chạy với instrumentation (OpenTelemetry) bị tắt, nên trace của một
+  rollout chỉ có span của một lần chạy
+- Latency ghi vào tracker tính từ lần chạy đầu tiên (latency thật của rollout)
+- Thống kê số bản sao đã chạy và số lần bản sao thắng
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, TypeVar
+
+try:
+    from opentelemetry import context as otel_context
+except ImportError:
+    otel_context = None
+
+from .deadline import Deadline, RolloutTimeout, _count, deadline_scope, discard_result, start_in_thread
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Latency (giây) của các rollout gần nhất, dùng chung giữa các thread."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """
+        Khởi tạo tracker.
+
+        Args:
+            window: Số rollout gần nhất được giữ lại
+            min_samples: Số mẫu tối thiểu trước khi chạy bản sao
+        """
+        self.min_samples = min_samples
+        self._latencies: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+        self.speculated = 0
+        self.backup_wins = 0
+
+    def record(self, seconds: float) -> None:
+        """Ghi latency của một rollout hoàn tất."""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """Latency tại percentile (0-100), None nếu chưa đủ mẫu."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        rank = min(len(latencies) - 1, max(0, round(percentile / 100 * len(latencies)) - 1))
+        return latencies[rank]
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê latency và số bản sao đã chạy."""
+        with self._lock:
+            samples = len(self._latencies)
+            speculated, backup_wins = self.speculated, self.backup_wins
+        return {
+            "samples": samples,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "speculated": speculated,
+            "backup_wins": backup_wins,
+        }
+
+    def count_backup(self, won: bool = False) -> None:
+        """Đếm một bản sao được chạy, hoặc một lần bản sao xong trước (won)."""
+        with self._lock:
+            if won:
+                self.backup_wins += 1
+            else:
+                self.speculated += 1
+
+
+_trackers: Dict[tuple, LatencyTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def get_latency_tracker(window: int = 200, min_samples: int = 20) -> LatencyTracker:
+    """Lấy LatencyTracker dùng chung trong process."""
+    key = (window, min_samples)
+    with _trackers_lock:
+        tracker = _trackers.get(key)
+        if tracker is None:
+            tracker = LatencyTracker(window, min_samples)
+            _trackers[key] = tracker
+        return tracker
+
+
+@contextmanager
+def _untraced() -> Iterator[None]:
+    """Tắt instrumentation cho thread/task được tạo trong khối with."""
+    if otel_context is None:
+        yield
+        return
+    token = otel_context.attach(
+        otel_context.set_value(otel_context._SUPPRESS_INSTRUMENTATION_KEY, True)
+    )
+    try:
+        yield
+    finally:
+        otel_context.detach(token)
+
+
+def _timeout_error(deadline: Deadline) -> RolloutTimeout:
+    _count("timeouts")
+    return RolloutTimeout(f"Rollout exceeded its {deadline.budget:g}s budget")
+
+
+def _wait_timeout(deadline: Deadline, limit: Optional[float] = None) -> Optional[float]:
+    """Thời gian chờ: tới limit nhưng không quá deadline."""
+    remaining = deadline.wait_timeout()
+    if limit is None:
+        return remaining
+    return limit if remaining is None else min(limit, remaining)
+
+
+def run_speculative(
+    fn: Callable[[], T],
+    deadline: Deadline,
+    tracker: LatencyTracker,
+    percentile: float,
+    on_backup_won: Optional[Callable[[], None]] = None
+) -> T:
+    """
+    Chạy fn(); nếu chạy quá percentile latency thì chạy thêm một bản sao.
+
+    Mỗi lần chạy có Deadline riêng (cùng thời hạn với deadline), nên lần
+    thua bị hủy mà không ảnh hưởng lần thắng. Bản sao không được trace;
+    nếu bản sao thắng, span trong trace là của lần chạy đầu đã bị hủy.
+
+    Args:
+        fn: Rollout (agent run + grader), chạy được nhiều lần song song
+        deadline: Deadline của cả rollout (Deadline(None) = không giới hạn)
+        tracker: LatencyTracker của process
+        percentile: Percentile latency (0-100) để chạy bản sao
+        on_backup_won: Gọi (trong thread của caller) khi bản sao xong trước,
+            ví dụ để đánh dấu trace của rollout
+
+    Raises:
+        RolloutTimeout: Hết thời gian của deadline
+    """
+    attempts: Dict[concurrent.futures.Future, Deadline] = {}
+    if deadline.budget is not None:
+        _count("rollouts")
+    started = time.monotonic()
+
+    def launch() -> None:
+        attempt_deadline = deadline.split()
+        attempts[start_in_thread(fn, attempt_deadline)] = attempt_deadline
+
+    def cancel_all() -> None:
+        for attempt_deadline in attempts.values():
+            attempt_deadline.cancel()
+
+    launch()
+    threshold = tracker.percentile(percentile)
+    if threshold is not None:
+        done, _ = concurrent.futures.wait(attempts, timeout=_wait_timeout(deadline, threshold))
+        if not done and not deadline.expired:
+            logger.debug(f"Rollout slower than p{percentile:g} ({threshold:.2f}s), starting a backup")
+            tracker.count_backup()
+            with _untraced():
+                launch()
+
+    pending: List[concurrent.futures.Future] = list(attempts)
+    error: Optional[BaseException] = None
+    while pending:
+        done, _ = concurrent.futures.wait(
+            pending, timeout=_wait_timeout(deadline), return_when=concurrent.futures.FIRST_COMPLETED
+        )
+        if not done:
+            cancel_all()
+            raise _timeout_error(deadline)
+        for future in done:
+            pending.remove(future)
+            if future.exception() is not None:
+                # Lần này lỗi: chờ lần còn lại (nếu có)
+                error = future.exception()
+                continue
+            cancel_all()
+            if deadline.expired:
+                raise _timeout_error(deadline)
+            tracker.record(time.monotonic() - started)
+            if future is not next(iter(attempts)):
+                tracker.count_backup(won=True)
+                if on_backup_won is not None:
+                    on_backup_won()
+            return future.result()
+    raise error
+
+
+async def arun_speculative(
+    fn: Callable[[], Awaitable[T]],
+    deadline: Deadline,
+    tracker: LatencyTracker,
+    percentile: float,
+    on_backup_won: Optional[Callable[[], None]] = None
+) -> T:
+    """
+    Bản async của run_speculative(): mỗi lần chạy là một task, lần thua bị cancel.
+
+    Raises:
+        RolloutTimeout: Hết thời gian của deadline
+    """
+    attempts: Dict[asyncio.Future, Deadline] = {}
+    if deadline.budget is not None:
+        _count("rollouts")
+    started = time.monotonic()
+
+    def launch() -> None:
+        attempt_deadline = deadline.split()
+        with deadline_scope(attempt_deadline):
+            task = asyncio.ensure_future(fn())
+        attempts[task] = attempt_deadline
+
+    def cancel_all() -> None:
+        for task, attempt_deadline in attempts.items():
+            attempt_deadline.cancel()
+            if not task.done():
+                task.cancel()
+                task.add_done_callback(discard_result)
+
+    launch()
+    threshold = tracker.percentile(percentile)
+    if threshold is not None:
+        done, _ = await asyncio.wait(set(attempts), timeout=_wait_timeout(deadline, threshold))
+        if not done and not deadline.expired:
+            logger.debug(f"Rollout slower than p{percentile:g} ({threshold:.2f}s), starting a backup")
+            tracker.count_backup()
+            with _untraced():
+                launch()
+
+    pending = set(attempts)
+    error: Optional[BaseException] = None
+    while pending:
+        done, pending = await asyncio.wait(
+            pending, timeout=_wait_timeout(deadline), return_when=asyncio.FIRST_COMPLETED
+        )
+        if not done:
+            cancel_all()
+            raise _timeout_error(deadline)
+        for task in done:
+            if task.exception() is not None:
+                error = task.exception()
+                continue
+            cancel_all()
+            if deadline.expired:
+                raise _timeout_error(deadline)
+            tracker.record(time.monotonic() - started)
+            if task is not next(iter(attempts)):
+                tracker.count_backup(won=True)
+                if on_backup_won is not None:
+                    on_backup_won()
+            return task.result()
+    raise error
@@ -0,0 +1,142 @@
+"""
+Local reward verifier module.
+
+Module này chấm response cho các câu hỏi tính toán mà không cần LLM:
+- Dùng IntentRouter để nhận ra bài toán và tính đáp án bằng core/tools.py
+- Chỉ chấm khi câu hỏi được nhận ra rõ ràng (RouteResult.explicit)
+- Đọc đáp án cuối của response (hỗ trợ 1,000 / 1.000 / 2,5) và so với đáp án
+- Trả về None khi không kết luận được để grader LLM chấm
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Set
+
+from core.router import IntentRouter
+
+
+_RESPONSE_NUMBER_RE = re.compile(r"-?\d{1,3}(?:[.,]\d{3})+(?:[.,]\d+)?|-?\d+(?:[.,]\d+)?")
+_MATCH_REL_TOL = 1e-4  # Covers pi approximations (3.14159 vs math.pi)
+
+_NUMBER = r"(-?\d{1,3}(?:[.,]\d{3})+(?:[.,]\d+)?|-?\d+(?:[.,]\d+)?)"
+# Số ngay sau "đáp án"/"final answer"/..., hoặc sau "=", "là", "is" (lấy lần cuối)
+_ANSWER_MARKER_RE = re.compile(
+    rf"(?:final answer|answer|đáp án|đáp số|kết quả|result)\s*(?:is|là|:|=)?\s*[*_$]*\s*{_NUMBER}",
+    re.IGNORECASE,
+)
+_EQUALS_RE = re.compile(rf"(?:=|\bis\b|\blà\b|\bbằng\b)\s*[*_$]*\s*{_NUMBER}", re.IGNORECASE)
+
+
+@dataclass
+class Verdict:
+    """Kết quả chấm local."""
+    score: Optional[float]
+    intent: Optional[str] = None
+    expected: Optional[float] = None
+    answer: Optional[float] = None
+
+
+def _interpretations(token: str) -> Set[float]:
+    """Các cách đọc một số: dấu . và , có thể là phân cách hàng nghìn hoặc thập phân."""
+    values: Set[float] = set()
+    plain = re.sub(r"[.,]", "", token)
+    try:
+        values.add(float(plain))
+    except ValueError:
+        pass
+    for decimal_sep in (".", ","):
+        if decimal_sep not in token:
+            continue
+        head, _, tail = token.rpartition(decimal_sep)
+        try:
+            values.add(float(re.sub(r"[.,]", "", head) + "." + tail))
+        except ValueError:
+            pass
+    return values
+
+
+def _decimals(token: str) -> int:
+    match = re.search(r"[.,](\d+)$", token)
+    return len(match.group(1)) if match else 0
+
+
+def _final_answer(response: str, tokens: List[str]) -> Optional[str]:
+    """
+    Đáp án cuối của response, None nếu không xác định được.
+
+    Ưu tiên số sau "đáp án"/"final answer", rồi số sau "=" / "là" / "is" cuối
+    cùng; nếu không có dấu hiệu nào thì chỉ chấp nhận khi response có đúng
+    một giá trị số.
+    """
+    for pattern in (_ANSWER_MARKER_RE, _EQUALS_RE):
+        matches = pattern.findall(response)
+        if matches:
+            return matches[-1]
+    values = {frozenset(_interpretations(token)) for token in tokens}
+    return tokens[-1] if len(values) == 1 else None
+
+
+def _matches(value: float, token: str, expected: float) -> bool:
+    # Chấp nhận đáp án đã làm tròn tới số chữ số thập phân mà response hiển thị
+    rounding = 0.5 * 10 ** -_decimals(token) if _decimals(token) <= 3 else 0.0
+    return (
+        abs(value - expected) <= rounding + 1e-9
+        or abs(value - expected) <= _MATCH_REL_TOL * abs(expected)
+    )
+
+
+class LocalVerifier:
+    """Chấm response bằng đáp án tính local cho các câu hỏi router nhận ra."""
+
+    def __init__(self, tolerance: float = 0.1, min_confidence: float = 1.0):
+        """
+        Khởi tạo verifier.
+
+        Args:
+            tolerance: Sai số tương đối tối thiểu để kết luận đáp án sai;
+                sai số nhỏ hơn (nhưng không khớp) được chuyển cho LLM grader
+            min_confidence: Độ tin cậy tối thiểu của router để dùng đáp án local
+        """
+        self.tolerance = tolerance
+        self.router = IntentRouter(min_confidence=min_confidence)
+
+    def verify(self, agent_response: str, question: str) -> Verdict:
+        """
+        Chấm response.
+
+        Returns:
+            Verdict với score 1.0 (đáp án cuối đúng), 0.0 (đáp án cuối sai rõ ràng)
+            hoặc None (không kết luận được)
+        """
+        route = self.router.classify(question)
+        # Câu hỏi có từ router không hiểu có thể là bài toán khác: để LLM chấm
+        if route is None or route.confidence < self.router.min_confidence or not route.explicit:
+            return Verdict(None)
+        try:
+            expected = float(route.result)
+        except (TypeError, ValueError, OverflowError):
+            return Verdict(None, route.intent)
+        if not math.isfinite(expected):
+            return Verdict(None, route.intent)
+
+        tokens: List[str] = _RESPONSE_NUMBER_RE.findall(agent_response or "")
+        if not tokens:
+            return Verdict(None, route.intent, expected)
+
+        final = _final_answer(agent_response, tokens)
+        if final is None:
+            return Verdict(None, route.intent, expected)
+        candidates = _interpretations(final)
+        if any(_matches(value, final, expected) for value in candidates):
+            return Verdict(1.0, route.intent, expected, min(candidates, key=lambda v: abs(v - expected)))
+
+        # Đúng ở giữa bài nhưng kết luận khác, hoặc chỉ lệch ít: để LLM chấm
+        for token in tokens:
+            if token != final and any(_matches(value, token, expected) for value in _interpretations(token)):
+                return Verdict(None, route.intent, expected)
+        scale = max(abs(expected), 1e-9)
+        if any(abs(value - expected) / scale <= self.tolerance for value in candidates):
+            return Verdict(None, route.intent, expected)
+
+        return Verdict(0.0, route.intent, expected, next(iter(candidates), None))
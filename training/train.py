@@ -10,7 +10,8 @@ from agno.db.json import JsonDb
 from core.config import AgentConfig, DEFAULT_DB_PATH
 from .config import TrainingConfig
 from .data.data_preparation import prepare_datasets
-from .engine.rollout import agno_agent_rollout, setup_trainer, get_initial_prompt
+from .engine.rollout import get_rollout_function, setup_trainer, get_initial_prompt
+from .engine.rollout_cache import rollout_cache_from_env
 from .utils.result_saver import save_training_results
 from .utils.store_manager import start_store_server
 from .utils.otlp import setup_otlp_exporter
@@ -43,9 +44,18 @@ def get_agent_config() -> AgentConfig:
 def get_training_config(args) -> TrainingConfig:
     """Get Training configuration from arguments."""
     return TrainingConfig(
+        cassette_mode=args.cassette,
+        cassette_path=args.cassette_path,
+        cassette_latency=args.cassette_latency,
+        rollout_cache_policy=args.rollout_cache,
+        session_store=args.session_store,
+        rollout_timeout=args.rollout_timeout,
+        speculative_percentile=args.speculative_percentile,
+        async_rollout=args.async_rollout,
         n_runners=args.workers,
         max_iterations=args.iterations,
         algorithm=args.algorithm,
+        apo_eval_mode=args.apo_eval,
         user_data_db_path=args.real_data_db if args.real_data_db else "agno_memory.db",
         otlp_endpoint="http://localhost:4318/v1/traces",
         agent_id="agno-agent-v1"
@@ -58,10 +68,19 @@ def main():
     parser = argparse.ArgumentParser(description="Train Agno Agent with AgentLightning")
     parser.add_argument("--iterations", type=int, default=1, help="Number of training iterations")
     parser.add_argument("--algorithm", type=str, default="apo", help="Training algorithm (apo, sft, rl)")
+    parser.add_argument("--apo-eval", type=str, choices=["full", "halving"], default="full", help="Evaluate APO candidates on the whole val batch or by successive halving")
     parser.add_argument("--workers", type=int, default=1, help="Number of parallel workers")
     parser.add_argument("--store-url", type=str, default="http://localhost:4747", help="URL for Lightning Store")
     parser.add_argument("--real-data-db", type=str, default=DEFAULT_DB_PATH, help="Path to real user data DB")
     parser.add_argument("--dry-run", action="store_true", help="Run without actual training")
+    parser.add_argument("--async-rollout", action="store_true", help="Use the async-native rollout function")
+    parser.add_argument("--rollout-cache", type=str, choices=["always", "run", "off"], default="run", help="Reuse rewards of repeated (prompt, task) evaluations")
+    parser.add_argument("--session-store", type=str, choices=["memory", "none", "sharded", "json"], default="memory", help="Where rollouts keep agent sessions")
+    parser.add_argument("--rollout-timeout", type=float, default=None, help="Per-rollout time budget in seconds")
+    parser.add_argument("--speculative-percentile", type=float, default=None, help="Start a backup run of rollouts slower than this latency percentile (e.g. 90)")
+    parser.add_argument("--cassette", type=str, choices=["record", "replay", "auto"], default=None, help="Record/replay all LLM calls")
+    parser.add_argument("--cassette-path", type=str, default=None, help="Cassette file (SQLite)")
+    parser.add_argument("--cassette-latency", type=str, default=None, help="Replay latency: 'recorded' or seconds")
     
     args = parser.parse_args()
 
@@ -125,12 +144,15 @@ def main():
     print("🔥 Starting training loop...")
     try:
         trainer.fit(
-            agent=agno_agent_rollout,
+            agent=get_rollout_function(training_config),
             train_dataset=train_dataset,
             val_dataset=val_dataset
         )
         print("\n" + "=" * 60)
         print("✅ Training complete!")
+        rollout_cache = rollout_cache_from_env()
+        if rollout_cache is not None:
+            print(f"♻️  Rollout cache ({rollout_cache.policy}): {rollout_cache.saved()} rollouts saved")
         
         # 6. Save results
         save_training_results(trainer, initial_prompt, training_config)